@@ -189,3 +189,88 @@ EMAIL_USE_TLS = os.getenv('EMAIL_USE_TLS', 'True') == 'True'
 EMAIL_HOST_USER = os.getenv('EMAIL_HOST_USER', '')
 EMAIL_HOST_PASSWORD = os.getenv('EMAIL_HOST_PASSWORD', '')
 DEFAULT_FROM_EMAIL = os.getenv('DEFAULT_FROM_EMAIL', 'BNI Chettinad Event <noreply@bnievent.com>')
+
+# Cache Configuration
+# 'otp' and 'config' are shared between worker processes on the same host
+# (file based) and work without any external cache server
+# 'default' holds cached public responses (sponsors, ticket limits, event
+# settings, ID card templates), QR scan data and reports. It is per process
+# unless REDIS_URL is set (needs the redis package); response version tokens
+# live in 'config', so invalidation reaches every worker either way
+REDIS_URL = os.getenv('REDIS_URL', '')
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': REDIS_URL,
+        'KEY_PREFIX': 'bnievent',
+    } if REDIS_URL else {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'OPTIONS': {'MAX_ENTRIES': 1000},
+    },
+    'otp': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.getenv('OTP_CACHE_DIR', str(BASE_DIR / 'cache' / 'otp')),
+        'TIMEOUT': 900,
+    },
+    'config': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.getenv('CONFIG_CACHE_DIR', str(BASE_DIR / 'cache' / 'config')),
+        'TIMEOUT': None,
+    },
+}
+
+# Config snapshots (sponsor ticket limits, ID card templates) are held in
+# process memory; workers compare version tokens in the 'config' cache at
+# most this often, so an admin change reaches every worker within this delay
+CONFIG_CACHE_ALIAS = 'config'
+CONFIG_CACHE_CHECK_SECONDS = float(os.getenv('CONFIG_CACHE_CHECK_SECONDS', '1'))
+
+# OTP Configuration
+# CacheOTPBackend keeps OTPs in the 'otp' cache; DatabaseOTPBackend uses the OTPVerification table
+OTP_BACKEND = os.getenv('OTP_BACKEND', 'registrations.otp_backends.CacheOTPBackend')
+OTP_CACHE_ALIAS = 'otp'
+OTP_AUDIT_VERIFIED = True  # Record successful verifications in OTPVerification
+OTP_KEEP_VERIFIED_DAYS = int(os.getenv('OTP_KEEP_VERIFIED_DAYS', '30'))  # Audit retention for verified OTPs
+OTP_COMPACTION_INTERVAL_MINUTES = int(os.getenv('OTP_COMPACTION_INTERVAL_MINUTES', '0'))  # 0 = run compact_otps from cron
+
+# Notification Configuration (OTP SMS/email delivery)
+NOTIFICATION_PROVIDERS = {
+    'sms': os.getenv('SMS_PROVIDER', 'registrations.notifications.ConsoleSMSProvider'),
+    'email': os.getenv('EMAIL_PROVIDER', 'registrations.notifications.DjangoEmailProvider'),
+}
+NOTIFICATION_WORKERS = int(os.getenv('NOTIFICATION_WORKERS', '4'))  # Concurrent sends per process
+NOTIFICATION_MAX_RETRIES = 3
+NOTIFICATION_RETRY_DELAY = 1.0  # Seconds, doubled after each failed attempt
+NOTIFICATION_ASYNC = True  # False sends inline (useful in tests)
+
+# Feedback Configuration
+# When enabled, public feedback submissions are validated, acknowledged with
+# 202 and inserted in batches by a background thread (for the post-event spike)
+FEEDBACK_QUEUE_ENABLED = os.getenv('FEEDBACK_QUEUE_ENABLED', 'False') == 'True'
+FEEDBACK_QUEUE_BATCH_SIZE = 200
+FEEDBACK_QUEUE_FLUSH_SECONDS = 1.0
+
+# Image proxy for Google Drive sponsor logos and ID card templates
+# Originals and resized variants are kept under MEDIA_ROOT/image_proxy;
+# LocalImageFetcher reads IMAGE_PROXY_LOCAL_DIR/<file_id> instead of Drive
+IMAGE_PROXY_FETCHER = os.getenv('IMAGE_PROXY_FETCHER', 'registrations.image_proxy.DriveImageFetcher')
+IMAGE_PROXY_LOCAL_DIR = os.getenv('IMAGE_PROXY_LOCAL_DIR', '')
+IMAGE_PROXY_MAX_BYTES = 10 * 1024 * 1024  # Largest Drive file accepted
+IMAGE_PROXY_SOURCE_MAX_AGE = int(os.getenv('IMAGE_PROXY_SOURCE_MAX_AGE', str(24 * 60 * 60)))  # Seconds before re-fetching from Drive
+
+# Upload Configuration (student ID cards, event logo)
+# Uploads are streamed to temporary files and cut off past UPLOAD_MAX_BYTES;
+# saved images are stripped of metadata, downscaled and given JPEG/WebP variants
+FILE_UPLOAD_HANDLERS = ['registrations.image_uploads.SizeLimitedUploadHandler']
+FILE_UPLOAD_TEMP_DIR = os.getenv('FILE_UPLOAD_TEMP_DIR') or None
+UPLOAD_MAX_BYTES = int(os.getenv('UPLOAD_MAX_BYTES', str(8 * 1024 * 1024)))
+IMAGE_UPLOAD_MAX_PIXELS = 40_000_000  # Rejects decompression bombs before they are decoded in full
+IMAGE_UPLOAD_MAX_DIMENSION = 2000  # Longest side of the stored original
+IMAGE_PROCESSING_ASYNC = True  # False processes inline after commit (useful in tests)
+
+# Backup Configuration
+# Directories for incremental snapshots (backup_snapshot / restore_snapshots)
+# and for full backups written from the admin (?to_file=1); both hold
+# personal data, so keep them outside MEDIA_ROOT's public URL in production
+BACKUP_SNAPSHOT_DIR = os.getenv('BACKUP_SNAPSHOT_DIR', str(BASE_DIR / 'backups' / 'snapshots'))
+BACKUP_FILE_DIR = os.getenv('BACKUP_FILE_DIR', str(BASE_DIR / 'backups' / 'files'))
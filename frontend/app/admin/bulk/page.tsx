@@ -33,7 +33,7 @@ interface BulkGroup {
   payment_status: string
   category_breakdown: { [key: string]: number }
   created_at: string
-  registrations: Registration[]
+  registrations?: Registration[]
 }
 
 export default function BulkRegistrationsAdmin() {
@@ -46,6 +46,7 @@ export default function BulkRegistrationsAdmin() {
   const [paymentFilter, setPaymentFilter] = useState('ALL')
   const [categoryFilter, setCategoryFilter] = useState('PAID') // Default to PUBLIC + STUDENTS only
   const [expandedGroups, setExpandedGroups] = useState<Set<string>>(new Set())
+  const [groupMembers, setGroupMembers] = useState<{ [groupId: string]: Registration[] }>({})
 
   useEffect(() => {
     const token = localStorage.getItem('access_token')
@@ -90,12 +91,38 @@ export default function BulkRegistrationsAdmin() {
     router.replace('/admin')
   }
 
+  // Member rows are loaded on first expand instead of with the group list
+  const fetchGroupMembers = async (groupId: string) => {
+    const token = localStorage.getItem('access_token')
+    if (!token) return
+    try {
+      const response = await fetch(`https://api.bnievent.rfidpro.in/api/bulk-registrations/${groupId}/`, {
+        headers: {
+          'Authorization': `Bearer ${token}`,
+        },
+      })
+      if (response.ok) {
+        const data = await response.json()
+        const members: Registration[] = (data.registrations || []).map((reg: Registration) => ({
+          ...reg,
+          amount: Number(reg.amount),
+        }))
+        setGroupMembers(prev => ({ ...prev, [groupId]: members }))
+      }
+    } catch (error) {
+      console.error('Error fetching booking group members:', error)
+    }
+  }
+
   const toggleGroupExpand = (groupId: string) => {
     const newExpanded = new Set(expandedGroups)
     if (newExpanded.has(groupId)) {
       newExpanded.delete(groupId)
     } else {
       newExpanded.add(groupId)
+      if (!groupMembers[groupId]) {
+        fetchGroupMembers(groupId)
+      }
     }
     setExpandedGroups(newExpanded)
   }
@@ -586,7 +613,14 @@ export default function BulkRegistrationsAdmin() {
                                 </tr>
                               </thead>
                               <tbody>
-                                {group.registrations.map((reg) => (
+                                {!groupMembers[group.booking_group_id] && (
+                                  <tr>
+                                    <td colSpan={8} style={{ padding: '10px', color: '#666', textAlign: 'center' }}>
+                                      Loading attendees...
+                                    </td>
+                                  </tr>
+                                )}
+                                {(groupMembers[group.booking_group_id] || []).map((reg) => (
                                   <tr
                                     key={reg.id}
                                     style={{
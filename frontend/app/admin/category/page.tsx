@@ -17,6 +17,7 @@ interface Registration {
   amount: string
   created_at: string
   student_id_card: string | null
+  student_id_card_variants?: { display?: { jpeg: string; webp: string } }
 }
 
 interface Member {
@@ -711,7 +712,7 @@ function CategoryContent() {
                       {reg.student_id_card ? (
                         <button
                           onClick={() => {
-                            setSelectedImage(reg.student_id_card)
+                            setSelectedImage(reg.student_id_card_variants?.display?.jpeg || reg.student_id_card)
                             setSelectedStudentName(reg.name)
                             setShowImageModal(true)
                           }}
@@ -118,48 +118,41 @@ export default function PaymentReport() {
     }
   })
 
-  const exportToCSV = () => {
-    const headers = [
-      'Ticket No',
-      'Name',
-      'Mobile',
-      'Email',
-      'Category',
-      'Payment Status',
-      'Gateway Verified',
-      'Amount (₹)',
-      'Payment ID',
-      'Order ID',
-      'Payment Date',
-      'Created At'
-    ]
+  const exportReport = async (fileFormat: 'csv' | 'xlsx') => {
+    const token = localStorage.getItem('access_token')
+    if (!token) {
+      router.replace('/admin')
+      return
+    }
+
+    // The server streams the file with the same filters applied
+    const params = new URLSearchParams({ file_format: fileFormat })
+    if (statusFilter !== 'ALL') params.set('payment_status', statusFilter)
+    if (categoryFilter !== 'ALL') params.set('category', categoryFilter)
+    if (gatewayFilter !== 'ALL') params.set('gateway_verified', gatewayFilter === 'VERIFIED' ? 'true' : 'false')
 
-    const csvData = filteredRegistrations.map(reg => [
-      reg.ticket_no,
-      reg.name,
-      reg.mobile_number,
-      reg.email,
-      reg.registration_for || 'N/A',
-      reg.payment_status,
-      reg.gateway_verified ? 'Yes' : 'No',
-      reg.amount,
-      reg.payment_id || '',
-      reg.order_id || '',
-      reg.payment_date ? new Date(reg.payment_date).toLocaleString() : '',
-      new Date(reg.created_at).toLocaleString()
-    ])
+    try {
+      const response = await fetch(`https://api.bnievent.rfidpro.in/api/registrations/export/?${params}`, {
+        headers: {
+          'Authorization': `Bearer ${token}`,
+        },
+      })
 
-    const csv = [
-      headers.join(','),
-      ...csvData.map(row => row.map(cell => `"${cell}"`).join(','))
-    ].join('\n')
+      if (!response.ok) {
+        alert('Failed to export payment report')
+        return
+      }
 
-    const blob = new Blob([csv], { type: 'text/csv' })
-    const url = window.URL.createObjectURL(blob)
-    const a = document.createElement('a')
-    a.href = url
-    a.download = `payment_report_${new Date().toISOString().split('T')[0]}.csv`
-    a.click()
+      const blob = await response.blob()
+      const url = window.URL.createObjectURL(blob)
+      const a = document.createElement('a')
+      a.href = url
+      a.download = `payment_report_${new Date().toISOString().split('T')[0]}.${fileFormat}`
+      a.click()
+      window.URL.revokeObjectURL(url)
+    } catch (error) {
+      alert('Error connecting to server')
+    }
   }
 
   const getPaymentStatusColor = (status: string) => {
@@ -557,7 +550,7 @@ export default function PaymentReport() {
           </select>
 
           <button
-            onClick={exportToCSV}
+            onClick={() => exportReport('csv')}
             style={{
               padding: '12px 24px',
               backgroundColor: '#28a745',
@@ -576,6 +569,26 @@ export default function PaymentReport() {
           >
             📊 Export to CSV
           </button>
+
+          <button
+            onClick={() => exportReport('xlsx')}
+            style={{
+              padding: '12px 24px',
+              backgroundColor: '#28a745',
+              color: 'white',
+              border: 'none',
+              borderRadius: '6px',
+              fontSize: '14px',
+              fontWeight: '600',
+              fontFamily: "'Inter', sans-serif",
+              cursor: 'pointer',
+              transition: 'background-color 0.2s ease',
+            }}
+            onMouseOver={(e) => e.currentTarget.style.backgroundColor = '#218838'}
+            onMouseOut={(e) => e.currentTarget.style.backgroundColor = '#28a745'}
+          >
+            📗 Export to Excel
+          </button>
         </div>
 
         {/* Payment Details Table */}
@@ -9,6 +9,7 @@ interface Sponsor {
   category_display: string
   logo_url: string
   direct_image_url: string
+  proxy_image_url: string | null
   company_name: string | null
   display_order: number
   is_active: boolean
@@ -561,7 +562,7 @@ export default function SponsorsManagement() {
                         overflow: 'hidden'
                       }}>
                         <img
-                          src={sponsor.direct_image_url}
+                          src={sponsor.proxy_image_url || sponsor.direct_image_url}
                           alt={sponsor.company_name || 'Sponsor logo'}
                           style={{
                             maxWidth: '100%',
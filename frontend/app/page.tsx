@@ -285,7 +285,7 @@ export default function Home() {
               {[...sponsors.title_sponsors, ...sponsors.title_sponsors].map((sponsor: any, index: number) => (
                 <div key={index} className="sponsor-logo-item">
                   <img
-                    src={sponsor.direct_image_url}
+                    src={sponsor.proxy_image_url || sponsor.direct_image_url}
                     alt={sponsor.company_name || 'Sponsor'}
                     style={{
                       maxWidth: '150px',
@@ -953,7 +953,7 @@ export default function Home() {
               {[...sponsors.associate_sponsors, ...sponsors.associate_sponsors].map((sponsor: any, index: number) => (
                 <div key={index} className="sponsor-logo-item">
                   <img
-                    src={sponsor.direct_image_url}
+                    src={sponsor.proxy_image_url || sponsor.direct_image_url}
                     alt={sponsor.company_name || 'Sponsor'}
                     style={{
                       maxWidth: '140px',
@@ -996,7 +996,7 @@ export default function Home() {
               {[...sponsors.co_sponsors, ...sponsors.co_sponsors].map((sponsor: any, index: number) => (
                 <div key={index} className="sponsor-logo-item">
                   <img
-                    src={sponsor.direct_image_url}
+                    src={sponsor.proxy_image_url || sponsor.direct_image_url}
                     alt={sponsor.company_name || 'Sponsor'}
                     style={{
                       maxWidth: '120px',
@@ -1,12 +1,15 @@
 from django.contrib import admin
 from django.utils.html import format_html
-from django.http import HttpResponse, JsonResponse
+from django.conf import settings
+from django.http import JsonResponse, StreamingHttpResponse, FileResponse, Http404
 from django.contrib.admin.views.decorators import staff_member_required
-from django.core.management import call_command
-from django.urls import path
+from django.urls import path, reverse
 from datetime import datetime
-import io
+import os
+import re
+import secrets
 from .models import Registration, EventSettings, ScanLog, OTPVerification, BNIMember, SponsorTicketLimit, Sponsor, IDCardTemplate, EventFeedback
+from .backup import resolve_models, backup_stream, write_backup
 
 
 @admin.register(EventSettings)
@@ -438,33 +441,62 @@ class EventFeedbackAdmin(admin.ModelAdmin):
 
 
 # Custom Admin View for Database Backup
+BACKUP_FILE_PATTERN = re.compile(r'^bnievent_backup_\d{8}_\d{6}_[0-9a-f]{16}\.jsonl\.gz$')
+
+
 @staff_member_required
 def download_database_backup(request):
     """
-    Download complete database backup as JSON
+    Stream a gzipped JSON Lines database backup (one object per line)
     Requires admin authentication (same as admin login)
+
+    Query params:
+        models: optional comma-separated model/app labels, e.g.
+            registrations.Registration,registrations.ScanLog
+        to_file: 1 to write the backup under BACKUP_FILE_DIR and return
+            a download link instead of streaming it
     """
-    # Create a BytesIO buffer to receive the JSON data
-    buffer = io.StringIO()
-    
-    # Generate JSON backup using Django's dumpdata command
-    call_command('dumpdata', '--indent', '2', stdout=buffer)
-    
-    # Get the JSON content
-    json_content = buffer.getvalue()
-    buffer.close()
-    
-    # Create filename with timestamp
+    labels = [label.strip() for label in request.GET.get('models', '').split(',') if label.strip()]
+    try:
+        models = resolve_models(labels)
+    except LookupError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
     timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-    filename = f'bnievent_backup_{timestamp}.json'
-    
-    # Return as downloadable file
-    response = HttpResponse(json_content, content_type='application/json')
-    response['Content-Disposition'] = f'attachment; filename="{filename}"'
-    
+
+    if request.GET.get('to_file') == '1':
+        backup_dir = settings.BACKUP_FILE_DIR
+        os.makedirs(backup_dir, exist_ok=True)
+        # Random suffix so backup names cannot be guessed
+        filename = f'bnievent_backup_{timestamp}_{secrets.token_hex(8)}.jsonl.gz'
+        count = write_backup(os.path.join(backup_dir, filename), models)
+        return JsonResponse({
+            'success': True,
+            'filename': filename,
+            'objects': count,
+            'download_url': reverse('admin:backup_file', args=[filename]),
+        })
+
+    response = StreamingHttpResponse(backup_stream(models), content_type='application/gzip')
+    response['Content-Disposition'] = f'attachment; filename="bnievent_backup_{timestamp}.jsonl.gz"'
     return response
 
 
+@staff_member_required
+def download_backup_file(request, filename):
+    """
+    Serve a backup written by download_database_backup(to_file=1)
+    BACKUP_FILE_DIR is outside MEDIA_ROOT, so backups are only reachable
+    through this (staff-only) view
+    """
+    if not BACKUP_FILE_PATTERN.match(filename):
+        raise Http404('Backup not found')
+    path = os.path.join(settings.BACKUP_FILE_DIR, filename)
+    if not os.path.exists(path):
+        raise Http404('Backup not found')
+    return FileResponse(open(path, 'rb'), as_attachment=True, filename=filename, content_type='application/gzip')
+
+
 # Override admin site to add custom URL
 from django.contrib.admin import AdminSite
 
@@ -478,6 +510,7 @@ class BNIAdminSite(AdminSite):
         urls = super().get_urls()
         custom_urls = [
             path('backup/download/', self.admin_view(download_database_backup), name='backup_download'),
+            path('backup/files/<str:filename>/', self.admin_view(download_backup_file), name='backup_file'),
         ]
         return custom_urls + urls
 
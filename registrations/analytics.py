@@ -0,0 +1,499 @@
+"""
+Attendance analytics computed with database aggregates
+"""
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.db import transaction
+from django.db.models import Case, Count, DecimalField, Exists, F, Min, OuterRef, Q, Sum, Value, When
+from django.db.models.functions import Coalesce, TruncDate, TruncMinute
+from django.utils import timezone
+from datetime import datetime, timedelta
+from decimal import Decimal
+from .models import Registration, BookingGroup, ScanLog, EventFeedback, FeedbackStats
+from .cache_utils import shared_version, bump_shared_version
+import uuid
+
+ARRIVALS_CACHE_KEY = 'analytics:arrivals:closed'
+ARRIVALS_CACHE_TIMEOUT = 60 * 60 * 24  # closed minutes never change, keep them for a day
+ARRIVALS_VERSION_KEY = 'analytics:arrivals:version'  # in the shared 'config' cache
+
+FEEDBACK_STATS_VERSION_KEY = 'analytics:feedback:version'  # in the shared 'config' cache
+FEEDBACK_STATS_CACHE_TIMEOUT = 60 * 60  # invalidated on every feedback change anyway
+RATINGS = range(1, 6)
+
+PAYMENT_REPORT_VERSION_KEY = 'analytics:payments:version'  # in the shared 'config' cache
+PAYMENT_REPORT_CACHE_TIMEOUT = 60 * 5  # stale-PENDING cut-off moves with the clock
+
+
+def first_check_ins():
+    """CHECK_IN scans that are the first check-in for their ticket (duplicate scans excluded)"""
+    earlier_check_in = ScanLog.objects.filter(
+        ticket_no=OuterRef('ticket_no'),
+        action='CHECK_IN',
+        scanned_at__lt=OuterRef('scanned_at')
+    )
+    return ScanLog.objects.filter(action='CHECK_IN').exclude(Exists(earlier_check_in))
+
+
+def _minute_rows(since=None):
+    """
+    First check-ins per minute, category and gate in one aggregate query
+    Returns: list of {minute, category, gate, count} with minute as ISO string
+    """
+    queryset = first_check_ins()
+    if since is not None:
+        queryset = queryset.filter(scanned_at__gte=since)
+
+    rows = queryset.annotate(
+        minute=TruncMinute('scanned_at')
+    ).values(
+        'minute', 'registration__registration_for', 'scanned_by'
+    ).annotate(count=Count('id')).order_by('minute')
+
+    return [
+        {
+            'minute': row['minute'].isoformat(),
+            'category': row['registration__registration_for'] or 'UNKNOWN',
+            'gate': row['scanned_by'] or 'unknown',
+            'count': row['count'],
+        }
+        for row in rows
+    ]
+
+
+def _arrivals_version_cache():
+    return caches[getattr(settings, 'CONFIG_CACHE_ALIAS', 'default')]
+
+
+def _has_late_check_ins(until):
+    """True if check-ins timed before `until` were inserted after it (gate-node back-fill)"""
+    return ScanLog.objects.filter(action='CHECK_IN', created_at__gte=until, scanned_at__lt=until).exists()
+
+
+def get_arrival_minute_rows():
+    """
+    Per-minute arrival rows for the whole event
+    Minutes that have closed are cached and only recomputed when they are
+    invalidated or receive back-filled scans; otherwise only scans from the
+    last cached boundary onwards are aggregated on each call
+    """
+    closed_until = timezone.now().replace(second=0, microsecond=0)
+    version = _arrivals_version_cache().get_or_set(ARRIVALS_VERSION_KEY, uuid.uuid4().hex, None)
+    state = cache.get(ARRIVALS_CACHE_KEY)
+    if state and (state.get('version') != version or _has_late_check_ins(datetime.fromisoformat(state['until']))):
+        state = None
+
+    since = datetime.fromisoformat(state['until']) if state else None
+    fresh_rows = _minute_rows(since)
+
+    closed_rows = list(state['rows']) if state else []
+    open_rows = []
+    boundary = closed_until.isoformat()
+    for row in fresh_rows:
+        if datetime.fromisoformat(row['minute']) < closed_until:
+            closed_rows.append(row)
+        else:
+            open_rows.append(row)
+
+    cache.set(ARRIVALS_CACHE_KEY, {'until': boundary, 'version': version, 'rows': closed_rows}, ARRIVALS_CACHE_TIMEOUT)
+    return closed_rows + open_rows
+
+
+def invalidate_arrival_stats():
+    """
+    Forget cached closed minutes in every worker (e.g. after scan logs are
+    deleted or back-filled) once the current transaction commits
+    """
+    transaction.on_commit(
+        lambda: _arrivals_version_cache().set(ARRIVALS_VERSION_KEY, uuid.uuid4().hex, None)
+    )
+
+
+def get_arrival_stats(bucket_minutes=5, start=None, end=None):
+    """
+    Check-ins bucketed by time with per-category and per-gate breakdowns,
+    plus cumulative attendance against paid registrations
+    """
+    if start is not None and timezone.is_naive(start):
+        start = timezone.make_aware(start)
+    if end is not None and timezone.is_naive(end):
+        end = timezone.make_aware(end)
+
+    buckets = {}
+    totals_by_category = {}
+    checked_in_before = 0
+
+    for row in get_arrival_minute_rows():
+        minute = datetime.fromisoformat(row['minute'])
+        if end is not None and minute >= end:
+            continue
+        if start is not None and minute < start:
+            checked_in_before += row['count']
+            totals_by_category[row['category']] = totals_by_category.get(row['category'], 0) + row['count']
+            continue
+
+        bucket_start = minute - timedelta(minutes=minute.minute % bucket_minutes)
+        bucket = buckets.setdefault(bucket_start, {'check_ins': 0, 'by_category': {}, 'by_gate': {}})
+        bucket['check_ins'] += row['count']
+        bucket['by_category'][row['category']] = bucket['by_category'].get(row['category'], 0) + row['count']
+        bucket['by_gate'][row['gate']] = bucket['by_gate'].get(row['gate'], 0) + row['count']
+        totals_by_category[row['category']] = totals_by_category.get(row['category'], 0) + row['count']
+
+    paid_by_category = dict(
+        Registration.objects.filter(payment_status='SUCCESS').values(
+            'registration_for'
+        ).annotate(count=Count('id')).values_list('registration_for', 'count')
+    )
+
+    cumulative = checked_in_before
+    bucket_list = []
+    for bucket_start in sorted(buckets):
+        bucket = buckets[bucket_start]
+        cumulative += bucket['check_ins']
+        bucket_list.append({
+            'start': bucket_start.isoformat(),
+            'check_ins': bucket['check_ins'],
+            'cumulative': cumulative,
+            'by_category': bucket['by_category'],
+            'by_gate': bucket['by_gate'],
+        })
+
+    total_paid = sum(paid_by_category.values())
+    categories = sorted(set(paid_by_category) | set(totals_by_category))
+
+    return {
+        'bucket_minutes': bucket_minutes,
+        'buckets': bucket_list,
+        'totals': {
+            'checked_in': cumulative,
+            'paid': total_paid,
+            'attendance_rate': round(cumulative / total_paid * 100, 2) if total_paid else 0,
+            'by_category': {
+                category: {
+                    'checked_in': totals_by_category.get(category, 0),
+                    'paid': paid_by_category.get(category, 0),
+                }
+                for category in categories
+            },
+        },
+    }
+
+
+def _feedback_aggregates():
+    """Conditional aggregates computed per registration category in one GROUP BY"""
+    aggregates = {
+        'total': Count('id'),
+        'overall_sum': Sum('overall_rating'),
+        'speaker_sum': Sum('speaker_rating'),
+        'join_yes': Count('id', filter=Q(attend_future='YES')),
+        'join_maybe': Count('id', filter=Q(attend_future='MAYBE')),
+        'join_no': Count('id', filter=Q(attend_future='NO')),
+    }
+    for rating in RATINGS:
+        aggregates[f'overall_{rating}'] = Count('id', filter=Q(overall_rating=rating))
+        aggregates[f'speaker_{rating}'] = Count('id', filter=Q(speaker_rating=rating))
+    return aggregates
+
+
+def _feedback_block(total, overall_sum, speaker_sum, join, overall_hist, speaker_hist):
+    return {
+        'total_feedback': total,
+        'average_rating': round(overall_sum / total, 2) if total else 0,
+        'average_speaker_rating': round(speaker_sum / total, 2) if total else 0,
+        'join_bni': join,
+        'rating_distribution': {
+            'overall': overall_hist,
+            'speaker': speaker_hist,
+        },
+    }
+
+
+def _stats_from_rows(rows):
+    """
+    Combine per-category rows (keys: category, total, overall_sum,
+    speaker_sum, join_*, overall_N, speaker_N) into the stats block
+    """
+    totals = {'total': 0, 'overall_sum': 0, 'speaker_sum': 0, 'yes': 0, 'maybe': 0, 'no': 0}
+    overall_hist = {str(rating): 0 for rating in RATINGS}
+    speaker_hist = {str(rating): 0 for rating in RATINGS}
+    by_category = {}
+
+    for row in rows:
+        if not row['total']:
+            continue
+        join = {'yes': row['join_yes'], 'maybe': row['join_maybe'], 'no': row['join_no']}
+        category_overall = {str(rating): row[f'overall_{rating}'] for rating in RATINGS}
+        category_speaker = {str(rating): row[f'speaker_{rating}'] for rating in RATINGS}
+        by_category[row['category'] or 'UNKNOWN'] = _feedback_block(
+            row['total'], row['overall_sum'] or 0, row['speaker_sum'] or 0, join, category_overall, category_speaker
+        )
+
+        totals['total'] += row['total']
+        totals['overall_sum'] += row['overall_sum'] or 0
+        totals['speaker_sum'] += row['speaker_sum'] or 0
+        for key in ('yes', 'maybe', 'no'):
+            totals[key] += join[key]
+        for rating in category_overall:
+            overall_hist[rating] += category_overall[rating]
+            speaker_hist[rating] += category_speaker[rating]
+
+    stats = _feedback_block(
+        totals['total'], totals['overall_sum'], totals['speaker_sum'],
+        {'yes': totals['yes'], 'maybe': totals['maybe'], 'no': totals['no']},
+        overall_hist, speaker_hist
+    )
+    stats['by_category'] = by_category
+    return stats
+
+
+def compute_feedback_stats(queryset=None):
+    """
+    Feedback statistics (totals, averages, join-BNI counts, rating histograms)
+    overall and per registration category, from a single aggregate query
+    """
+    if queryset is None:
+        queryset = EventFeedback.objects.all()
+
+    return _stats_from_rows(
+        queryset.order_by().values(
+            category=F('registration__registration_for')
+        ).annotate(**_feedback_aggregates())
+    )
+
+
+def feedback_stats_from_table(category=None):
+    """
+    Same shape as compute_feedback_stats, read from the FeedbackStats
+    running totals (one row per category) instead of scanning EventFeedback
+    """
+    rows = FeedbackStats.objects.all()
+    if category:
+        rows = rows.filter(category=category)
+    return _stats_from_rows(rows.values())
+
+
+def get_feedback_stats(category=None, min_rating=None):
+    """
+    Feedback statistics for the given filters
+    Without min_rating the answer comes straight from the FeedbackStats
+    running totals; rating-filtered stats are aggregated and cached until
+    the next feedback change replaces the version token
+    """
+    if not min_rating:
+        return feedback_stats_from_table(category)
+
+    version = shared_version(FEEDBACK_STATS_VERSION_KEY)
+    key = f'analytics:feedback:{version}:{category or ""}:{min_rating}'
+    stats = cache.get(key)
+    if stats is None:
+        queryset = EventFeedback.objects.filter(overall_rating__gte=min_rating)
+        if category:
+            queryset = queryset.filter(registration__registration_for=category)
+        stats = compute_feedback_stats(queryset)
+        cache.set(key, stats, FEEDBACK_STATS_CACHE_TIMEOUT)
+    return stats
+
+
+def invalidate_feedback_stats():
+    """Retire all cached feedback statistics in every worker once the current transaction commits"""
+    bump_shared_version(FEEDBACK_STATS_VERSION_KEY)
+
+
+def _payment_aggregates():
+    """Payment counts and amounts by status and verification, for one GROUP BY"""
+    zero = Value(Decimal('0'), output_field=DecimalField(max_digits=12, decimal_places=2))
+    success = Q(payment_status='SUCCESS')
+    return {
+        'registrations': Count('id'),
+        'success_count': Count('id', filter=success),
+        'pending_count': Count('id', filter=Q(payment_status='PENDING')),
+        'failed_count': Count('id', filter=Q(payment_status='FAILED')),
+        'total_amount': Coalesce(Sum('amount'), zero),
+        'confirmed_amount': Coalesce(Sum('amount', filter=success), zero),
+        'pending_amount': Coalesce(Sum('amount', filter=Q(payment_status='PENDING')), zero),
+        'gateway_verified_count': Count('id', filter=success & Q(gateway_verified=True)),
+        'gateway_verified_amount': Coalesce(Sum('amount', filter=success & Q(gateway_verified=True)), zero),
+        'manual_count': Count('id', filter=success & Q(gateway_verified=False)),
+        'manual_amount': Coalesce(Sum('amount', filter=success & Q(gateway_verified=False)), zero),
+    }
+
+
+PAYMENT_AMOUNT_KEYS = (
+    'total_amount', 'confirmed_amount', 'pending_amount', 'gateway_verified_amount', 'manual_amount',
+)
+
+
+def _payment_row(row):
+    """Aggregate row with amounts as floats (JSON/cache friendly)"""
+    return {key: float(value) if key in PAYMENT_AMOUNT_KEYS else value for key, value in row.items()}
+
+
+def expected_group_total():
+    """SQL expression for BookingGroup.expected_total(): attendees x the primary's per-person price"""
+    price = Case(
+        *[
+            When(primary_registration__registration_for=category, then=Value(Decimal(amount)))
+            for category, amount in BookingGroup.PER_PERSON_PRICE.items()
+        ],
+        default=Value(Decimal('0')),
+        output_field=DecimalField(max_digits=10, decimal_places=2),
+    )
+    return F('total_attendees') * price
+
+
+def bulk_payment_mismatches(date_from=None, date_to=None):
+    """
+    Bulk groups whose primary paid (SUCCESS) an amount different from
+    attendees x per-person price, as value rows (difference = paid - expected)
+    """
+    groups = BookingGroup.objects.filter(
+        primary_registration__payment_status='SUCCESS',
+        primary_registration__registration_for__in=list(BookingGroup.PER_PERSON_PRICE),
+    )
+    if date_from:
+        groups = groups.filter(created_at__date__gte=date_from)
+    if date_to:
+        groups = groups.filter(created_at__date__lte=date_to)
+
+    return groups.annotate(
+        expected_amount=expected_group_total(),
+        paid_amount=F('primary_registration__amount'),
+    ).exclude(
+        paid_amount=F('expected_amount')
+    ).order_by('created_at').values(
+        'booking_group_id', 'primary_ticket_no', 'primary_booker_name',
+        category=F('primary_registration__registration_for'),
+        attendees=F('total_attendees'),
+        expected=F('expected_amount'),
+        paid=F('paid_amount'),
+        difference=F('paid_amount') - F('expected_amount'),
+        gateway_verified=F('primary_registration__gateway_verified'),
+        members_confirmed=F('success_count'),
+    )
+
+
+def stale_pending_registrations(pending_hours=24, date_from=None, date_to=None):
+    """PENDING registrations created more than pending_hours ago, oldest first"""
+    queryset = Registration.objects.filter(
+        payment_status='PENDING',
+        created_at__lt=timezone.now() - timedelta(hours=pending_hours),
+    )
+    if date_from:
+        queryset = queryset.filter(created_at__date__gte=date_from)
+    if date_to:
+        queryset = queryset.filter(created_at__date__lte=date_to)
+    return queryset.order_by('created_at', 'id')
+
+
+STALE_PENDING_FIELDS = (
+    'ticket_no', 'name', 'mobile_number', 'registration_for', 'amount', 'order_id', 'booking_group_id', 'created_at',
+)
+
+
+def compute_payment_reconciliation(pending_hours=24, date_from=None, date_to=None, stale_limit=100):
+    """
+    Payment reconciliation from aggregate queries:
+    totals, per category, per day and category, bulk groups whose primary
+    payment does not match per-person pricing and stale PENDING rows
+    (summary plus the oldest stale_limit rows)
+    """
+    registrations = Registration.objects.all()
+    if date_from:
+        registrations = registrations.filter(created_at__date__gte=date_from)
+    if date_to:
+        registrations = registrations.filter(created_at__date__lte=date_to)
+
+    by_category = [
+        _payment_row(row) for row in registrations.order_by().values(
+            category=F('registration_for')
+        ).annotate(**_payment_aggregates()).order_by('category')
+    ]
+
+    by_day = [
+        _payment_row({**row, 'day': row['day'].isoformat()}) for row in registrations.order_by().annotate(
+            day=TruncDate('created_at')
+        ).values('day', category=F('registration_for')).annotate(**_payment_aggregates()).order_by('day', 'category')
+    ]
+
+    totals = _payment_row(registrations.aggregate(**_payment_aggregates()))
+
+    mismatches = [
+        {**row, 'expected': float(row['expected']), 'paid': float(row['paid']), 'difference': float(row['difference'])}
+        for row in bulk_payment_mismatches(date_from, date_to)
+    ]
+
+    stale = stale_pending_registrations(pending_hours, date_from, date_to)
+    stale_summary = stale.aggregate(
+        count=Count('id'),
+        amount=Coalesce(Sum('amount'), Value(Decimal('0'), output_field=DecimalField(max_digits=12, decimal_places=2))),
+        oldest=Min('created_at'),
+    )
+    stale_rows = [
+        {**row, 'amount': float(row['amount']), 'created_at': row['created_at'].isoformat()}
+        for row in stale.values(*STALE_PENDING_FIELDS)[:stale_limit]
+    ]
+
+    return {
+        'generated_at': timezone.now().isoformat(),
+        'filters': {
+            'date_from': date_from.isoformat() if date_from else None,
+            'date_to': date_to.isoformat() if date_to else None,
+            'pending_hours': pending_hours,
+        },
+        'totals': totals,
+        'by_category': by_category,
+        'by_day': by_day,
+        'bulk_mismatches': mismatches,
+        'stale_pending': {
+            'count': stale_summary['count'],
+            'amount': float(stale_summary['amount']),
+            'oldest': stale_summary['oldest'].isoformat() if stale_summary['oldest'] else None,
+            'rows': stale_rows,
+        },
+    }
+
+
+def get_payment_reconciliation(pending_hours=24, date_from=None, date_to=None, refresh=False):
+    """
+    Cached compute_payment_reconciliation; registration changes replace the
+    version token so the next request in any worker recomputes
+    """
+    version = shared_version(PAYMENT_REPORT_VERSION_KEY)
+    key = f'analytics:payments:{version}:{pending_hours}:{date_from or ""}:{date_to or ""}'
+    report = None if refresh else cache.get(key)
+    if report is None:
+        report = compute_payment_reconciliation(pending_hours, date_from, date_to)
+        cache.set(key, report, PAYMENT_REPORT_CACHE_TIMEOUT)
+    return report
+
+
+def invalidate_payment_report():
+    """Retire all cached payment reconciliation reports in every worker once the current transaction commits"""
+    bump_shared_version(PAYMENT_REPORT_VERSION_KEY)
+
+
+BULK_MISMATCH_FIELDS = (
+    'booking_group_id', 'primary_ticket_no', 'primary_booker_name', 'category', 'attendees',
+    'expected', 'paid', 'difference', 'gateway_verified', 'members_confirmed',
+)
+
+PAYMENT_REPORT_SECTIONS = ('by_category', 'by_day', 'bulk_mismatches', 'stale_pending')
+
+
+def payment_report_section(section, pending_hours=24, date_from=None, date_to=None):
+    """
+    One report section as (header, rows) for export; stale_pending streams
+    every stale row rather than the sample kept in the cached report
+    """
+    if section == 'stale_pending':
+        rows = stale_pending_registrations(pending_hours, date_from, date_to).values_list(
+            *STALE_PENDING_FIELDS
+        ).iterator(chunk_size=2000)
+        return list(STALE_PENDING_FIELDS), rows
+
+    report = get_payment_reconciliation(pending_hours, date_from, date_to)
+    if section == 'bulk_mismatches':
+        header = list(BULK_MISMATCH_FIELDS)
+    else:
+        header = (['day'] if section == 'by_day' else []) + ['category'] + list(_payment_aggregates())
+    return header, ([row[key] for key in header] for row in report[section])
@@ -1,5 +1,20 @@
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class RegistrationsConfig(AppConfig):
     name = 'registrations'
+
+    def ready(self):
+        # Register signal handlers
+        from . import signals  # noqa: F401
+
+        # Optional in-process OTP table compaction (0 disables; use the
+        # compact_otps command from cron instead when running several workers)
+        interval = getattr(settings, 'OTP_COMPACTION_INTERVAL_MINUTES', 0)
+        if interval:
+            from .maintenance import start_otp_compaction_scheduler
+            start_otp_compaction_scheduler(
+                interval,
+                keep_verified_days=getattr(settings, 'OTP_KEEP_VERIFIED_DAYS', 30)
+            )
@@ -0,0 +1,485 @@
+"""
+Streaming database backup and restore (gzipped JSON Lines)
+
+Each line is one object in Django's serialization format
+({"model": ..., "pk": ..., "fields": {...}}), written model by model in
+dependency order and read in chunks, so neither backup nor restore holds the
+whole database in memory. Foreign keys to models with natural keys (e.g.
+Registration by ticket_no, User by username) are written as natural keys.
+
+Snapshots (take_snapshot / restore_snapshots) add incremental backups: a
+directory holds a full snapshot followed by increments, chained through
+manifest.json. An increment starts with delete records for its models
+({"model": ..., "deleted": [pks]} from DeletedRecord tombstones, or
+{"model": ..., "keep": [pks]} for small tables copied whole) followed by the
+rows changed since the previous snapshot.
+"""
+from django.apps import apps
+from django.core import serializers
+from django.core.serializers.json import DjangoJSONEncoder
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from .exports import gzip_chunks
+from .config_cache import invalidate_all as invalidate_config_snapshots
+from .cache_utils import invalidate_public_response, PUBLIC_RESPONSE_GROUPS
+import gzip
+import hashlib
+import json
+import os
+
+# Regenerated by migrate or purely ephemeral - not worth backing up
+EXCLUDED_MODELS = {
+    'contenttypes.contenttype',
+    'auth.permission',
+    'sessions.session',
+    'admin.logentry',
+    'registrations.deletedrecord',
+}
+
+# Models copied incrementally: label -> timestamp that moves on every change.
+# Deletes of these models are recorded as DeletedRecord tombstones.
+INCREMENTAL_FIELDS = {
+    'registrations.eventsettings': 'updated_at',
+    'registrations.idcardtemplate': 'updated_at',
+    'registrations.registration': 'updated_at',
+    'registrations.bookinggroup': 'updated_at',
+    'registrations.bnimember': 'updated_at',
+    'registrations.sponsorticketlimit': 'updated_at',
+    'registrations.sponsor': 'updated_at',
+}
+
+# Append-only models: label -> insertion timestamp; increments copy new rows
+# only (deletes are archiving, or cascade from a tombstoned Registration).
+# ScanLog uses created_at, not scanned_at: rows synced from gate nodes carry
+# their older, original scan time
+APPEND_ONLY_FIELDS = {
+    'registrations.scanlog': 'created_at',
+}
+
+# Any other model is copied whole into each increment.
+
+# Re-read this much before the previous snapshot so rows committed by
+# transactions that were still open when it was taken are not missed
+SNAPSHOT_OVERLAP = timedelta(minutes=5)
+
+MANIFEST_NAME = 'manifest.json'
+
+
+def resolve_models(labels=None):
+    """
+    Models to back up, in dependency order
+    labels: optional list of 'app_label.ModelName' / 'app_label' strings
+    """
+    if labels:
+        selected = []
+        for label in labels:
+            if '.' in label:
+                selected.append(apps.get_model(label))
+            else:
+                selected.extend(apps.get_app_config(label).get_models())
+    else:
+        selected = [
+            model for model in apps.get_models()
+            if model._meta.label_lower not in EXCLUDED_MODELS and not model._meta.proxy
+        ]
+
+    app_list = {}
+    for model in selected:
+        app_list.setdefault(apps.get_app_config(model._meta.app_label), []).append(model)
+    return serializers.sort_dependencies(app_list.items(), allow_cycles=True)
+
+
+class _BackupEncoder(DjangoJSONEncoder):
+    """DjangoJSONEncoder, but datetimes keep their microseconds"""
+
+    def default(self, o):
+        if isinstance(o, datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+def _to_line(record):
+    return json.dumps(record, cls=_BackupEncoder, ensure_ascii=False) + '\n'
+
+
+def _object_records(queryset, chunk_size):
+    """Serialize a queryset in pk order, chunk_size objects at a time"""
+    queryset = queryset.order_by(queryset.model._meta.pk.name)
+    chunk = []
+    for obj in queryset.iterator(chunk_size=chunk_size):
+        chunk.append(obj)
+        if len(chunk) >= chunk_size:
+            yield from serializers.serialize('python', chunk, use_natural_foreign_keys=True)
+            chunk = []
+    if chunk:
+        yield from serializers.serialize('python', chunk, use_natural_foreign_keys=True)
+
+
+def backup_lines(models, chunk_size=1000):
+    """Yield one JSON line per object for each model"""
+    for model in models:
+        for record in _object_records(model._default_manager.all(), chunk_size):
+            yield _to_line(record)
+
+
+def backup_stream(models, chunk_size=1000):
+    """Gzip-compressed backup as an iterator of bytes"""
+    return gzip_chunks(backup_lines(models, chunk_size=chunk_size))
+
+
+def write_backup(path, models, chunk_size=1000):
+    """
+    Write a gzipped backup file
+    Returns: number of objects written
+    """
+    count = 0
+    with gzip.open(path, 'wt', encoding='utf-8') as output:
+        for line in backup_lines(models, chunk_size=chunk_size):
+            output.write(line)
+            count += 1
+    return count
+
+
+# Natural keys that can be resolved for a whole batch with one IN query
+BULK_NATURAL_KEYS = {
+    'registrations.registration': 'ticket_no',
+    'auth.user': 'username',
+}
+
+
+def _resolve_natural_foreign_keys(model, batch):
+    """
+    Replace natural-key foreign key values in a batch with primary keys,
+    one query per related model instead of one get_by_natural_key() per row
+    """
+    for field in model._meta.concrete_fields:
+        if not field.is_relation:
+            continue
+        lookup = BULK_NATURAL_KEYS.get(field.related_model._meta.label_lower)
+        if lookup is None:
+            continue
+
+        keys = {
+            data['fields'][field.name][0]
+            for data in batch
+            if isinstance(data['fields'].get(field.name), list)
+        }
+        if not keys:
+            continue
+
+        pks = dict(
+            field.related_model._default_manager.filter(**{f'{lookup}__in': keys}).values_list(lookup, 'pk')
+        )
+        for data in batch:
+            value = data['fields'].get(field.name)
+            if isinstance(value, list) and value[0] in pks:
+                data['fields'][field.name] = pks[value[0]]
+
+
+def _delete_pks(model, pks, batch_size):
+    """Delete rows by pk through the ORM so cascades are applied"""
+    pks = list(pks)
+    deleted = 0
+    for i in range(0, len(pks), batch_size):
+        deleted += model._default_manager.filter(pk__in=pks[i:i + batch_size]).delete()[1].get(model._meta.label, 0)
+    return deleted
+
+
+@contextmanager
+def _keep_timestamps(model):
+    """
+    Stop auto_now/auto_now_add from overwriting restored timestamps
+    (bulk_create runs pre_save, unlike loaddata's raw saves)
+    """
+    flags = [
+        (field, field.auto_now, field.auto_now_add)
+        for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False)
+    ]
+    for field, _, _ in flags:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in flags:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+class _Restorer:
+    """Replays backup/snapshot files into the current database (one transaction, owned by the caller)"""
+
+    def __init__(self, batch_size=1000, progress=None):
+        self.batch_size = batch_size
+        self.progress = progress
+        self.counts = {}
+        self.deleted = {}
+        self.models = set()
+
+    def restore_file(self, path):
+        with gzip.open(path, 'rt', encoding='utf-8') as source:
+            current_label = None
+            batch = []
+            for line in source:
+                if not line.strip():
+                    continue
+                data = json.loads(line)
+                if 'fields' not in data:
+                    # Delete records come before any rows in a snapshot
+                    self._apply_deletes(data)
+                    continue
+                if data['model'] != current_label or len(batch) >= self.batch_size:
+                    if batch:
+                        self._flush(current_label, batch)
+                    current_label = data['model']
+                    batch = []
+                batch.append(data)
+            if batch:
+                self._flush(current_label, batch)
+
+    def _apply_deletes(self, data):
+        model = apps.get_model(data['model'])
+        to_python = model._meta.pk.to_python
+        if 'keep' in data:
+            keep = {to_python(pk) for pk in data['keep']}
+            stale = set(model._default_manager.values_list('pk', flat=True)) - keep
+        else:
+            stale = {to_python(pk) for pk in data['deleted']}
+        if stale:
+            label = data['model']
+            self.deleted[label] = self.deleted.get(label, 0) + _delete_pks(model, stale, self.batch_size)
+
+    def _flush(self, label, batch):
+        model = apps.get_model(label)
+        _resolve_natural_foreign_keys(model, batch)
+        deserialized = list(serializers.deserialize('python', batch, handle_forward_references=True))
+        objects = [item.object for item in deserialized]
+
+        update_fields = [
+            field.name for field in model._meta.concrete_fields
+            if not field.primary_key
+        ]
+        with _keep_timestamps(model):
+            if update_fields:
+                model._default_manager.bulk_create(
+                    objects,
+                    update_conflicts=True,
+                    unique_fields=[model._meta.pk.name],
+                    update_fields=update_fields,
+                )
+            else:
+                model._default_manager.bulk_create(objects, ignore_conflicts=True)
+
+        for item in deserialized:
+            for field_name, values in (item.m2m_data or {}).items():
+                getattr(item.object, field_name).set(values)
+
+        self.models.add(model)
+        self.counts[label] = self.counts.get(label, 0) + len(objects)
+        if self.progress:
+            self.progress(label, self.counts[label])
+
+    def reset_sequences(self):
+        """Move sequences past the restored primary keys (needed on PostgreSQL)"""
+        sequence_sql = connection.ops.sequence_reset_sql(no_style(), list(self.models))
+        if sequence_sql:
+            with connection.cursor() as cursor:
+                for sql in sequence_sql:
+                    cursor.execute(sql)
+
+
+def _invalidate_caches():
+    """Restores bypass signals, so retire config snapshots and cached public responses here"""
+    invalidate_config_snapshots()
+    for group in PUBLIC_RESPONSE_GROUPS:
+        invalidate_public_response(group)
+
+
+def restore_backup(path, batch_size=1000, progress=None):
+    """
+    Load a gzipped JSONL backup with bulk upserts (insert, or update on pk conflict)
+    Signals are not sent, so derived tables are restored from the backup itself
+
+    Returns:
+        dict: {model label: rows restored}
+    """
+    restorer = _Restorer(batch_size=batch_size, progress=progress)
+    with transaction.atomic():
+        restorer.restore_file(path)
+        restorer.reset_sequences()
+        _invalidate_caches()
+    return restorer.counts
+
+
+# Incremental snapshots
+
+def read_manifest(directory):
+    """The snapshot chain for a directory ({'snapshots': [...]}, oldest first)"""
+    path = os.path.join(directory, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return {'snapshots': []}
+    with open(path, encoding='utf-8') as source:
+        return json.load(source)
+
+
+def _write_manifest(directory, manifest):
+    path = os.path.join(directory, MANIFEST_NAME)
+    with open(path + '.tmp', 'w', encoding='utf-8') as output:
+        json.dump(manifest, output, indent=2)
+    os.replace(path + '.tmp', path)
+
+
+def _file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as source:
+        for block in iter(lambda: source.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _tombstoned_pks(model, since):
+    """Pks deleted since `since` that have not been re-created"""
+    from .models import DeletedRecord
+
+    label = model._meta.label_lower
+    pks = {
+        model._meta.pk.to_python(pk)
+        for pk in DeletedRecord.objects.filter(model_label=label, deleted_at__gte=since).values_list('object_pk', flat=True)
+    }
+    if pks:
+        pks -= set(model._default_manager.filter(pk__in=pks).values_list('pk', flat=True))
+    return sorted(pks)
+
+
+def incremental_records(models, since, chunk_size=1000):
+    """
+    Records for an increment: delete records (children first), then rows
+    changed since `since` (parents first)
+    """
+    for model in reversed(models):
+        label = model._meta.label_lower
+        if label in INCREMENTAL_FIELDS:
+            pks = _tombstoned_pks(model, since)
+            for i in range(0, len(pks), chunk_size):
+                yield {'model': label, 'deleted': pks[i:i + chunk_size]}
+        elif label not in APPEND_ONLY_FIELDS:
+            yield {'model': label, 'keep': list(model._default_manager.order_by('pk').values_list('pk', flat=True))}
+
+    for model in models:
+        label = model._meta.label_lower
+        queryset = model._default_manager.all()
+        timestamp_field = INCREMENTAL_FIELDS.get(label) or APPEND_ONLY_FIELDS.get(label)
+        if timestamp_field:
+            queryset = queryset.filter(**{f'{timestamp_field}__gte': since})
+        yield from _object_records(queryset, chunk_size)
+
+
+def take_snapshot(directory, full=False, chunk_size=1000):
+    """
+    Write the next snapshot in a directory and append it to the manifest
+    The first snapshot (or full=True) is a full backup; later ones only hold
+    changes since the previous snapshot
+
+    Returns:
+        dict: the manifest entry
+    """
+    from .models import DeletedRecord
+
+    os.makedirs(directory, exist_ok=True)
+    manifest = read_manifest(directory)
+    parent = manifest['snapshots'][-1] if manifest['snapshots'] and not full else None
+
+    until = timezone.now()
+    since = parse_datetime(parent['until']) - SNAPSHOT_OVERLAP if parent else None
+    kind = 'incremental' if parent else 'full'
+    name = f"{kind}_{until.strftime('%Y%m%d_%H%M%S_%f')}.jsonl.gz"
+    path = os.path.join(directory, name)
+
+    models = resolve_models()
+    records = incremental_records(models, since, chunk_size) if parent else (
+        record for model in models for record in _object_records(model._default_manager.all(), chunk_size)
+    )
+
+    objects = 0
+    deleted = 0
+    with gzip.open(path, 'wt', encoding='utf-8') as output:
+        for record in records:
+            if 'fields' in record:
+                objects += 1
+            else:
+                deleted += len(record.get('deleted', []))
+            output.write(_to_line(record))
+
+    entry = {
+        'name': name,
+        'kind': kind,
+        'parent': parent['name'] if parent else None,
+        'since': since.isoformat() if since else None,
+        'until': until.isoformat(),
+        'objects': objects,
+        'deleted': deleted,
+        'size': os.path.getsize(path),
+        'sha256': _file_sha256(path),
+    }
+    manifest['snapshots'].append(entry)
+    _write_manifest(directory, manifest)
+
+    if kind == 'full':
+        # Older tombstones are covered by this snapshot
+        DeletedRecord.objects.filter(deleted_at__lt=until - SNAPSHOT_OVERLAP).delete()
+
+    return entry
+
+
+def snapshot_chain(manifest, target=None):
+    """
+    Snapshots to replay to reach `target` (default: the latest), full first
+    Raises ValueError if the target is unknown or the chain is broken
+    """
+    by_name = {entry['name']: entry for entry in manifest['snapshots']}
+    if not by_name:
+        raise ValueError('No snapshots in manifest')
+    name = target or manifest['snapshots'][-1]['name']
+    if name not in by_name:
+        raise ValueError(f'Unknown snapshot: {name}')
+
+    chain = []
+    while name is not None:
+        entry = by_name.get(name)
+        if entry is None:
+            raise ValueError(f'Snapshot chain is broken: {name} is missing from the manifest')
+        chain.append(entry)
+        name = entry['parent']
+    chain.reverse()
+    if chain[0]['kind'] != 'full':
+        raise ValueError(f"Snapshot chain for {chain[-1]['name']} does not start with a full snapshot")
+    return chain
+
+
+def restore_snapshots(directory, target=None, batch_size=1000, progress=None):
+    """
+    Replay the full snapshot and increments leading to `target` (default:
+    the latest) in one transaction. Checksums are verified before anything
+    is written.
+
+    Returns:
+        tuple: (chain entries, {label: rows upserted}, {label: rows deleted})
+    """
+    chain = snapshot_chain(read_manifest(directory), target)
+    for entry in chain:
+        path = os.path.join(directory, entry['name'])
+        if not os.path.exists(path):
+            raise ValueError(f"Snapshot file missing: {entry['name']}")
+        if _file_sha256(path) != entry['sha256']:
+            raise ValueError(f"Checksum mismatch for {entry['name']}")
+
+    restorer = _Restorer(batch_size=batch_size, progress=progress)
+    with transaction.atomic():
+        for entry in chain:
+            restorer.restore_file(os.path.join(directory, entry['name']))
+        restorer.reset_sequences()
+        _invalidate_caches()
+    return chain, restorer.counts, restorer.deleted
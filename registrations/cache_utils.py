@@ -0,0 +1,168 @@
+"""
+Small cache helpers for hot, read-mostly lookups
+Values live in Django's default cache (per process unless REDIS_URL is set);
+their version tokens live in the shared 'config' cache, so an invalidation
+reaches every worker
+"""
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from rest_framework import status
+from rest_framework.response import Response
+from .models import Registration, EventFeedback
+import hashlib
+import threading
+import uuid
+
+# Per-ticket QR scan data (registration fields + feedback state)
+SCAN_QR_CACHE_TIMEOUT = 60  # seconds
+
+
+def _config_cache():
+    return caches[getattr(settings, 'CONFIG_CACHE_ALIAS', 'default')]
+
+
+def shared_version(key):
+    """Current version token stored under key in the shared 'config' cache"""
+    return _config_cache().get_or_set(key, uuid.uuid4().hex, None)
+
+
+def bump_shared_version(key):
+    """
+    Replace the version token once the current transaction commits, so a
+    read racing the write cannot cache the old row under the new version
+    """
+    transaction.on_commit(lambda: _config_cache().set(key, uuid.uuid4().hex, None))
+
+
+def scan_qr_cache_key(ticket_no):
+    return f'scan_qr:{ticket_no}:{shared_version(f"scan_qr:{ticket_no}:version")}'
+
+
+def get_scan_qr_data(ticket_no):
+    """
+    Return the registration fields needed by the QR scan endpoint, including
+    whether feedback was submitted, in a single query backed by a short-lived
+    per-ticket cache
+    Returns: dict or None if the ticket does not exist
+    """
+    key = scan_qr_cache_key(ticket_no)
+    data = cache.get(key)
+    if data is not None:
+        return data
+
+    data = Registration.objects.filter(ticket_no=ticket_no).annotate(
+        feedback_submitted=Exists(EventFeedback.objects.filter(registration=OuterRef('pk')))
+    ).values(
+        'name', 'mobile_number', 'email', 'company_name',
+        'registration_for', 'payment_status', 'amount', 'feedback_submitted'
+    ).first()
+
+    if data is not None:
+        cache.set(key, data, SCAN_QR_CACHE_TIMEOUT)
+    return data
+
+
+def invalidate_scan_qr(ticket_no):
+    """Retire cached QR scan data for a ticket in every worker (e.g. after feedback changes)"""
+    bump_shared_version(f'scan_qr:{ticket_no}:version')
+
+
+def make_etag(*parts):
+    """Quoted strong ETag built from the given version parts"""
+    digest = hashlib.md5(':'.join(str(part) for part in parts).encode('utf-8')).hexdigest()
+    return f'"{digest}"'
+
+
+def etag_matches(request, etag):
+    """True if the client's If-None-Match already names this ETag"""
+    if_none_match = request.headers.get('If-None-Match', '')
+    return etag in [tag.strip() for tag in if_none_match.split(',')] or if_none_match.strip() == '*'
+
+
+def set_revalidate_headers(response, etag):
+    """Attach the ETag and ask clients to revalidate before reusing their copy"""
+    response['ETag'] = etag
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+def set_public_revalidate_headers(response, etag):
+    """Like set_revalidate_headers, but shared caches (CDN/proxy) may keep a copy too"""
+    response['ETag'] = etag
+    response['Cache-Control'] = 'public, no-cache'
+    return response
+
+
+# Public, rarely-changing read endpoints (landing and booking pages)
+PUBLIC_RESPONSE_CACHE_TIMEOUT = 60 * 60  # seconds; changes are picked up through the version
+PUBLIC_RESPONSE_GROUPS = ('sponsors', 'ticket_limits', 'event_settings', 'id_card_templates')
+
+_public_response_counters = {}
+_public_response_counters_lock = threading.Lock()
+
+
+def _public_version_key(group):
+    return f'public:{group}:version'
+
+
+def public_response_version(group):
+    """
+    Current version token of a group of cached responses
+    Kept in the shared 'config' cache so every worker sees invalidations
+    (the responses themselves are stored in the default cache)
+    """
+    return shared_version(_public_version_key(group))
+
+
+def invalidate_public_response(group):
+    """Retire every cached response of a group once the current transaction commits"""
+    bump_shared_version(_public_version_key(group))
+
+
+def _count_public_response(group, outcome):
+    with _public_response_counters_lock:
+        counters = _public_response_counters.setdefault(group, {'hits': 0, 'misses': 0, 'not_modified': 0})
+        counters[outcome] += 1
+
+
+def public_response_metrics():
+    """Hit/miss/304 counters per response group for this worker process"""
+    with _public_response_counters_lock:
+        result = {}
+        for group, counters in _public_response_counters.items():
+            served = counters['hits'] + counters['misses']
+            result[group] = {
+                **counters,
+                'hit_rate': round(counters['hits'] / served, 3) if served else 0,
+            }
+        return result
+
+
+def cached_public_response(request, group, build):
+    """
+    Response for a public read endpoint, with build() (returning the
+    response data) only called on a cache miss
+
+    Entries are keyed by the group's version and the request host and path
+    (so query parameters and absolute URLs get their own entry). Clients
+    get an ETag; a matching If-None-Match is answered with 304 before the
+    cache or the database is touched.
+    """
+    version = public_response_version(group)
+    variant = f'{request.get_host()}{request.get_full_path()}'
+    etag = make_etag('public', group, version, variant)
+    if etag_matches(request, etag):
+        _count_public_response(group, 'not_modified')
+        return set_public_revalidate_headers(Response(status=status.HTTP_304_NOT_MODIFIED), etag)
+
+    key = f"public:{group}:{version}:{hashlib.md5(variant.encode('utf-8')).hexdigest()}"
+    data = cache.get(key)
+    if data is None:
+        _count_public_response(group, 'misses')
+        data = build()
+        cache.set(key, data, PUBLIC_RESPONSE_CACHE_TIMEOUT)
+    else:
+        _count_public_response(group, 'hits')
+    return set_public_revalidate_headers(Response(data), etag)
@@ -0,0 +1,82 @@
+"""
+In-process snapshots of small, near-static configuration tables
+
+Each table is loaded whole into process memory. A version token kept in
+the shared 'config' cache (settings.CONFIG_CACHE_ALIAS) tells every worker
+when its copy is stale: model signals replace the token after a change
+commits, and workers compare tokens at most every
+CONFIG_CACHE_CHECK_SECONDS, so steady-state lookups cost no queries.
+Queryset update()/bulk_create() skip signals - call invalidate() after them.
+"""
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+import threading
+import time
+import uuid
+
+
+def _config_cache():
+    return caches[getattr(settings, 'CONFIG_CACHE_ALIAS', 'default')]
+
+
+class TableSnapshot:
+    """Read-through, versioned copy of whatever load() returns"""
+
+    def __init__(self, name, load):
+        self.name = name
+        self._load = load
+        self._version_key = f'config:{name}:version'
+        self._data = None
+        self._version = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def get(self):
+        data = self._data
+        now = time.monotonic()
+        if data is not None and now - self._checked_at < getattr(settings, 'CONFIG_CACHE_CHECK_SECONDS', 1.0):
+            return data
+
+        # Read the version before loading, so a change that lands mid-load
+        # is picked up by the next check
+        version = _config_cache().get_or_set(self._version_key, uuid.uuid4().hex, None)
+        with self._lock:
+            if self._data is None or self._version != version:
+                self._data = self._load()
+                self._version = version
+            self._checked_at = now
+            return self._data
+
+    def invalidate(self):
+        """
+        Drop this process's copy now and retire the shared version once the
+        current transaction commits (other workers reload on their next check)
+        """
+        with self._lock:
+            self._data = None
+        transaction.on_commit(
+            lambda: _config_cache().set(self._version_key, uuid.uuid4().hex, None)
+        )
+
+
+def _load_ticket_limits():
+    # Import here to avoid circular import
+    from .models import SponsorTicketLimit
+    return SponsorTicketLimit.load_limits()
+
+
+def _load_template_urls():
+    # Import here to avoid circular import
+    from .models import IDCardTemplate
+    return IDCardTemplate.load_template_urls()
+
+
+ticket_limits = TableSnapshot('sponsor_ticket_limits', _load_ticket_limits)
+template_urls = TableSnapshot('id_card_templates', _load_template_urls)
+
+
+def invalidate_all():
+    """Retire every snapshot (after bulk loads such as a backup restore)"""
+    for snapshot in (ticket_limits, template_urls):
+        snapshot.invalidate()
@@ -0,0 +1,116 @@
+"""
+Batched feedback inserts for the post-event submission spike
+"""
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, transaction
+from .models import EventFeedback, FeedbackStats
+from .cache_utils import invalidate_scan_qr
+from .analytics import invalidate_feedback_stats
+import logging
+import queue
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+def save_feedback_batch(entries):
+    """
+    Insert many feedback submissions with one bulk INSERT
+    (bulk_create skips save() and post_save, so stats and caches are
+    updated here)
+
+    Args:
+        entries: list of EventFeedback field dicts (with 'registration' objects)
+
+    Returns:
+        tuple: (created feedback list, list of duplicate ticket numbers)
+    """
+    try:
+        with transaction.atomic():
+            registration_ids = [entry['registration'].id for entry in entries]
+            already_submitted = set(
+                EventFeedback.objects.filter(registration_id__in=registration_ids).values_list('registration_id', flat=True)
+            )
+
+            new_feedback = []
+            duplicates = []
+            for entry in entries:
+                registration = entry['registration']
+                if registration.id in already_submitted:
+                    duplicates.append(registration.ticket_no)
+                    continue
+                already_submitted.add(registration.id)
+                new_feedback.append(EventFeedback(**entry))
+
+            created = EventFeedback.objects.bulk_create(new_feedback)
+            FeedbackStats.apply_many(created)
+    except IntegrityError:
+        # A single submission raced the batch - fall back to row-by-row inserts
+        created = []
+        duplicates = []
+        for entry in entries:
+            try:
+                created.append(EventFeedback.objects.create(**entry))
+            except IntegrityError:
+                duplicates.append(entry['registration'].ticket_no)
+        return created, duplicates
+
+    for feedback in created:
+        invalidate_scan_qr(feedback.registration.ticket_no)
+    if created:
+        invalidate_feedback_stats()
+    return created, duplicates
+
+
+class FeedbackQueue:
+    """
+    Collects validated submissions in memory and writes them in batches on a
+    background thread (every flush_interval seconds or batch_size entries)
+    """
+
+    def __init__(self, batch_size=200, flush_interval=1.0):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name='feedback-queue', daemon=True)
+        self._thread.start()
+
+    def submit(self, entry):
+        self._queue.put(entry)
+
+    def pending(self):
+        return self._queue.qsize()
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            try:
+                while len(batch) < self.batch_size:
+                    batch.append(self._queue.get(timeout=self.flush_interval))
+            except queue.Empty:
+                pass
+
+            try:
+                created, duplicates = save_feedback_batch(batch)
+                if duplicates:
+                    logger.info(f"Feedback queue skipped {len(duplicates)} duplicate submissions: {', '.join(duplicates)}")
+            except Exception as e:
+                logger.error(f"Feedback queue failed to save {len(batch)} submissions: {str(e)}")
+            finally:
+                close_old_connections()
+
+
+_feedback_queue = None
+_feedback_queue_lock = threading.Lock()
+
+
+def get_feedback_queue():
+    """Return the process-wide feedback queue"""
+    global _feedback_queue
+    with _feedback_queue_lock:
+        if _feedback_queue is None:
+            _feedback_queue = FeedbackQueue(
+                batch_size=getattr(settings, 'FEEDBACK_QUEUE_BATCH_SIZE', 200),
+                flush_interval=getattr(settings, 'FEEDBACK_QUEUE_FLUSH_SECONDS', 1.0),
+            )
+        return _feedback_queue
@@ -0,0 +1,444 @@
+"""
+Edge gate node: serve ticket scans from a local SQLite replica
+
+A gate node keeps a snapshot of the ticket set in a local SQLite file, answers
+the scan / scan-qr endpoints from it without touching the primary database,
+queues every scan locally and reconciles the queue back to ScanLog whenever
+the primary database is reachable.
+
+Driven by the `gate_node` management command (snapshot / serve / sync).
+"""
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Exists, Min, OuterRef
+from django.utils import timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from datetime import datetime
+from .models import Registration, ScanLog, EventFeedback
+from .analytics import invalidate_arrival_stats
+import json
+import logging
+import re
+import sqlite3
+import threading
+import uuid
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tickets (
+    ticket_no TEXT PRIMARY KEY,
+    registration_id INTEGER NOT NULL,
+    name TEXT,
+    mobile_number TEXT,
+    email TEXT,
+    company_name TEXT,
+    registration_for TEXT,
+    payment_status TEXT,
+    amount TEXT,
+    feedback_submitted INTEGER NOT NULL DEFAULT 0,
+    first_check_in TEXT
+);
+CREATE TABLE IF NOT EXISTS staff_users (
+    user_id TEXT PRIMARY KEY
+);
+CREATE TABLE IF NOT EXISTS scan_queue (
+    id TEXT PRIMARY KEY,
+    ticket_no TEXT NOT NULL,
+    registration_id INTEGER,
+    action TEXT NOT NULL,
+    scanned_at TEXT NOT NULL,
+    notes TEXT,
+    synced INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS scan_queue_synced ON scan_queue (synced);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+class GateNodeStore:
+    """Local SQLite replica of the ticket set plus the queue of pending scans"""
+
+    def __init__(self, path, node_name='gate'):
+        self.path = str(path)
+        self.node_name = node_name
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        self.connection.executescript(SCHEMA)
+
+    @property
+    def connection(self):
+        # sqlite3 connections can't be shared across threads - one per thread
+        conn = getattr(self._local, 'connection', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.connection = conn
+        return conn
+
+    @property
+    def scanned_by(self):
+        return f'gate:{self.node_name}'
+
+    # ---------- Snapshot ----------
+
+    def snapshot(self):
+        """
+        Copy the ticket set, first check-in times and staff user ids from the
+        primary database. Queued scans that have not been synced are kept and
+        still count as check-ins.
+        Returns: number of tickets in the snapshot
+        """
+        registrations = Registration.objects.annotate(
+            has_feedback=Exists(EventFeedback.objects.filter(registration=OuterRef('pk')))
+        ).values_list(
+            'ticket_no', 'id', 'name', 'mobile_number', 'email', 'company_name',
+            'registration_for', 'payment_status', 'amount', 'has_feedback'
+        )
+        first_check_ins = dict(
+            ScanLog.objects.filter(action='CHECK_IN').values('ticket_no').annotate(
+                first=Min('scanned_at')
+            ).values_list('ticket_no', 'first')
+        )
+        staff_ids = get_user_model().objects.filter(is_staff=True, is_active=True).values_list('pk', flat=True)
+
+        rows = [
+            (
+                ticket_no, reg_id, name, mobile, email, company, category, payment_status,
+                str(amount), int(has_feedback),
+                first_check_ins[ticket_no].isoformat() if ticket_no in first_check_ins else None,
+            )
+            for ticket_no, reg_id, name, mobile, email, company, category, payment_status, amount, has_feedback in registrations
+        ]
+
+        with self._write_lock:
+            conn = self.connection
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                conn.execute('DELETE FROM tickets')
+                conn.executemany('INSERT INTO tickets VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', rows)
+                # Local check-ins not yet on the primary still count
+                conn.execute("""
+                    UPDATE tickets SET first_check_in = (
+                        SELECT MIN(q.scanned_at) FROM scan_queue q
+                        WHERE q.ticket_no = tickets.ticket_no AND q.action = 'CHECK_IN' AND q.synced = 0
+                    )
+                    WHERE first_check_in IS NULL AND EXISTS (
+                        SELECT 1 FROM scan_queue q
+                        WHERE q.ticket_no = tickets.ticket_no AND q.action = 'CHECK_IN' AND q.synced = 0
+                    )
+                """)
+                conn.execute('DELETE FROM staff_users')
+                conn.executemany('INSERT INTO staff_users VALUES (?)', [(str(pk),) for pk in staff_ids])
+                conn.execute("INSERT OR REPLACE INTO meta VALUES ('snapshot_at', ?)", (timezone.now().isoformat(),))
+                conn.execute('COMMIT')
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
+
+        return len(rows)
+
+    def stats(self):
+        conn = self.connection
+        tickets = conn.execute('SELECT COUNT(*) FROM tickets').fetchone()[0]
+        checked_in = conn.execute('SELECT COUNT(*) FROM tickets WHERE first_check_in IS NOT NULL').fetchone()[0]
+        pending = conn.execute('SELECT COUNT(*) FROM scan_queue WHERE synced = 0').fetchone()[0]
+        snapshot_at = conn.execute("SELECT value FROM meta WHERE key = 'snapshot_at'").fetchone()
+        return {
+            'tickets': tickets,
+            'checked_in': checked_in,
+            'pending_sync': pending,
+            'snapshot_at': snapshot_at[0] if snapshot_at else None,
+        }
+
+    # ---------- Lookups ----------
+
+    def get_ticket(self, ticket_no):
+        return self.connection.execute('SELECT * FROM tickets WHERE ticket_no = ?', (ticket_no,)).fetchone()
+
+    def is_staff_user(self, user_id):
+        return self.connection.execute(
+            'SELECT 1 FROM staff_users WHERE user_id = ?', (str(user_id),)
+        ).fetchone() is not None
+
+    def _queue(self, conn, ticket_no, registration_id, action, scanned_at, notes):
+        conn.execute(
+            'INSERT INTO scan_queue (id, ticket_no, registration_id, action, scanned_at, notes) VALUES (?, ?, ?, ?, ?, ?)',
+            (uuid.uuid4().hex, ticket_no, registration_id, action, scanned_at.isoformat(), notes)
+        )
+
+    def scan(self, ticket_no):
+        """
+        Same behaviour as the scan_ticket endpoint, answered from the replica
+        Returns: (status_code, response_dict)
+        """
+        now = timezone.now()
+        with self._write_lock:
+            conn = self.connection
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                ticket = self.get_ticket(ticket_no)
+
+                if ticket is None:
+                    self._queue(conn, ticket_no, None, 'SCAN_FAILED', now, 'Ticket not found')
+                    conn.execute('COMMIT')
+                    return 404, {'error': 'Ticket not found. Please check the ticket number.'}
+
+                if ticket['payment_status'] != 'SUCCESS':
+                    self._queue(
+                        conn, ticket_no, ticket['registration_id'], 'SCAN_FAILED', now,
+                        f"Payment not successful: {ticket['payment_status']}"
+                    )
+                    conn.execute('COMMIT')
+                    return 400, {
+                        'error': f"Invalid ticket. Payment status: {ticket['payment_status']}",
+                        'payment_status': ticket['payment_status']
+                    }
+
+                details = {
+                    'name': ticket['name'],
+                    'mobile': ticket['mobile_number'],
+                    'email': ticket['email'],
+                    'payment_status': ticket['payment_status'],
+                    'amount': ticket['amount'],
+                    'registration_for': ticket['registration_for'],
+                    'ticket_no': ticket_no,
+                }
+
+                if ticket['first_check_in']:
+                    first_scan = datetime.fromisoformat(ticket['first_check_in'])
+                    self._queue(
+                        conn, ticket_no, ticket['registration_id'], 'CHECK_IN', now,
+                        f'Duplicate scan - Already checked in at {first_scan.strftime("%Y-%m-%d %H:%M:%S")}'
+                    )
+                    conn.execute('COMMIT')
+                    return 200, {
+                        'success': True,
+                        'already_checked_in': True,
+                        'first_scan_time': first_scan.isoformat(),
+                        **details,
+                        'message': f'Already checked in at {first_scan.strftime("%I:%M %p on %b %d")}'
+                    }
+
+                conn.execute('UPDATE tickets SET first_check_in = ? WHERE ticket_no = ?', (now.isoformat(), ticket_no))
+                self._queue(conn, ticket_no, ticket['registration_id'], 'CHECK_IN', now, 'First time check-in - Welcome!')
+                conn.execute('COMMIT')
+                return 200, {
+                    'success': True,
+                    'already_checked_in': False,
+                    'first_time': True,
+                    **details,
+                    'message': f"Welcome {ticket['name']}!"
+                }
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
+
+    def scan_qr(self, ticket_no, is_staff=False):
+        """
+        Same behaviour as the scan_qr_dual_behavior endpoint, answered from the replica
+        Returns: (status_code, response_dict)
+        """
+        ticket = self.get_ticket(ticket_no)
+        if ticket is None:
+            return 404, {'error': 'Ticket not found. Please check the ticket number.'}
+
+        if is_staff:
+            return 200, {
+                'flow': 'attendance',
+                'success': True,
+                'ticket_no': ticket_no,
+                'name': ticket['name'],
+                'mobile': ticket['mobile_number'],
+                'email': ticket['email'],
+                'company': ticket['company_name'],
+                'registration_for': ticket['registration_for'],
+                'payment_status': ticket['payment_status'],
+                'amount': ticket['amount'],
+                'message': 'Authenticated user - proceed to attendance page'
+            }
+
+        feedback_exists = bool(ticket['feedback_submitted'])
+        return 200, {
+            'flow': 'feedback',
+            'success': True,
+            'ticket_no': ticket_no,
+            'name': ticket['name'],
+            'registration_for': ticket['registration_for'],
+            'feedback_submitted': feedback_exists,
+            'message': 'Please provide your feedback' if not feedback_exists else 'Feedback already submitted'
+        }
+
+    # ---------- Reconciliation ----------
+
+    def sync(self, batch_size=500):
+        """
+        Push queued scans to the primary ScanLog table, then refresh check-in
+        state from the primary so scans made at other gates are seen here.
+        Raises the database error if the primary is unreachable; the queue is
+        left untouched in that case.
+        Returns: number of scans pushed
+        """
+        pushed = 0
+        while True:
+            rows = self.connection.execute(
+                'SELECT * FROM scan_queue WHERE synced = 0 ORDER BY scanned_at LIMIT ?', (batch_size,)
+            ).fetchall()
+            if not rows:
+                break
+
+            registration_ids = {row['registration_id'] for row in rows if row['registration_id']}
+            scan_ids = [row['id'] for row in rows]
+
+            with transaction.atomic():
+                existing_ids = set(Registration.objects.filter(id__in=registration_ids).values_list('id', flat=True))
+                # A crash after the primary commit but before marking rows
+                # synced must not duplicate scans on the next run
+                already_pushed = set(
+                    ScanLog.objects.filter(gate_scan_id__in=scan_ids).values_list('gate_scan_id', flat=True)
+                )
+
+                pending = [row for row in rows if row['id'] not in already_pushed]
+                # ignore_conflicts: another sync of the same queue may have
+                # pushed these rows in the meantime (gate_scan_id is unique)
+                ScanLog.objects.bulk_create([
+                    ScanLog(
+                        registration_id=row['registration_id'] if row['registration_id'] in existing_ids else None,
+                        ticket_no=row['ticket_no'],
+                        action=row['action'],
+                        scanned_by=self.scanned_by,
+                        notes=row['notes'],
+                        gate_scan_id=row['id'],
+                    )
+                    for row in pending
+                ], batch_size=batch_size, ignore_conflicts=True)
+
+                # scanned_at is auto_now_add, so restore the gate's scan time afterwards
+                scanned_at = {row['id']: datetime.fromisoformat(row['scanned_at']) for row in pending}
+                logs = list(ScanLog.objects.filter(gate_scan_id__in=scanned_at).only('id', 'gate_scan_id'))
+                for log in logs:
+                    log.scanned_at = scanned_at[log.gate_scan_id]
+                ScanLog.objects.bulk_update(logs, ['scanned_at'], batch_size=batch_size)
+
+            with self._write_lock:
+                self.connection.executemany(
+                    'UPDATE scan_queue SET synced = 1 WHERE id = ?', [(row['id'],) for row in rows]
+                )
+            pushed += len(pending)
+
+        if pushed:
+            # Back-filled scans land in minutes the arrival stats already closed
+            invalidate_arrival_stats()
+
+        self.refresh_check_ins()
+        return pushed
+
+    def refresh_check_ins(self):
+        """Pull first check-in times recorded on the primary (e.g. by other gates)"""
+        first_check_ins = ScanLog.objects.filter(action='CHECK_IN').values('ticket_no').annotate(
+            first=Min('scanned_at')
+        ).values_list('ticket_no', 'first')
+
+        with self._write_lock:
+            conn = self.connection
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                conn.executemany(
+                    'UPDATE tickets SET first_check_in = ? WHERE ticket_no = ? AND (first_check_in IS NULL OR first_check_in > ?)',
+                    [(first.isoformat(), ticket_no, first.isoformat()) for ticket_no, first in first_check_ins]
+                )
+                conn.execute('COMMIT')
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
+
+
+class GateNodeRequestHandler(BaseHTTPRequestHandler):
+    """Serves POST /api/scan/<ticket>/ and GET /api/scan-qr/<ticket>/ from the store"""
+    store = None
+    scan_path = re.compile(r'^/api/scan/(?P<ticket>[^/]+)/?$')
+    scan_qr_path = re.compile(r'^/api/scan-qr/(?P<ticket>[^/]+)/?$')
+
+    def do_OPTIONS(self):
+        self.send_json(204, None)
+
+    def do_POST(self):
+        match = self.scan_path.match(self.path.split('?')[0])
+        if not match:
+            return self.send_json(404, {'error': 'Not found'})
+        self.send_json(*self.store.scan(match.group('ticket')))
+
+    def do_GET(self):
+        path = self.path.split('?')[0]
+        if path == '/health/':
+            return self.send_json(200, {'node': self.store.node_name, **self.store.stats()})
+        match = self.scan_qr_path.match(path)
+        if not match:
+            return self.send_json(404, {'error': 'Not found'})
+        self.send_json(*self.store.scan_qr(match.group('ticket'), is_staff=self.is_staff_request()))
+
+    def is_staff_request(self):
+        """Validate the JWT offline (signature + expiry) and check the user against the staff snapshot"""
+        header = self.headers.get('Authorization', '')
+        if not header.startswith('Bearer '):
+            return False
+        try:
+            from rest_framework_simplejwt.tokens import AccessToken
+            token = AccessToken(header.split(' ', 1)[1])
+            return self.store.is_staff_user(token['user_id'])
+        except Exception:
+            return False
+
+    def send_json(self, status_code, data):
+        body = json.dumps(data).encode() if data is not None else b''
+        self.send_response(status_code)
+        origin = self.headers.get('Origin')
+        if origin and origin in getattr(settings, 'CORS_ALLOWED_ORIGINS', []):
+            self.send_header('Access-Control-Allow-Origin', origin)
+            self.send_header('Access-Control-Allow-Credentials', 'true')
+            self.send_header('Access-Control-Allow-Headers', 'Authorization, Content-Type')
+            self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
+        if data is not None:
+            self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if body:
+            self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.info('gate node: ' + format, *args)
+
+
+def run_sync_loop(store, interval, stop_event):
+    """Background reconciliation - keeps retrying until the primary is reachable"""
+    from django.db import close_old_connections
+    while not stop_event.wait(interval):
+        try:
+            pushed = store.sync()
+            if pushed:
+                logger.info(f'Gate node {store.node_name}: synced {pushed} scans to primary')
+        except Exception as e:
+            logger.warning(f'Gate node {store.node_name}: sync failed, will retry: {str(e)}')
+        finally:
+            close_old_connections()
+
+
+def serve(store, host, port, sync_interval=30):
+    handler = type('BoundGateNodeRequestHandler', (GateNodeRequestHandler,), {'store': store})
+    server = ThreadingHTTPServer((host, port), handler)
+    stop_event = threading.Event()
+    sync_thread = None
+    if sync_interval:
+        sync_thread = threading.Thread(target=run_sync_loop, args=(store, sync_interval, stop_event), daemon=True)
+        sync_thread.start()
+    try:
+        server.serve_forever()
+    finally:
+        stop_event.set()
+        server.server_close()
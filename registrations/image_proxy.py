@@ -0,0 +1,273 @@
+"""
+Server-side proxy for Google Drive images (sponsor logos, ID card templates)
+
+Each Drive file is fetched once through a pluggable fetcher
+(settings.IMAGE_PROXY_FETCHER) and stored under MEDIA_ROOT/image_proxy,
+named by the SHA-256 of its content. Resized WebP/PNG variants are written
+next to it on first request. Variant URLs contain the content hash, so they
+can be served with immutable cache headers; a changed Drive file gets a new
+hash and therefore new URLs.
+
+Layout:
+    image_proxy/sources/<file_id>.json   content hash and size of the Drive file
+    image_proxy/<hash>/source            the fetched bytes
+    image_proxy/<hash>/w<width>.<format> resized variants
+"""
+from django.conf import settings
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from PIL import Image
+from .models import drive_file_id
+import hashlib
+import io
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+import urllib.request
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FETCHER = 'registrations.image_proxy.DriveImageFetcher'
+
+# Variant widths; a requested width is rounded up to the next one so the
+# number of files per image stays bounded
+VARIANT_WIDTHS = (150, 300, 600, 1000, 2000)
+VARIANT_FORMATS = {
+    'webp': 'image/webp',
+    'png': 'image/png',
+}
+
+FILE_ID_PATTERN = re.compile(r'^[A-Za-z0-9_-]{10,128}$')
+CONTENT_HASH_PATTERN = re.compile(r'^[0-9a-f]{64}$')
+VARIANT_PATTERN = re.compile(r'^w(\d+)\.(webp|png)$')
+
+
+class ImageFetchError(Exception):
+    """Raised by a fetcher when the image could not be downloaded"""
+
+
+class DriveImageFetcher:
+    """Downloads the original file from Google Drive"""
+    url = 'https://drive.google.com/uc?export=download&id={file_id}'
+
+    def __init__(self, timeout=10, max_bytes=None):
+        self.timeout = timeout
+        self.max_bytes = max_bytes or getattr(settings, 'IMAGE_PROXY_MAX_BYTES', 10 * 1024 * 1024)
+
+    def fetch(self, file_id):
+        request = urllib.request.Request(self.url.format(file_id=file_id), headers={'User-Agent': 'bnievent-image-proxy'})
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                content_type = response.headers.get('Content-Type', '')
+                data = response.read(self.max_bytes + 1)
+        except OSError as e:
+            raise ImageFetchError(f'Drive download failed: {e}')
+
+        if len(data) > self.max_bytes:
+            raise ImageFetchError(f'Drive file is larger than {self.max_bytes} bytes')
+        if content_type.startswith('text/html'):
+            # Drive answers with an HTML page for private or unscannable files
+            raise ImageFetchError('Drive did not return an image (is the file shared publicly?)')
+        return data
+
+
+class LocalImageFetcher:
+    """Reads <IMAGE_PROXY_LOCAL_DIR>/<file_id> - a stand-in for tests and offline development"""
+
+    def __init__(self, directory=None):
+        self.directory = directory or settings.IMAGE_PROXY_LOCAL_DIR
+
+    def fetch(self, file_id):
+        try:
+            with open(os.path.join(self.directory, file_id), 'rb') as source:
+                return source.read()
+        except OSError as e:
+            raise ImageFetchError(f'Local image not found: {e}')
+
+
+def write_file_atomic(path, data):
+    """Write via a temporary file + rename so concurrent workers never read a partial file"""
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    descriptor, temp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-')
+    try:
+        with os.fdopen(descriptor, 'wb') as target:
+            target.write(data)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+
+def variant_width(requested):
+    """Smallest configured variant width that is at least the requested width"""
+    for width in VARIANT_WIDTHS:
+        if requested <= width:
+            return width
+    return VARIANT_WIDTHS[-1]
+
+
+class ImageProxy:
+    """
+    Fetches, stores and resizes Drive images
+
+    Args:
+        root: storage directory (default MEDIA_ROOT/image_proxy)
+        fetcher: object with fetch(file_id) -> bytes (default from settings)
+        max_age: seconds before a Drive file is fetched again to pick up
+            changes (its variants keep their hashed names)
+    """
+
+    RETRY_DELAY = 5 * 60  # seconds between refresh attempts while Drive fails
+
+    def __init__(self, root=None, fetcher=None, max_age=None):
+        self.root = root or os.path.join(settings.MEDIA_ROOT, 'image_proxy')
+        self.fetcher = fetcher or import_string(getattr(settings, 'IMAGE_PROXY_FETCHER', DEFAULT_FETCHER))()
+        self.max_age = max_age if max_age is not None else getattr(settings, 'IMAGE_PROXY_SOURCE_MAX_AGE', 24 * 60 * 60)
+        self._locks = {}
+        self._locks_lock = threading.Lock()
+
+    def _lock(self, name):
+        with self._locks_lock:
+            return self._locks.setdefault(name, threading.Lock())
+
+    def _source_record_path(self, file_id):
+        return os.path.join(self.root, 'sources', f'{file_id}.json')
+
+    def _read_source_record(self, file_id):
+        try:
+            with open(self._source_record_path(file_id)) as record:
+                return json.load(record)
+        except (OSError, ValueError):
+            return None
+
+    def is_stored(self, file_id):
+        """True once the Drive file has been fetched (even if it is due for a refresh)"""
+        return os.path.exists(self._source_record_path(file_id))
+
+    def content_hash(self, file_id, refresh=False):
+        """
+        SHA-256 of the Drive file's content, fetching it when it has not been
+        stored yet (or is older than max_age)
+        Raises ImageFetchError when the download fails or is not an image
+        """
+        record = self._read_source_record(file_id)
+        if record and not refresh and time.time() - record['fetched'] < self.max_age:
+            return record['hash']
+
+        with self._lock(f'source:{file_id}'):
+            # Another thread may have fetched it while this one waited
+            fresh = self._read_source_record(file_id)
+            if fresh and not refresh and time.time() - fresh['fetched'] < self.max_age:
+                return fresh['hash']
+
+            try:
+                data = self.fetcher.fetch(file_id)
+                width, height = self._verify(data)
+            except ImageFetchError:
+                if record:
+                    # Keep serving the copy we have when Drive is unavailable
+                    # and try again in RETRY_DELAY seconds rather than on every request
+                    logger.warning(f'Image proxy could not refresh {file_id}, serving the stored copy')
+                    record['fetched'] = time.time() - self.max_age + self.RETRY_DELAY
+                    write_file_atomic(self._source_record_path(file_id), json.dumps(record).encode('utf-8'))
+                    return record['hash']
+                raise
+
+            content_hash = hashlib.sha256(data).hexdigest()
+            source_path = os.path.join(self.root, content_hash, 'source')
+            if not os.path.exists(source_path):
+                write_file_atomic(source_path, data)
+            write_file_atomic(self._source_record_path(file_id), json.dumps({
+                'hash': content_hash,
+                'width': width,
+                'height': height,
+                'bytes': len(data),
+                'fetched': time.time(),
+                'fetched_at': timezone.now().isoformat(),
+            }).encode('utf-8'))
+            return content_hash
+
+    def _verify(self, data):
+        try:
+            with Image.open(io.BytesIO(data)) as image:
+                image.verify()
+            with Image.open(io.BytesIO(data)) as image:
+                return image.size
+        except Exception as e:
+            raise ImageFetchError(f'Not a readable image: {e}')
+
+    def variant_path(self, content_hash, width, image_format):
+        return os.path.join(self.root, content_hash, f'w{width}.{image_format}')
+
+    def variant(self, content_hash, width, image_format):
+        """
+        Path of the resized variant, creating it from the stored source on
+        first use (images are only ever scaled down)
+        Raises FileNotFoundError for an unknown hash
+        """
+        path = self.variant_path(content_hash, width, image_format)
+        if os.path.exists(path):
+            return path
+
+        with self._lock(path):
+            if os.path.exists(path):
+                return path
+            with Image.open(os.path.join(self.root, content_hash, 'source')) as image:
+                image.load()
+                image = self._resized(image, width)
+                output = io.BytesIO()
+                if image_format == 'webp':
+                    image.save(output, 'WEBP', quality=85, method=6)
+                else:
+                    image.save(output, 'PNG', optimize=True)
+            write_file_atomic(path, output.getvalue())
+        return path
+
+    def _resized(self, image, width):
+        if image.mode not in ('RGB', 'RGBA'):
+            has_alpha = image.mode in ('LA', 'PA') or (image.mode == 'P' and 'transparency' in image.info)
+            image = image.convert('RGBA' if has_alpha else 'RGB')
+        if image.width > width:
+            height = max(1, round(image.height * width / image.width))
+            image = image.resize((width, height), Image.LANCZOS)
+        return image
+
+
+def proxied_image_url(url, request=None, width=None):
+    """
+    Image proxy URL for a Google Drive share link (absolute when a request is
+    given), or None when the link is not a Drive file
+    """
+    file_id = drive_file_id(url)
+    if not file_id or not FILE_ID_PATTERN.match(file_id):
+        return None
+    path = reverse('drive_image', args=[file_id])
+    if width:
+        path += f'?w={width}'
+    return request.build_absolute_uri(path) if request else path
+
+
+_image_proxy = None
+_image_proxy_lock = threading.Lock()
+
+
+def get_image_proxy():
+    """Return the process-wide ImageProxy built from IMAGE_PROXY_* settings"""
+    global _image_proxy
+    with _image_proxy_lock:
+        if _image_proxy is None:
+            _image_proxy = ImageProxy()
+        return _image_proxy
+
+
+def reset_image_proxy(proxy=None):
+    """Replace (or drop) the process-wide proxy, e.g. to inject a fetcher in tests"""
+    global _image_proxy
+    with _image_proxy_lock:
+        _image_proxy = proxy
@@ -0,0 +1,245 @@
+"""
+Upload-time processing for uploaded images (student ID cards, event logo)
+
+Uploads are streamed to temporary files by SizeLimitedUploadHandler. After
+a registration or the event settings are saved with a new image, a
+background worker:
+    - rewrites the stored file in its own format without EXIF/GPS/ICC
+      metadata, rotated upright and at most IMAGE_UPLOAD_MAX_DIMENSION
+      pixels on its longer side (the file keeps its name)
+    - writes downscaled JPEG and WebP variants next to it
+    - records them in the model's <field>_variants JSON field
+Processing is idempotent: a file that is already clean is not re-encoded.
+"""
+from django.apps import apps
+from django.conf import settings
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+from PIL import Image, ImageOps
+from .image_proxy import write_file_atomic
+import io
+import logging
+import os
+import queue
+import threading
+
+logger = logging.getLogger(__name__)
+
+# (model label, field name) -> {variant name: longest side in pixels}
+IMAGE_VARIANTS = {
+    ('registrations.registration', 'student_id_card'): {'display': 1280, 'thumb': 320},
+    ('registrations.eventsettings', 'logo'): {'display': 800, 'thumb': 240},
+}
+
+VARIANT_FORMATS = {
+    'jpeg': ('JPEG', 'jpg'),
+    'webp': ('WEBP', 'webp'),
+}
+
+# Metadata keys Pillow would write back when saving
+_METADATA_KEYS = ('exif', 'icc_profile', 'xmp', 'XML:com.adobe.xmp', 'photoshop', 'comment', 'dpi')
+
+
+class SizeLimitedUploadHandler(TemporaryFileUploadHandler):
+    """
+    Streams every upload to a temporary file on disk (never into memory) and
+    stops writing once a file passes UPLOAD_MAX_BYTES; the rest of the file
+    is discarded, file.size still reports the full size so validation
+    (UploadedImageField) can reject it with a clear message
+    """
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.received = 0
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        if self.received > settings.UPLOAD_MAX_BYTES:
+            return None
+        return super().receive_data_chunk(raw_data, start)
+
+
+def _has_metadata(image):
+    return any(image.info.get(key) for key in _METADATA_KEYS) or bool(image.getexif())
+
+
+def _flatten(image, background=(255, 255, 255)):
+    """RGB copy of an image, with any transparency composited onto white (for JPEG)"""
+    if image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info):
+        image = image.convert('RGBA')
+        flattened = Image.new('RGB', image.size, background)
+        flattened.paste(image, mask=image.getchannel('A'))
+        return flattened
+    return image.convert('RGB')
+
+
+def _encode(image, pil_format):
+    output = io.BytesIO()
+    if pil_format == 'JPEG':
+        _flatten(image).save(output, 'JPEG', quality=82, optimize=True, progressive=True)
+    elif pil_format == 'WEBP':
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA' if 'transparency' in image.info or image.mode in ('LA', 'PA') else 'RGB')
+        image.save(output, 'WEBP', quality=80, method=6)
+    elif pil_format == 'PNG':
+        image.save(output, 'PNG', optimize=True)
+    else:
+        image.save(output, pil_format)
+    return output.getvalue()
+
+
+def _scaled(image, longest_side):
+    if max(image.size) <= longest_side:
+        return image
+    scaled = image.copy()
+    scaled.thumbnail((longest_side, longest_side), Image.LANCZOS)
+    return scaled
+
+
+def variant_name(name, variant, extension):
+    """Storage name of a variant: <dir>/variants/<stem>_<variant>.<extension>"""
+    directory, filename = os.path.split(name)
+    stem = os.path.splitext(filename)[0]
+    return os.path.join(directory, 'variants', f'{stem}_{variant}.{extension}').replace(os.sep, '/')
+
+
+def process_image_file(name, sizes, media_root=None):
+    """
+    Clean the stored image in place and write its variants
+
+    Args:
+        name: storage name relative to MEDIA_ROOT (e.g. student_id_cards/x.jpg)
+        sizes: {variant name: longest side}
+
+    Returns:
+        dict: {'source': name, 'bytes': n, <variant>: {'width', 'height', 'jpeg', 'webp'}}
+    """
+    media_root = media_root or settings.MEDIA_ROOT
+    path = os.path.join(media_root, name)
+
+    with Image.open(path) as original:
+        pil_format = 'JPEG' if original.format == 'MPO' else original.format  # MPO: multi-frame phone JPEGs
+        original.load()
+        max_dimension = settings.IMAGE_UPLOAD_MAX_DIMENSION
+        needs_rewrite = _has_metadata(original) or max(original.size) > max_dimension
+
+        image = ImageOps.exif_transpose(original)  # apply the camera's orientation before EXIF is dropped
+        image.info = {key: value for key, value in image.info.items() if key == 'transparency'}
+        image = _scaled(image, max_dimension)
+
+    if needs_rewrite:
+        write_file_atomic(path, _encode(image, pil_format))
+
+    variants = {'source': name, 'bytes': os.path.getsize(path)}
+    for variant, longest_side in sizes.items():
+        scaled = _scaled(image, longest_side)
+        entry = {'width': scaled.width, 'height': scaled.height}
+        for key, (variant_format, extension) in VARIANT_FORMATS.items():
+            target = variant_name(name, variant, extension)
+            write_file_atomic(os.path.join(media_root, target), _encode(scaled, variant_format))
+            entry[key] = target
+        variants[variant] = entry
+    return variants
+
+
+def needs_processing(instance, field_name):
+    """True when the instance has an image whose variants were not made from it yet"""
+    image = getattr(instance, field_name)
+    return bool(image) and getattr(instance, f'{field_name}_variants', {}).get('source') != image.name
+
+
+def process_instance_image(model_label, pk, field_name):
+    """
+    Process one model image (run on the worker thread or from process_images)
+    Returns: the variants dict, or None when there was nothing to do
+    """
+    model = apps.get_model(model_label)
+    fields = [field_name, f'{field_name}_variants']
+    if any(field.attname == 'booking_group_id' for field in model._meta.fields):
+        fields.append('booking_group_id')
+    instance = model.objects.filter(pk=pk).only(*fields).first()
+    if instance is None or not getattr(instance, field_name):
+        return None
+
+    name = getattr(instance, field_name).name
+    variants = process_image_file(name, IMAGE_VARIANTS[(model._meta.label_lower, field_name)])
+
+    # Only record the result if the row still points at the same file
+    # (update() keeps this from re-triggering post_save)
+    updates = {f'{field_name}_variants': variants}
+    if any(field.name == 'updated_at' for field in model._meta.fields):
+        updates['updated_at'] = timezone.now()
+    updated = model.objects.filter(pk=pk, **{field_name: name}).update(**updates)
+
+    booking_group_id = getattr(instance, 'booking_group_id', None)
+    if updated and booking_group_id:
+        # update() skips the post_save refresh; bump the group so its ETag
+        # (get_bulk_group_details) changes and clients fetch the variants
+        BookingGroup = apps.get_model('registrations.bookinggroup')
+        BookingGroup.refresh(booking_group_id)
+
+    if model._meta.label_lower == 'registrations.eventsettings':
+        # Import here to avoid circular import
+        from .cache_utils import invalidate_public_response
+        invalidate_public_response('event_settings')
+    return variants
+
+
+class ImageProcessingQueue:
+    """Processes uploaded images one at a time on a background thread"""
+
+    def __init__(self):
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name='image-processing', daemon=True)
+        self._thread.start()
+
+    def submit(self, model_label, pk, field_name):
+        self._queue.put((model_label, pk, field_name))
+
+    def pending(self):
+        return self._queue.qsize()
+
+    def _run(self):
+        while True:
+            task = self._queue.get()
+            try:
+                process_instance_image(*task)
+            except Exception as e:
+                logger.error(f"Image processing failed for {task[0]} {task[1]} {task[2]}: {str(e)}")
+            finally:
+                close_old_connections()
+
+
+_image_queue = None
+_image_queue_lock = threading.Lock()
+
+
+def get_image_queue():
+    """Return the process-wide image processing queue"""
+    global _image_queue
+    with _image_queue_lock:
+        if _image_queue is None:
+            _image_queue = ImageProcessingQueue()
+        return _image_queue
+
+
+def schedule_image_processing(instance, field_name):
+    """
+    Process the instance's new image after the current transaction commits
+    (on the background queue, or inline when IMAGE_PROCESSING_ASYNC is off)
+    """
+    if not needs_processing(instance, field_name):
+        return
+    task = (instance._meta.label_lower, instance.pk, field_name)
+
+    def run():
+        if getattr(settings, 'IMAGE_PROCESSING_ASYNC', True):
+            get_image_queue().submit(*task)
+        else:
+            try:
+                process_instance_image(*task)
+            except Exception as e:
+                logger.error(f"Image processing failed for {task[0]} {task[1]} {task[2]}: {str(e)}")
+
+    transaction.on_commit(run)
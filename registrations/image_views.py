@@ -0,0 +1,87 @@
+"""
+Public image proxy views for Google Drive sponsor logos and ID card templates
+"""
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseRedirect, JsonResponse
+from django.urls import reverse
+from django.utils.cache import patch_vary_headers
+from django.views.decorators.http import require_GET
+from .models import Sponsor, IDCardTemplate, drive_file_id
+from .image_proxy import (
+    get_image_proxy, variant_width, ImageFetchError,
+    VARIANT_FORMATS, VARIANT_WIDTHS, FILE_ID_PATTERN, CONTENT_HASH_PATTERN, VARIANT_PATTERN,
+)
+from .cache_utils import etag_matches
+import logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_IMAGE_WIDTH = 600
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+REDIRECT_CACHE_CONTROL = 'public, max-age=300'  # Drive changes show up within this delay
+
+
+def referenced_drive_file_ids():
+    """Drive file IDs used by a sponsor logo or ID card template (the only files the proxy fetches)"""
+    urls = list(Sponsor.objects.values_list('logo_url', flat=True))
+    urls += IDCardTemplate.objects.exclude(template_url=None).values_list('template_url', flat=True)
+    return {drive_file_id(url) for url in urls} - {None}
+
+
+@require_GET
+def drive_image(request, file_id):
+    """
+    Redirect to the content-hashed (immutable) variant of a Drive image
+    ?w= width in pixels, rounded up to the next VARIANT_WIDTHS step (default 600)
+    ?format=webp|png (default: WebP when the browser accepts it, else PNG)
+    """
+    if not FILE_ID_PATTERN.match(file_id):
+        raise Http404('Unknown image')
+
+    try:
+        width = variant_width(int(request.GET.get('w', DEFAULT_IMAGE_WIDTH)))
+    except ValueError:
+        return JsonResponse({'error': 'w must be a whole number of pixels'}, status=400)
+
+    image_format = request.GET.get('format')
+    if image_format and image_format not in VARIANT_FORMATS:
+        return JsonResponse({'error': f"format must be one of: {', '.join(VARIANT_FORMATS)}"}, status=400)
+    negotiated = not image_format
+    if negotiated:
+        image_format = 'webp' if 'image/webp' in request.headers.get('Accept', '') else 'png'
+
+    proxy = get_image_proxy()
+    try:
+        if not proxy.is_stored(file_id) and file_id not in referenced_drive_file_ids():
+            raise Http404('Unknown image')
+        content_hash = proxy.content_hash(file_id)
+    except ImageFetchError as e:
+        logger.warning(f'Image proxy fetch failed for {file_id}: {str(e)}')
+        return JsonResponse({'error': 'Image could not be fetched'}, status=502)
+
+    response = HttpResponseRedirect(reverse('image_variant', args=[content_hash, f'w{width}.{image_format}']))
+    response['Cache-Control'] = REDIRECT_CACHE_CONTROL
+    if negotiated:
+        patch_vary_headers(response, ['Accept'])
+    return response
+
+
+@require_GET
+def image_variant(request, content_hash, variant):
+    """Serve a resized variant; its URL names the content hash, so it never changes"""
+    match = VARIANT_PATTERN.match(variant)
+    if not CONTENT_HASH_PATTERN.match(content_hash) or not match or int(match.group(1)) not in VARIANT_WIDTHS:
+        raise Http404('Unknown image')
+
+    etag = f'"{content_hash[:16]}-{variant}"'
+    if etag_matches(request, etag):
+        response = HttpResponse(status=304)
+    else:
+        try:
+            path = get_image_proxy().variant(content_hash, int(match.group(1)), match.group(2))
+        except FileNotFoundError:
+            raise Http404('Unknown image')
+        response = FileResponse(open(path, 'rb'), content_type=VARIANT_FORMATS[match.group(2)])
+
+    response['ETag'] = etag
+    response['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+    return response
@@ -0,0 +1,84 @@
+"""
+Housekeeping jobs for tables that grow during the event
+"""
+from django.db import close_old_connections, transaction
+from .models import OTPVerification
+import json
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+OTP_ARCHIVE_FIELDS = [
+    'id', 'mobile_number', 'email', 'member_name', 'category',
+    'created_at', 'expires_at', 'is_verified', 'verified_at', 'attempts',
+]
+
+
+def compact_otp_verifications(keep_verified_days=30, chunk_size=1000, pause=0.0, archive=None, progress=None):
+    """
+    Delete compactable OTPVerification rows in primary-key chunks, one short
+    transaction per chunk so locks are only held for chunk_size rows
+
+    Args:
+        keep_verified_days: verified rows newer than this are kept for audit
+        chunk_size: rows per transaction
+        pause: seconds to sleep between chunks
+        archive: optional text file object; rows are written to it as JSON
+            lines (OTP codes are never archived) before they are deleted
+        progress: optional callable(reclaimed_so_far)
+
+    Returns:
+        dict: {'verified': n, 'unverified': n, 'total': n}
+    """
+    queryset = OTPVerification.compactable(keep_verified_days=keep_verified_days)
+    reclaimed = {'verified': 0, 'unverified': 0, 'total': 0}
+
+    while True:
+        with transaction.atomic():
+            rows = list(queryset.order_by('id').values(*OTP_ARCHIVE_FIELDS)[:chunk_size])
+            if not rows:
+                break
+
+            if archive is not None:
+                for row in rows:
+                    archive.write(json.dumps(row, default=str) + '\n')
+                # Make sure the chunk is on disk before its rows disappear
+                archive.flush()
+
+            OTPVerification.objects.filter(id__in=[row['id'] for row in rows]).delete()
+
+        verified = sum(1 for row in rows if row['is_verified'])
+        reclaimed['verified'] += verified
+        reclaimed['unverified'] += len(rows) - verified
+        reclaimed['total'] += len(rows)
+        if progress:
+            progress(reclaimed['total'])
+        if pause:
+            time.sleep(pause)
+
+    return reclaimed
+
+
+def start_otp_compaction_scheduler(interval_minutes, keep_verified_days=30, chunk_size=1000):
+    """
+    Run compact_otp_verifications every interval_minutes on a daemon thread
+    Returns: the thread
+    """
+    def run():
+        while True:
+            time.sleep(interval_minutes * 60)
+            try:
+                reclaimed = compact_otp_verifications(keep_verified_days=keep_verified_days, chunk_size=chunk_size)
+                if reclaimed['total']:
+                    logger.info(f"OTP compaction reclaimed {reclaimed['total']} rows "
+                                f"({reclaimed['unverified']} unverified, {reclaimed['verified']} verified)")
+            except Exception as e:
+                logger.error(f"OTP compaction failed: {str(e)}")
+            finally:
+                close_old_connections()
+
+    thread = threading.Thread(target=run, name='otp-compaction', daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,94 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from registrations.models import ScanLog
+from datetime import timedelta
+import gzip
+import json
+import os
+
+
+class Command(BaseCommand):
+    help = 'Archive old scan logs to a gzipped JSON Lines file and purge them from the database in chunks'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--older-than-hours',
+            type=int,
+            default=24,
+            help='Archive scans older than this many hours (default: 24)'
+        )
+        parser.add_argument(
+            '--before',
+            type=str,
+            help='Archive scans before this ISO timestamp (overrides --older-than-hours)'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=5000,
+            help='Number of rows to archive and delete per transaction (default: 5000)'
+        )
+        parser.add_argument(
+            '--output',
+            type=str,
+            help='Archive file path (default: <BASE_DIR>/archives/scan_logs_<timestamp>.jsonl.gz)'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report how many rows would be archived'
+        )
+
+    def handle(self, *args, **options):
+        if options['before']:
+            cutoff = parse_datetime(options['before'])
+            if cutoff is None:
+                raise CommandError(f"Invalid --before timestamp: {options['before']}")
+            if timezone.is_naive(cutoff):
+                cutoff = timezone.make_aware(cutoff)
+        else:
+            cutoff = timezone.now() - timedelta(hours=options['older_than_hours'])
+
+        chunk_size = options['chunk_size']
+        if chunk_size <= 0:
+            raise CommandError('--chunk-size must be positive')
+
+        old_logs = ScanLog.objects.filter(scanned_at__lt=cutoff)
+        total = old_logs.count()
+        self.stdout.write(f'Found {total} scan logs before {cutoff.isoformat()}')
+
+        if options['dry_run'] or total == 0:
+            return
+
+        output = options['output']
+        if not output:
+            archive_dir = os.path.join(settings.BASE_DIR, 'archives')
+            os.makedirs(archive_dir, exist_ok=True)
+            stamp = timezone.now().strftime('%Y%m%d_%H%M%S')
+            output = os.path.join(archive_dir, f'scan_logs_{stamp}.jsonl.gz')
+
+        archived = 0
+        fields = ['id', 'registration_id', 'ticket_no', 'action', 'scanned_at', 'scanned_by', 'notes']
+
+        with gzip.open(output, 'at', encoding='utf-8') as archive:
+            while True:
+                with transaction.atomic():
+                    rows = list(old_logs.order_by('id').values(*fields)[:chunk_size])
+                    if not rows:
+                        break
+
+                    for row in rows:
+                        row['scanned_at'] = row['scanned_at'].isoformat()
+                        archive.write(json.dumps(row) + '\n')
+                    # Make sure the chunk is on disk before its rows disappear
+                    archive.flush()
+
+                    ScanLog.objects.filter(id__in=[row['id'] for row in rows]).delete()
+
+                archived += len(rows)
+                self.stdout.write(f'   Archived {archived}/{total}')
+
+        self.stdout.write(self.style.SUCCESS(f'Archived and purged {archived} scan logs to {output}'))
@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from registrations.backup import resolve_models, write_backup
+import os
+
+
+class Command(BaseCommand):
+    help = 'Write a gzipped JSON Lines backup of the database (restore with restore_backup)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output',
+            type=str,
+            help='Backup file path (default: bnievent_backup_<timestamp>.jsonl.gz in the current directory)'
+        )
+        parser.add_argument(
+            '--models',
+            type=str,
+            help='Comma-separated model or app labels to back up (default: all data)'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=1000,
+            help='Rows read and serialized per chunk (default: 1000)'
+        )
+
+    def handle(self, *args, **options):
+        if options['chunk_size'] <= 0:
+            raise CommandError('--chunk-size must be positive')
+
+        labels = [label.strip() for label in (options['models'] or '').split(',') if label.strip()]
+        try:
+            models = resolve_models(labels)
+        except LookupError as e:
+            raise CommandError(str(e))
+
+        output = options['output'] or f"bnievent_backup_{timezone.now().strftime('%Y%m%d_%H%M%S')}.jsonl.gz"
+
+        self.stdout.write('=' * 80)
+        self.stdout.write(f'Backing up {len(models)} models to {output}')
+        self.stdout.write('=' * 80)
+
+        count = write_backup(output, models, chunk_size=options['chunk_size'])
+
+        size_kb = os.path.getsize(output) / 1024
+        self.stdout.write(self.style.SUCCESS(f'Wrote {count} objects ({size_kb:.1f} KB)'))
@@ -0,0 +1,203 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.contrib.auth import get_user_model
+from django.db import connection, connections
+from django.test.utils import CaptureQueriesContext, setup_test_environment, teardown_test_environment
+from rest_framework.test import APIClient
+from registrations.models import Registration, ScanLog
+from concurrent.futures import ThreadPoolExecutor
+from collections import Counter
+import random
+import threading
+import time
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark gate scanning throughput (scan, scan-qr, log_scan) against a throwaway '
+        'test database and check duplicate detection under concurrency'
+    )
+
+    ENDPOINTS = ['scan', 'scan-qr', 'log_scan']
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tickets', type=int, default=540, help='Number of tickets to seed (max 541, default: 540)')
+        parser.add_argument('--scans', type=int, default=3000, help='Scans to drive per endpoint (default: 3000)')
+        parser.add_argument('--concurrency', type=int, default=8, help='Number of concurrent scanner threads (default: 8)')
+        parser.add_argument('--duplicate-burst', type=int, default=20, help='Simultaneous scans of one ticket in the duplicate test (default: 20)')
+        parser.add_argument(
+            '--endpoint',
+            choices=self.ENDPOINTS,
+            action='append',
+            help='Only benchmark the given endpoint (can be repeated)'
+        )
+        parser.add_argument('--keepdb', action='store_true', help='Keep the test database between runs')
+
+    def handle(self, *args, **options):
+        if not 1 <= options['tickets'] <= 541:
+            raise CommandError('--tickets must be between 1 and 541')
+
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, keepdb=options['keepdb'])
+        try:
+            self.run_benchmarks(options)
+        finally:
+            connections.close_all()
+            connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=options['keepdb'])
+            teardown_test_environment()
+
+    def run_benchmarks(self, options):
+        tickets = self.seed_event(options['tickets'])
+        self.staff_user = get_user_model().objects.create_user(
+            username='gate_benchmark', password='benchmark', is_staff=True
+        )
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Seeded {len(tickets)} tickets, {options["scans"]} scans per endpoint, '
+            f'{options["concurrency"]} concurrent scanners'
+        ))
+        self.stdout.write('=' * 80)
+        self.stdout.write(f'{"endpoint":<10}{"scans/sec":>12}{"p50 ms":>10}{"p95 ms":>10}{"max ms":>10}{"queries/scan":>15}{"errors":>9}')
+
+        for endpoint in options['endpoint'] or self.ENDPOINTS:
+            ScanLog.objects.all().delete()
+            queries = self.measure_queries(endpoint, tickets)
+            result = self.drive_scanners(endpoint, tickets, options['scans'], options['concurrency'])
+            self.stdout.write(
+                f'{endpoint:<10}{result["throughput"]:>12.1f}{result["p50"]:>10.2f}{result["p95"]:>10.2f}'
+                f'{result["max"]:>10.2f}{queries:>15}{result["errors"]:>9}'
+            )
+            if result['errors']:
+                codes = ', '.join(f'{code} x{count}' for code, count in sorted(result['error_codes'].items()))
+                self.stdout.write(self.style.WARNING(f'  {endpoint} non-2xx responses: {codes}'))
+
+        self.stdout.write('=' * 80)
+        self.check_duplicate_detection(tickets, options['duplicate_burst'])
+
+    def seed_event(self, count):
+        """Create paid registrations with the same ticket numbering the app uses"""
+        categories = ['PUBLIC', 'STUDENTS', 'BNI_CHETTINAD', 'BNI_THALAIVAS', 'BNI_MADURAI']
+        Registration.objects.bulk_create([
+            Registration(
+                ticket_no=f'BNI{num:03d}',
+                name=f'Attendee {num}',
+                mobile_number=f'9{num:09d}',
+                email=f'attendee{num}@example.com',
+                registration_for=categories[num % len(categories)],
+                payment_status='SUCCESS',
+                amount=300,
+            )
+            for num in range(1, count + 1)
+        ])
+        return list(Registration.objects.values_list('ticket_no', flat=True))
+
+    def get_client(self, endpoint):
+        # A failing view returns a 500 response (counted as an error) instead
+        # of raising in the scanner thread and aborting the run
+        client = APIClient(raise_request_exception=False)
+        if endpoint == 'log_scan':
+            client.force_authenticate(self.staff_user)
+        return client
+
+    def scan(self, client, endpoint, ticket_no):
+        if endpoint == 'scan':
+            return client.post(f'/api/scan/{ticket_no}/')
+        if endpoint == 'scan-qr':
+            return client.get(f'/api/scan-qr/{ticket_no}/')
+        return client.post('/api/scan-logs/log_scan/', {'ticket_no': ticket_no, 'action': 'CHECK_IN'}, format='json')
+
+    def measure_queries(self, endpoint, tickets):
+        """Count queries for a first scan and a repeat scan of the same ticket"""
+        client = self.get_client(endpoint)
+        ticket_no = tickets[0]
+        counts = []
+        for _ in range(2):
+            with CaptureQueriesContext(connection) as ctx:
+                self.scan(client, endpoint, ticket_no)
+            counts.append(len(ctx.captured_queries))
+        return '/'.join(str(c) for c in counts)
+
+    def drive_scanners(self, endpoint, tickets, total_scans, concurrency):
+        # Random tickets, so the run mixes first-time check-ins with repeat scans
+        workload = [random.choice(tickets) for _ in range(total_scans)]
+        latencies = []
+        errors = []
+        lock = threading.Lock()
+        local = threading.local()
+
+        def worker(ticket_no):
+            if not hasattr(local, 'client'):
+                local.client = self.get_client(endpoint)
+            start = time.perf_counter()
+            response = self.scan(local.client, endpoint, ticket_no)
+            elapsed = (time.perf_counter() - start) * 1000
+            with lock:
+                latencies.append(elapsed)
+                if not 200 <= response.status_code < 300:
+                    errors.append(response.status_code)
+
+        def run(chunk):
+            try:
+                for ticket_no in chunk:
+                    worker(ticket_no)
+            finally:
+                connections.close_all()
+
+        chunks = [workload[i::concurrency] for i in range(concurrency)]
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            list(executor.map(run, chunks))
+        wall = time.perf_counter() - started
+
+        latencies.sort()
+        return {
+            'throughput': len(latencies) / wall if wall else 0,
+            'p50': self.percentile(latencies, 50),
+            'p95': self.percentile(latencies, 95),
+            'max': latencies[-1] if latencies else 0,
+            'errors': len(errors),
+            'error_codes': Counter(errors),
+        }
+
+    def check_duplicate_detection(self, tickets, burst):
+        """
+        Fire simultaneous first scans at one fresh ticket; exactly one scanner
+        should be told it is a first-time check-in
+        """
+        ScanLog.objects.all().delete()
+        ticket_no = tickets[-1]
+        barrier = threading.Barrier(burst)
+        first_time = []
+        errors = []
+        lock = threading.Lock()
+
+        def scan_once(_):
+            client = APIClient(raise_request_exception=False)
+            try:
+                barrier.wait()
+                response = client.post(f'/api/scan/{ticket_no}/')
+                with lock:
+                    if response.status_code != 200:
+                        errors.append(response.status_code)
+                    elif response.json().get('first_time'):
+                        first_time.append(1)
+            finally:
+                connections.close_all()
+
+        with ThreadPoolExecutor(max_workers=burst) as executor:
+            list(executor.map(scan_once, range(burst)))
+
+        check_ins = ScanLog.objects.filter(ticket_no=ticket_no, action='CHECK_IN').count()
+        summary = f'{burst} simultaneous scans of {ticket_no}: {len(first_time)} first-time check-ins, {check_ins} CHECK_IN rows'
+        if errors:
+            summary += f', {len(errors)} failed requests'
+        if len(first_time) == 1:
+            self.stdout.write(self.style.SUCCESS(f'Duplicate detection OK - {summary}'))
+        else:
+            self.stdout.write(self.style.ERROR(f'Duplicate detection FAILED - {summary}'))
+
+    @staticmethod
+    def percentile(values, pct):
+        if not values:
+            return 0
+        index = min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))
+        return values[index]
@@ -0,0 +1,88 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.conf import settings
+from django.utils import timezone
+from registrations.models import OTPVerification
+from registrations.maintenance import compact_otp_verifications
+import gzip
+import os
+
+
+class Command(BaseCommand):
+    help = 'Purge expired and old verified OTP rows in small chunks, optionally archiving them first'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--keep-verified-days',
+            type=int,
+            default=getattr(settings, 'OTP_KEEP_VERIFIED_DAYS', 30),
+            help='Keep verified OTP rows for this many days (default: OTP_KEEP_VERIFIED_DAYS)'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=1000,
+            help='Number of rows to delete per transaction (default: 1000)'
+        )
+        parser.add_argument(
+            '--pause',
+            type=float,
+            default=0.0,
+            help='Seconds to sleep between chunks to limit load (default: 0)'
+        )
+        parser.add_argument(
+            '--archive',
+            action='store_true',
+            help='Write purged rows (without OTP codes) to <BASE_DIR>/archives/otp_<timestamp>.jsonl.gz'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report how many rows would be purged'
+        )
+
+    def handle(self, *args, **options):
+        if options['chunk_size'] <= 0:
+            raise CommandError('--chunk-size must be positive')
+
+        keep_days = options['keep_verified_days']
+        total_rows = OTPVerification.objects.count()
+        compactable = OTPVerification.compactable(keep_verified_days=keep_days).count()
+
+        self.stdout.write('=' * 80)
+        self.stdout.write(f'OTP rows: {total_rows} total, {compactable} expired or past {keep_days}-day retention')
+        self.stdout.write('=' * 80)
+
+        if options['dry_run'] or compactable == 0:
+            return
+
+        def progress(done):
+            self.stdout.write(f'   Purged {done}/{compactable}')
+
+        archive = None
+        output = None
+        if options['archive']:
+            archive_dir = os.path.join(settings.BASE_DIR, 'archives')
+            os.makedirs(archive_dir, exist_ok=True)
+            stamp = timezone.now().strftime('%Y%m%d_%H%M%S')
+            output = os.path.join(archive_dir, f'otp_{stamp}.jsonl.gz')
+            archive = gzip.open(output, 'at', encoding='utf-8')
+
+        try:
+            reclaimed = compact_otp_verifications(
+                keep_verified_days=keep_days,
+                chunk_size=options['chunk_size'],
+                pause=options['pause'],
+                archive=archive,
+                progress=progress,
+            )
+        finally:
+            if archive is not None:
+                archive.close()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Reclaimed {reclaimed['total']} rows "
+            f"({reclaimed['unverified']} expired unverified, {reclaimed['verified']} verified)"
+        ))
+        if output:
+            self.stdout.write(f'Archive: {output}')
+        self.stdout.write(f'Remaining OTP rows: {total_rows - reclaimed["total"]}')
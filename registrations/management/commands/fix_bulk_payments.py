@@ -1,6 +1,8 @@
 from django.core.management.base import BaseCommand
 from django.db.models import Q
-from registrations.models import Registration
+from django.utils import timezone
+from registrations.models import Registration, BookingGroup
+import json
 
 
 class Command(BaseCommand):
@@ -23,38 +25,38 @@ class Command(BaseCommand):
     def populate_gateway_verified(self):
         """Populate gateway_verified based on payment_id existence"""
         # Set gateway_verified=True for records with payment_id
+        # (only rows that change, and bump updated_at so incremental backups see them)
         updated_true = Registration.objects.filter(
-            payment_id__isnull=False
-        ).exclude(payment_id='').update(gateway_verified=True)
+            payment_id__isnull=False, gateway_verified=False
+        ).exclude(payment_id='').update(gateway_verified=True, updated_at=timezone.now())
 
         # Set gateway_verified=False for records without payment_id
         updated_false = Registration.objects.filter(
-            Q(payment_id__isnull=True) | Q(payment_id='')
-        ).update(gateway_verified=False)
+            Q(payment_id__isnull=True) | Q(payment_id=''), gateway_verified=True
+        ).update(gateway_verified=False, updated_at=timezone.now())
 
         self.stdout.write(f'   - Set gateway_verified=True for {updated_true} records (have payment_id)')
         self.stdout.write(f'   - Set gateway_verified=False for {updated_false} records (no payment_id)')
 
     def fix_bulk_booking_payments(self):
         """Propagate payment data from primary booker to additional members"""
-        # Get all bulk bookings (where booking_group_id is not null)
-        bulk_bookings = Registration.objects.filter(
-            booking_group_id__isnull=False
-        ).values_list('booking_group_id', flat=True).distinct()
+        # Refresh the BookingGroup summaries first so the checks below see current data
+        BookingGroup.rebuild_all()
+
+        # Only groups with additional members need propagation
+        groups = BookingGroup.objects.filter(additional_count__gt=0).select_related('primary_registration')
+        total_groups = BookingGroup.objects.count()
 
         fixed_count = 0
         skipped_count = 0
         error_count = 0
 
-        for booking_id in bulk_bookings:
+        for group in groups:
+            booking_id = group.booking_group_id
             try:
-                # Get all registrations in this booking group
-                registrations = Registration.objects.filter(booking_group_id=booking_id).order_by('created_at')
-
-                # Find primary booker
-                primary = registrations.filter(is_primary_booker=True).first()
+                primary = group.primary_registration
 
-                if not primary:
+                if not primary or not primary.is_primary_booker:
                     self.stdout.write(self.style.WARNING(f'   ⚠️  No primary booker for {booking_id}'))
                     skipped_count += 1
                     continue
@@ -66,27 +68,29 @@ class Command(BaseCommand):
                     continue
 
                 # Calculate expected amount (number of persons * per person price)
-                total_persons = registrations.count()
-
-                # Get per-person price from primary booker's amount
-                # For Public: Should be 300 per person
-                # For Students: Should be 150 per person
-                # For BNI: Should be 0 per person
-                if primary.registration_for == 'PUBLIC':
-                    per_person_price = 300
-                elif primary.registration_for == 'STUDENTS':
-                    per_person_price = 150
-                else:  # BNI members
-                    per_person_price = 0
-
-                expected_total = total_persons * per_person_price
+                # Public: 300 per person, Students: 150 per person, BNI: 0 per person
+                total_persons = group.total_attendees
+                expected_total = group.expected_total()
                 primary_paid = float(primary.amount)
 
                 # Check if primary paid for all members
                 if primary_paid >= expected_total:
                     # Primary paid for everyone, propagate payment data to additional members
-                    additional_members = registrations.filter(is_primary_booker=False)
+                    additional_members = Registration.objects.filter(
+                        booking_group_id=booking_id,
+                        is_primary_booker=False
+                    )
+
+                    try:
+                        payment_info = json.loads(primary.payment_info) if primary.payment_info else {}
+                    except (ValueError, TypeError):
+                        payment_info = {}
+
+                    # Add note in payment_info that this was paid by primary
+                    payment_info['paid_by_primary'] = True
+                    payment_info['primary_ticket'] = primary.ticket_no
 
+                    group_fixed = 0
                     for member in additional_members:
                         # Only update if member is not already SUCCESS with gateway verification
                         if not (member.payment_status == 'SUCCESS' and member.gateway_verified):
@@ -94,26 +98,15 @@ class Command(BaseCommand):
                             member.payment_id = primary.payment_id  # Link to primary's payment
                             member.payment_date = primary.payment_date
                             member.gateway_verified = True  # Verified through primary's payment
-
-                            # Add note in payment_info that this was paid by primary
-                            import json
-                            try:
-                                payment_info = json.loads(primary.payment_info) if primary.payment_info else {}
-                            except:
-                                payment_info = {}
-
-                            payment_info['paid_by_primary'] = True
-                            payment_info['primary_ticket'] = primary.ticket_no
                             member.payment_info = json.dumps(payment_info)
-
                             member.save()
-                            fixed_count += 1
+                            group_fixed += 1
 
-                    if additional_members.count() > 0:
-                        self.stdout.write(
-                            f'   ✓ Fixed {booking_id}: '
-                            f'{primary.name} paid ₹{primary_paid} for {total_persons} persons'
-                        )
+                    fixed_count += group_fixed
+                    self.stdout.write(
+                        f'   ✓ Fixed {booking_id}: '
+                        f'{primary.name} paid ₹{primary_paid} for {total_persons} persons'
+                    )
                 else:
                     # Primary paid only for themselves or partial payment
                     skipped_count += 1
@@ -123,7 +116,7 @@ class Command(BaseCommand):
                 error_count += 1
 
         self.stdout.write('\n' + '-' * 80)
-        self.stdout.write(f'   Total booking groups processed: {len(list(bulk_bookings))}')
+        self.stdout.write(f'   Total booking groups processed: {total_groups}')
         self.stdout.write(f'   Additional members fixed: {fixed_count}')
         self.stdout.write(f'   Skipped (incomplete payment): {skipped_count}')
         self.stdout.write(f'   Errors: {error_count}')
@@ -0,0 +1,64 @@
+from django.core.management.base import BaseCommand
+from django.conf import settings
+from registrations.gate_node import GateNodeStore, serve
+import os
+
+
+class Command(BaseCommand):
+    help = 'Run an edge gate node that serves ticket scans from a local SQLite replica'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'action',
+            choices=['snapshot', 'serve', 'sync', 'status'],
+            help=(
+                'snapshot: copy tickets from the primary DB into the local file; '
+                'serve: answer scan/scan-qr from the local file; '
+                'sync: push queued scans to the primary ScanLog; '
+                'status: show local replica counts'
+            )
+        )
+        parser.add_argument(
+            '--db',
+            type=str,
+            default=os.path.join(settings.BASE_DIR, 'gate_node.sqlite3'),
+            help='Path of the local SQLite replica (default: <BASE_DIR>/gate_node.sqlite3)'
+        )
+        parser.add_argument('--node-name', type=str, default='gate', help='Name recorded as scanned_by (gate:<name>)')
+        parser.add_argument('--host', type=str, default='0.0.0.0', help='Address to serve on (default: 0.0.0.0)')
+        parser.add_argument('--port', type=int, default=8100, help='Port to serve on (default: 8100)')
+        parser.add_argument(
+            '--sync-interval',
+            type=int,
+            default=30,
+            help='Seconds between background syncs while serving, 0 to disable (default: 30)'
+        )
+
+    def handle(self, *args, **options):
+        store = GateNodeStore(options['db'], node_name=options['node_name'])
+        action = options['action']
+
+        if action == 'snapshot':
+            count = store.snapshot()
+            self.stdout.write(self.style.SUCCESS(f'Snapshot of {count} tickets written to {options["db"]}'))
+
+        elif action == 'sync':
+            pushed = store.sync()
+            self.stdout.write(self.style.SUCCESS(f'Synced {pushed} queued scans to the primary database'))
+
+        elif action == 'status':
+            for key, value in store.stats().items():
+                self.stdout.write(f'{key}: {value}')
+
+        elif action == 'serve':
+            stats = store.stats()
+            if not stats['tickets']:
+                self.stdout.write(self.style.WARNING('Local replica is empty - run "gate_node snapshot" first'))
+            self.stdout.write(self.style.SUCCESS(
+                f'Gate node "{options["node_name"]}" serving {stats["tickets"]} tickets '
+                f'on http://{options["host"]}:{options["port"]}/api/scan/<ticket>/'
+            ))
+            try:
+                serve(store, options['host'], options['port'], sync_interval=options['sync_interval'])
+            except KeyboardInterrupt:
+                self.stdout.write('Stopping gate node')
@@ -1,138 +1,93 @@
-from django.core.management.base import BaseCommand
-from registrations.models import BNIMember, Registration
+from django.core.management.base import BaseCommand, CommandError
+from registrations.models import BNIMember
+from registrations.member_import import MemberImporter, read_roster
+import os
+
+DEFAULT_ROSTER = os.path.join(os.path.dirname(__file__), '..', '..', 'data', 'bni_members.csv')
+
 
 class Command(BaseCommand):
-    help = 'Import BNI members from predefined list'
+    help = 'Import BNI members from CSV/XLSX rosters (columns: name, company, sponsor_type and optionally chapter)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'files',
+            nargs='*',
+            help='Roster files (.csv or .xlsx); defaults to the bundled registrations/data/bni_members.csv'
+        )
+        parser.add_argument(
+            '--chapter',
+            choices=[code for code, _ in BNIMember.CHAPTER_CHOICES],
+            help='Chapter for rows without a chapter column'
+        )
+        parser.add_argument('--sheet', type=str, help='Worksheet name for .xlsx files (default: first sheet)')
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=500,
+            help='Rows validated and upserted per transaction (default: 500)'
+        )
+        parser.add_argument(
+            '--deactivate-missing',
+            action='store_true',
+            help='Mark active members of the imported chapters that are not in the files as inactive'
+        )
+        parser.add_argument('--dry-run', action='store_true', help='Show the diff without writing anything')
 
     def handle(self, *args, **options):
-        # BNI Chettinad Members
-        chettinad_members = [
-            {'name': 'ABDUL HAKKIM', 'company': 'QUALIY DOORS & PLYWOODS', 'sponsor_type': 'BNI_MEMBERS'},
-            {'name': 'ANANDHA KRISHNAN', 'company': 'GM INTERLOCK BRICKS', 'sponsor_type': 'BNI_MEMBERS'},
-            {'name': 'ANGEL BALA', 'company': 'RASI AUTO CONSULTING & FINANCE', 'sponsor_type': 'BNI_MEMBERS'},
-            {'name': 'ARAVIND KUMAR B', 'company': 'CHETTINAD NAGAI MAALIGAI', 'sponsor_type': 'BNI_MEMBERS'},
-            {'name': 'ARSATH AYUB', 'company': 'SMART AGENCIES', 'sponsor_type': 'BNI_MEMBERS'},
-            {'name': 'AYYAPPAN ARUNAGIRI', 'company': 'SURIYA JEWELLERY MART', 'sponsor_type': 'BNI_MEMBERS'},
-            {'name': 'EDWIN GODSON', 'company': 'DEVI DIGITAL', 'sponsor_type': 'BNI_MEMBERS'},
-            {'name': 'GANESH KRISHNAN', 'company': 'NARUVIZHI AMBAL MODERN RICE MILL PVT LTD', 'sponsor_type': 'BNI_MEMBERS'},
-            {'name': 'GAUTHAM SHENBAK', 'company': 'M.S.P. PALANISAMY NADAR', 'sponsor_type': 'BNI_MEMBERS'},
-            {'name': 'GOKUL RAV', 'company': 'BPL EVENTS', 'sponsor_type': 'BNI_MEMBERS'},
-            {'name': 'KANNAPPAN VAIRAVAN', 'company': 'ECOWIN BUILDING SOLUTIONS', 'sponsor_type': 'BNI_MEMBERS'},
-            {'name': 'KARTHICK SELVAKUMAR', 'company': 'KURUNJI ELECTRONICS', 'sponsor_type': 'BNI_MEMBERS'},
-            {'name': 'KUMARAN KATHAMUTHU', 'company': 'FUN O FOCUS ENTERPRISES', 'sponsor_type': 'BNI_MEMBERS'},
-            {'name': 'KUMARAPPAN K', 'company': 'UDHAYAM SUPER MARKET', 'sponsor_type': 'BNI_MEMBERS'},
-            {'name': 'LAKSHMI SUBBRAMANIAN', 'company': 'MIRAI DESIGNS', 'sponsor_type': 'BNI_MEMBERS'},
-            {'name': 'MANICKAM K', 'company': 'SRI LAKSHMI WATCH & GIFT SHOP', 'sponsor_type': 'BNI_MEMBERS'},
-            {'name': 'Dr. MANIKANDAN', 'company': "DR. MANI'S MULTISPECIALITY DENTAL CENTER", 'sponsor_type': 'BNI_MEMBERS'},
-            {'name': 'MANIKANDAN MUTTHIAH', 'company': 'RA AQUA PRODUCT', 'sponsor_type': 'BNI_MEMBERS'},
-            {'name': 'MARUDHUPANDIAN SELVARAJ', 'company': 'CHROMEX', 'sponsor_type': 'BNI_MEMBERS'},
-            {'name': 'MAX K', 'company': 'VP TRADERS', 'sponsor_type': 'BNI_MEMBERS'},
-            {'name': 'MEENAKSHI KUMAR MAGALANATHAN', 'company': 'SUN PRINTERS', 'sponsor_type': 'BNI_MEMBERS'},
-            {'name': 'MOHAMMED FAZIL S', 'company': 'GREEN HARVEST AGRO', 'sponsor_type': 'BNI_MEMBERS'},
-            {'name': 'MUTHU PRAKASH', 'company': 'CCTV', 'sponsor_type': 'BNI_MEMBERS'},
-            {'name': 'MUTHUKUMAR RAMASAMY', 'company': 'U-LAND PROMOTERS', 'sponsor_type': 'BNI_MEMBERS'},
-            {'name': 'MUTHURAMAN LAKSHMANAN', 'company': 'SHRILAKSHMAN ENTERPRISES', 'sponsor_type': 'BNI_MEMBERS'},
-            {'name': 'NITHIYA BALASUBRAMANIAN', 'company': 'MENAKA DIGITAL STUDIO', 'sponsor_type': 'BNI_MEMBERS'},
-            {'name': 'POOBATHI N', 'company': 'SRI KARPAGA VINAYAGAA GRANITES', 'sponsor_type': 'BNI_MEMBERS'},
-            {'name': 'PRATHEEP MANICKAM', 'company': 'CORNER BAKERY & SWEETS', 'sponsor_type': 'BNI_MEMBERS'},
-            {'name': 'RAJA MOHAMMED', 'company': "AL KING'S GLASS WORKS", 'sponsor_type': 'BNI_MEMBERS'},
-            {'name': 'RAJEEVGANDHI K', 'company': 'HDFC LIFE INSURANCE', 'sponsor_type': 'BNI_MEMBERS'},
-            {'name': 'RAMAIYA PILLAI NLLASAMY', 'company': 'THIRU CHIT FUNDS PVT LTD', 'sponsor_type': 'TITLE_SPONSORS'},
-            {'name': 'RAMKUMAR VENKATACHALAM', 'company': 'ESKAY BATTERIES', 'sponsor_type': 'BNI_MEMBERS'},
-            {'name': 'SANDHYA ARUN KUMAR', 'company': 'ANDY MAKEOVER & BRIDAL JEWELRY', 'sponsor_type': 'BNI_MEMBERS'},
-            {'name': 'SELVA KUMAR S', 'company': 'GENESIS WATECH', 'sponsor_type': 'BNI_MEMBERS'},
-            {'name': 'SELVAMANI GANESAN', 'company': '7 STAR CAR CARE', 'sponsor_type': 'BNI_MEMBERS'},
-            {'name': 'SENTHIL KUMAR PANDIAN', 'company': 'OS BUILDING SOLUTIONS', 'sponsor_type': 'BNI_MEMBERS'},
-            {'name': 'SHANTHI MUTHU', 'company': 'SRI KRITHIGA TYRES', 'sponsor_type': 'BNI_MEMBERS'},
-            {'name': 'SHEIK ABDULLA', 'company': 'KARAIKUDI NEWS CHANNEL', 'sponsor_type': 'BNI_MEMBERS'},
-            {'name': 'SURIYA PRABHA', 'company': 'SHADOW ASSOCIATES', 'sponsor_type': 'BNI_MEMBERS'},
-            {'name': 'TAMILARASAN V', 'company': 'GRAND INTERIOR & WALLPAPERS', 'sponsor_type': 'BNI_MEMBERS'},
-            {'name': 'Dr. THIYAGARAJAN BALAKRISHNAN', 'company': 'SUPER SUMO TECH SOLUTION', 'sponsor_type': 'BNI_MEMBERS'},
-            {'name': 'VARUN VIDHYAGAR', 'company': 'MARUTHI JOB CONSULTANCY', 'sponsor_type': 'BNI_MEMBERS'},
-            {'name': 'VELAYUTHAM RAMASAMY', 'company': 'PRIYAA CELLCOM', 'sponsor_type': 'BNI_MEMBERS'},
-            {'name': 'VIJAI SAKKARAVARTHY', 'company': 'CHETTINADU PILLARS', 'sponsor_type': 'BNI_MEMBERS'},
-        ]
+        files = options['files'] or [os.path.normpath(DEFAULT_ROSTER)]
+        for path in files:
+            if not os.path.exists(path):
+                raise CommandError(f'Roster file not found: {path}')
 
-        # BNI Thalaivas Members
-        thalaivas_members = [
-            {'name': 'ARUNACHALAM K', 'company': 'ADITTHYA HOSPITAL', 'sponsor_type': 'BNI_MEMBERS'},
-            {'name': 'ASHOK KUMAR B', 'company': 'INFODAZZ', 'sponsor_type': 'BNI_MEMBERS'},
-            {'name': 'SARAVANAN KN', 'company': 'SLP COLOR PRINTS', 'sponsor_type': 'BNI_MEMBERS'},
-            {'name': 'MUTHUKUMAR M', 'company': 'SONA PIPE TRADERS', 'sponsor_type': 'BNI_MEMBERS'},
-            {'name': 'MUTHU PALANI S', 'company': 'SSADS', 'sponsor_type': 'BNI_MEMBERS'},
-            {'name': 'SHAJAHAN N', 'company': 'SR ALUMINUM', 'sponsor_type': 'BNI_MEMBERS'},
-            {'name': 'YOGESH RAJ N', 'company': 'RAJA RAJAN ART WORKS', 'sponsor_type': 'BNI_MEMBERS'},
-            {'name': 'KALAISELVAN P', 'company': 'ARCHITECT2901@GMAIL.COM', 'sponsor_type': 'BNI_MEMBERS'},
-            {'name': 'KARTHIK CHINNAIAH R', 'company': 'NN WINDOWS', 'sponsor_type': 'BNI_MEMBERS'},
-            {'name': 'TAMIL CHELIYAN R', 'company': 'GEE VEE ELECTRICALS', 'sponsor_type': 'BNI_MEMBERS'},
-            {'name': 'HARI PRASATH S', 'company': 'HYDRO WORLD', 'sponsor_type': 'BNI_MEMBERS'},
-            {'name': 'DEVA D', 'company': 'DM ENTERPRISE', 'sponsor_type': 'BNI_MEMBERS'},
-            {'name': 'DHATCHINA MOORTHY K', 'company': 'LAKSHMI MARBLES', 'sponsor_type': 'BNI_MEMBERS'},
-            {'name': 'VISHNU SUBBU S', 'company': 'ACHARI & SONS', 'sponsor_type': 'BNI_MEMBERS'},
-            {'name': 'BALAMURUGAN C', 'company': 'BS ENTERPRISES', 'sponsor_type': 'BNI_MEMBERS'},
-            {'name': 'RAMAIAH V', 'company': 'WBC SOFTWARE LAB', 'sponsor_type': 'BNI_MEMBERS'},
-            {'name': 'SARAVANAN S', 'company': 'OM TRADITIONAL HOSPITAL', 'sponsor_type': 'BNI_MEMBERS'},
-            {'name': 'VIGNESH KUMAR C T A', 'company': 'CT VIN ALAGU THANGA MALIGAI', 'sponsor_type': 'BNI_MEMBERS'},
-            {'name': 'ALAGU LAKSHMI K', 'company': 'FUN O FOCUS ENTERPRISES', 'sponsor_type': 'BNI_MEMBERS'},
-            {'name': 'NAGARAJAN K', 'company': 'KUPPUSAMY CONSTRUCTIONS', 'sponsor_type': 'BNI_MEMBERS'},
-            {'name': 'NITHYA N', 'company': 'THIRU CHIT FUNDS PVT LTD', 'sponsor_type': 'BNI_MEMBERS'},
-            {'name': 'SURESHKUMAR P', 'company': 'DEVAYANAI TRADERS', 'sponsor_type': 'BNI_MEMBERS'},
-            {'name': 'ALPHONSE DEEPAK RAJ S', 'company': 'JD EVENTS', 'sponsor_type': 'BNI_MEMBERS'},
-            {'name': 'BALAMURUGAN S', 'company': 'SBM BATTERY AGENCIES', 'sponsor_type': 'BNI_MEMBERS'},
-            {'name': 'KANNAN S', 'company': 'RAJA SELVAM HI TECH RICE MILL', 'sponsor_type': 'BNI_MEMBERS'},
-            {'name': 'RAJA V', 'company': 'RAJA PAPER STORE', 'sponsor_type': 'BNI_MEMBERS'},
-            {'name': 'JAYA PRIYA S', 'company': 'STUDIO 7 ELEVEN FAMILY SALOON & BRIDAL SALOON', 'sponsor_type': 'BNI_MEMBERS'},
-            {'name': 'CHINNIAH K.R', 'company': 'J TYRES AND ALIGNMENT', 'sponsor_type': 'BNI_MEMBERS'},
-            {'name': 'THIRUNAVUKKARASU N', 'company': 'HALLO MOBILE', 'sponsor_type': 'BNI_MEMBERS'},
-            {'name': 'MAREESWARAN R', 'company': 'G5 PROPERTIES PRIVATE LIMITED', 'sponsor_type': 'BNI_MEMBERS'},
-            {'name': 'VISALAKSHI LAKSHMANAN', 'company': 'MOONSTAR CCTV', 'sponsor_type': 'BNI_MEMBERS'},
-            {'name': 'SEKAR K', 'company': 'ARS INTERIORS', 'sponsor_type': 'BNI_MEMBERS'},
-            {'name': 'KANNAN G', 'company': 'MR. GK CAR ACCESSORIES', 'sponsor_type': 'BNI_MEMBERS'},
-            {'name': 'MOHAMED NAZAR S', 'company': 'REGIM DENTAL CARE', 'sponsor_type': 'BNI_MEMBERS'},
-        ]
+        importer = MemberImporter(
+            chapter=options['chapter'],
+            chunk_size=options['chunk_size'],
+            dry_run=options['dry_run'],
+        )
 
-        created_count = 0
-        updated_count = 0
-        
-        # Process Chettinad members
-        for member_data in chettinad_members:
-            ticket_limit = Registration.get_sponsor_ticket_limit(member_data['sponsor_type'])
-            
-            member, created = BNIMember.objects.update_or_create(
-                name=member_data['name'],
-                chapter='BNI_CHETTINAD',
-                defaults={
-                    'company': member_data['company'],
-                    'sponsor_type': member_data['sponsor_type'],
-                    'ticket_limit': ticket_limit,
-                    'is_active': True
-                }
-            )
-            if created:
-                created_count += 1
-            else:
-                updated_count += 1
+        self.stdout.write('=' * 80)
+        self.stdout.write('IMPORT BNI MEMBERS' + (' (DRY RUN)' if options['dry_run'] else ''))
+        self.stdout.write('=' * 80)
 
-        # Process Thalaivas members
-        for member_data in thalaivas_members:
-            ticket_limit = Registration.get_sponsor_ticket_limit(member_data['sponsor_type'])
-            
-            member, created = BNIMember.objects.update_or_create(
-                name=member_data['name'],
-                chapter='BNI_THALAIVAS',
-                defaults={
-                    'company': member_data['company'],
-                    'sponsor_type': member_data['sponsor_type'],
-                    'ticket_limit': ticket_limit,
-                    'is_active': True
-                }
-            )
-            if created:
-                created_count += 1
-            else:
-                updated_count += 1
+        for path in files:
+            self.stdout.write(f'Reading {path}')
+            try:
+                # Row 1 is the header
+                importer.run(read_roster(path, options['sheet']), start=2)
+            except (ValueError, KeyError, OSError) as e:
+                raise CommandError(f'Could not read {path}: {e}')
 
-        self.stdout.write(self.style.SUCCESS(f'Successfully imported members:'))
-        self.stdout.write(self.style.SUCCESS(f'  - Created: {created_count}'))
-        self.stdout.write(self.style.SUCCESS(f'  - Updated: {updated_count}'))
-        self.stdout.write(self.style.SUCCESS(f'  - Total: {created_count + updated_count}'))
+        if options['deactivate_missing']:
+            importer.deactivate_missing()
+
+        summary = importer.summary()
+        self._print_diff(summary)
+
+        self.stdout.write('\n' + '=' * 80)
+        self.stdout.write(self.style.SUCCESS(f"Rows read: {summary['rows']}"))
+        self.stdout.write(self.style.SUCCESS(f"  - Created: {summary['created']}"))
+        self.stdout.write(self.style.SUCCESS(f"  - Updated: {summary['updated']}"))
+        self.stdout.write(self.style.SUCCESS(f"  - Unchanged: {summary['unchanged']}"))
+        if options['deactivate_missing']:
+            self.stdout.write(self.style.SUCCESS(f"  - Deactivated: {len(summary['deactivated'])}"))
+        if summary['duplicates']:
+            self.stdout.write(self.style.WARNING(f"  - Duplicate rows: {len(summary['duplicates'])}"))
+        if summary['errors']:
+            self.stdout.write(self.style.ERROR(f"  - Skipped rows: {len(summary['errors'])}"))
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING('Dry run - nothing was written'))
+
+    def _print_diff(self, summary):
+        for entry in summary['diff']:
+            if entry['action'] == 'created':
+                self.stdout.write(self.style.SUCCESS(f"+ {entry['name']} ({entry['chapter']})"))
+            else:
+                changes = ', '.join(f'{field}: {old} -> {new}' for field, (old, new) in entry['changes'].items())
+                self.stdout.write(f"~ {entry['name']} ({entry['chapter']}): {changes}")
+        for name in summary['deactivated']:
+            self.stdout.write(self.style.WARNING(f'- {name}'))
+        for message in summary['duplicates']:
+            self.stdout.write(self.style.WARNING(message))
+        for message in summary['errors']:
+            self.stdout.write(self.style.ERROR(message))
@@ -0,0 +1,107 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+from registrations.analytics import compute_payment_reconciliation, payment_report_section, PAYMENT_REPORT_SECTIONS
+from registrations.exports import csv_lines, jsonl_lines, xlsx_chunks
+
+
+class Command(BaseCommand):
+    help = 'Payment reconciliation: totals per category, gateway vs manual, bulk pricing mismatches and stale PENDING rows'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--pending-hours',
+            type=int,
+            default=24,
+            help='PENDING registrations older than this many hours are reported as stale (default: 24)'
+        )
+        parser.add_argument('--date-from', type=str, help='First registration date (YYYY-MM-DD)')
+        parser.add_argument('--date-to', type=str, help='Last registration date (YYYY-MM-DD)')
+        parser.add_argument(
+            '--export',
+            choices=PAYMENT_REPORT_SECTIONS,
+            help='Write one section to --output instead of printing the summary'
+        )
+        parser.add_argument('--output', type=str, help='File for --export (.csv, .jsonl or .xlsx)')
+
+    def handle(self, *args, **options):
+        date_from = self._parse_date(options['date_from'], '--date-from')
+        date_to = self._parse_date(options['date_to'], '--date-to')
+        pending_hours = options['pending_hours']
+
+        if options['export']:
+            self._export(options['export'], options['output'], pending_hours, date_from, date_to)
+            return
+
+        report = compute_payment_reconciliation(pending_hours, date_from, date_to, stale_limit=20)
+        totals = report['totals']
+
+        self.stdout.write('=' * 80)
+        self.stdout.write('PAYMENT RECONCILIATION')
+        self.stdout.write('=' * 80)
+        self.stdout.write(
+            f"Registrations: {totals['registrations']} "
+            f"(success {totals['success_count']}, pending {totals['pending_count']}, failed {totals['failed_count']})"
+        )
+        self.stdout.write(f"Confirmed: ₹{totals['confirmed_amount']:.2f}   Pending: ₹{totals['pending_amount']:.2f}")
+        self.stdout.write(
+            f"Gateway verified: {totals['gateway_verified_count']} (₹{totals['gateway_verified_amount']:.2f})   "
+            f"Manual: {totals['manual_count']} (₹{totals['manual_amount']:.2f})"
+        )
+
+        self.stdout.write('\n' + '-' * 80)
+        self.stdout.write(f"{'Category':<16}{'Regs':>6}{'Success':>9}{'Pending':>9}{'Confirmed ₹':>14}{'Gateway ₹':>12}{'Manual ₹':>12}")
+        for row in report['by_category']:
+            self.stdout.write(
+                f"{row['category']:<16}{row['registrations']:>6}{row['success_count']:>9}{row['pending_count']:>9}"
+                f"{row['confirmed_amount']:>14.2f}{row['gateway_verified_amount']:>12.2f}{row['manual_amount']:>12.2f}"
+            )
+
+        self.stdout.write('\n' + '-' * 80)
+        mismatches = report['bulk_mismatches']
+        if mismatches:
+            self.stdout.write(self.style.WARNING(f'Bulk groups not matching per-person pricing: {len(mismatches)}'))
+            for row in mismatches:
+                self.stdout.write(
+                    f"   {row['booking_group_id']} {row['primary_ticket_no']} {row['category']}: "
+                    f"{row['attendees']} x per-person = ₹{row['expected']:.2f}, paid ₹{row['paid']:.2f} ({row['difference']:+.2f})"
+                )
+        else:
+            self.stdout.write(self.style.SUCCESS('All paid bulk groups match per-person pricing'))
+
+        self.stdout.write('\n' + '-' * 80)
+        stale = report['stale_pending']
+        if stale['count']:
+            self.stdout.write(self.style.WARNING(
+                f"PENDING for more than {pending_hours}h: {stale['count']} registrations (₹{stale['amount']:.2f}), "
+                f"oldest {stale['oldest']}"
+            ))
+            for row in stale['rows']:
+                self.stdout.write(f"   {row['ticket_no']} {row['name']} {row['registration_for']} ₹{row['amount']:.2f} {row['created_at']}")
+            if stale['count'] > len(stale['rows']):
+                self.stdout.write(f"   ... use --export stale_pending for all {stale['count']}")
+        else:
+            self.stdout.write(self.style.SUCCESS(f'No PENDING registrations older than {pending_hours}h'))
+
+    def _parse_date(self, value, option):
+        if not value:
+            return None
+        parsed = parse_date(value)
+        if parsed is None:
+            raise CommandError(f'{option} must be YYYY-MM-DD')
+        return parsed
+
+    def _export(self, section, output, pending_hours, date_from, date_to):
+        if not output:
+            raise CommandError('--output is required with --export')
+
+        header, rows = payment_report_section(section, pending_hours, date_from, date_to)
+        if output.endswith('.xlsx'):
+            with open(output, 'wb') as target:
+                for chunk in xlsx_chunks(header, rows):
+                    target.write(chunk)
+        else:
+            lines = jsonl_lines(header, rows) if output.endswith('.jsonl') else csv_lines(header, rows)
+            with open(output, 'w', newline='', encoding='utf-8') as target:
+                target.writelines(lines)
+
+        self.stdout.write(self.style.SUCCESS(f'Wrote {section} to {output}'))
@@ -0,0 +1,49 @@
+from django.apps import apps
+from django.core.management.base import BaseCommand
+from registrations.image_uploads import IMAGE_VARIANTS, needs_processing, process_instance_image
+
+
+class Command(BaseCommand):
+    help = 'Strip metadata from uploaded ID cards and logos and create their JPEG/WebP variants'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='Reprocess images that already have variants')
+        parser.add_argument('--dry-run', action='store_true', help='List the images that would be processed')
+
+    def handle(self, *args, **options):
+        self.stdout.write('=' * 80)
+        self.stdout.write('PROCESS UPLOADED IMAGES' + (' (DRY RUN)' if options['dry_run'] else ''))
+        self.stdout.write('=' * 80)
+
+        processed = skipped = failed = 0
+        for (model_label, field_name), sizes in IMAGE_VARIANTS.items():
+            model = apps.get_model(model_label)
+            instances = model.objects.exclude(**{field_name: ''}).exclude(**{f'{field_name}__isnull': True})
+            for instance in instances.only(field_name, f'{field_name}_variants').iterator():
+                if not options['all'] and not needs_processing(instance, field_name):
+                    skipped += 1
+                    continue
+                name = getattr(instance, field_name).name
+                if options['dry_run']:
+                    self.stdout.write(f'{model_label} {instance.pk}: {name}')
+                    processed += 1
+                    continue
+                try:
+                    variants = process_instance_image(model_label, instance.pk, field_name)
+                except Exception as e:
+                    self.stdout.write(self.style.ERROR(f'{model_label} {instance.pk}: {name} - {e}'))
+                    failed += 1
+                    continue
+                if variants is None:
+                    skipped += 1
+                    continue
+                self.stdout.write(f"{model_label} {instance.pk}: {name} ({variants['bytes']} bytes)")
+                processed += 1
+
+        self.stdout.write('\n' + '=' * 80)
+        self.stdout.write(self.style.SUCCESS(f'Processed: {processed}'))
+        self.stdout.write(self.style.SUCCESS(f'Already processed: {skipped}'))
+        if failed:
+            self.stdout.write(self.style.ERROR(f'Failed: {failed}'))
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING('Dry run - nothing was written'))
@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from registrations.models import BookingGroup
+
+
+class Command(BaseCommand):
+    help = 'Recompute every BookingGroup summary from its member registrations'
+
+    def handle(self, *args, **options):
+        count = BookingGroup.rebuild_all()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {count} booking groups'))
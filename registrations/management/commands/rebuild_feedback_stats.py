@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from registrations.models import FeedbackStats
+from registrations.analytics import invalidate_feedback_stats
+
+
+class Command(BaseCommand):
+    help = 'Recompute the per-category FeedbackStats totals from EventFeedback'
+
+    def handle(self, *args, **options):
+        categories = FeedbackStats.rebuild()
+        invalidate_feedback_stats()
+
+        self.stdout.write('=' * 80)
+        for stats in FeedbackStats.objects.all():
+            average = round(stats.overall_sum / stats.total, 2) if stats.total else 0
+            self.stdout.write(f'{stats.category:<20} {stats.total:>6} responses   avg {average}')
+        self.stdout.write('=' * 80)
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt feedback stats for {categories} categories'))
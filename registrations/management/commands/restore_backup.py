@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand, CommandError
+from registrations.backup import restore_backup
+import os
+
+
+class Command(BaseCommand):
+    help = 'Restore a gzipped JSON Lines backup written by backup_database or the admin backup view'
+
+    def add_arguments(self, parser):
+        parser.add_argument('backup_file', type=str, help='Path to the .jsonl.gz backup')
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Rows inserted per bulk upsert (default: 1000)'
+        )
+
+    def handle(self, *args, **options):
+        path = options['backup_file']
+        if not os.path.exists(path):
+            raise CommandError(f'Backup file not found: {path}')
+        if options['batch_size'] <= 0:
+            raise CommandError('--batch-size must be positive')
+
+        self.stdout.write('=' * 80)
+        self.stdout.write(f'Restoring {path}')
+        self.stdout.write('=' * 80)
+
+        counts = restore_backup(path, batch_size=options['batch_size'])
+
+        for label, count in counts.items():
+            self.stdout.write(f'   {label}: {count}')
+        self.stdout.write(self.style.SUCCESS(f'Restored {sum(counts.values())} objects'))
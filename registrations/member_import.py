@@ -0,0 +1,350 @@
+"""
+Streaming BNI member roster import (CSV / XLSX files and API payloads)
+
+Rows are validated and upserted chunk by chunk; only the existing members of
+the chapters being imported (needed to match names) and the diff are held
+in memory, so rosters of any size can be imported
+"""
+from django.db import transaction
+from django.utils import timezone
+from xml.etree.ElementTree import iterparse
+from .models import BNIMember, Registration, SponsorTicketLimit
+import csv
+import posixpath
+import re
+import zipfile
+
+ROSTER_FORMATS = ('csv', 'xlsx')
+
+# Accepted column headings (after _header_key) for each roster field
+HEADER_ALIASES = {
+    'name': 'name',
+    'member': 'name',
+    'member_name': 'name',
+    'company': 'company',
+    'company_name': 'company',
+    'business': 'company',
+    'sponsor_type': 'sponsor_type',
+    'sponsortype': 'sponsor_type',
+    'sponsor': 'sponsor_type',
+    'chapter': 'chapter',
+}
+
+UPSERT_FIELDS = ['company', 'sponsor_type', 'ticket_limit', 'is_active']
+
+_SHEET_NS = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+_REL_NS = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+_PACKAGE_REL_NS = '{http://schemas.openxmlformats.org/package/2006/relationships}'
+
+
+def _header_key(value):
+    return re.sub(r'[^a-z0-9]+', '_', str(value or '').strip().lower()).strip('_')
+
+
+def _choice_key(value):
+    return re.sub(r'[^A-Z0-9]+', '_', str(value or '').strip().upper()).strip('_')
+
+
+def clean_name(name):
+    """Name as stored: surrounding and repeated whitespace removed"""
+    return ' '.join(str(name or '').split())
+
+
+def normalize_name(name):
+    """Key used to match members: case, dots and spacing are ignored"""
+    return ' '.join(str(name or '').replace('.', ' ').split()).casefold()
+
+
+def read_csv_rows(path):
+    """Yield one dict per CSV data row (header row first, UTF-8 with or without BOM)"""
+    with open(path, newline='', encoding='utf-8-sig') as roster:
+        yield from csv.DictReader(roster)
+
+
+def _shared_strings(workbook):
+    try:
+        stream = workbook.open('xl/sharedStrings.xml')
+    except KeyError:
+        return []
+    strings = []
+    with stream:
+        for _, element in iterparse(stream):
+            if element.tag == _SHEET_NS + 'si':
+                strings.append(''.join(text.text or '' for text in element.iter(_SHEET_NS + 't')))
+                element.clear()
+    return strings
+
+
+def _sheet_path(workbook, sheet_name=None):
+    """Zip path of the named worksheet (the first sheet when no name is given)"""
+    with workbook.open('xl/_rels/workbook.xml.rels') as stream:
+        targets = {
+            element.get('Id'): element.get('Target')
+            for _, element in iterparse(stream)
+            if element.tag == _PACKAGE_REL_NS + 'Relationship'
+        }
+    with workbook.open('xl/workbook.xml') as stream:
+        sheets = [
+            (element.get('name'), element.get(_REL_NS + 'id'))
+            for _, element in iterparse(stream)
+            if element.tag == _SHEET_NS + 'sheet'
+        ]
+
+    for name, rel_id in sheets:
+        if sheet_name is None or name == sheet_name:
+            target = targets[rel_id]
+            return target.lstrip('/') if target.startswith('/') else posixpath.join('xl', target)
+    raise ValueError(f'Sheet {sheet_name} not found (sheets: {", ".join(name for name, _ in sheets)})')
+
+
+def _column_index(reference):
+    index = 0
+    for letter in reference:
+        if not letter.isalpha():
+            break
+        index = index * 26 + ord(letter.upper()) - 64
+    return index - 1
+
+
+def _cell_value(cell, shared):
+    kind = cell.get('t')
+    if kind == 'inlineStr':
+        return ''.join(text.text or '' for text in cell.iter(_SHEET_NS + 't'))
+    value = cell.findtext(_SHEET_NS + 'v')
+    if value is None:
+        return ''
+    if kind == 's':
+        return shared[int(value)]
+    if kind == 'b':
+        return value == '1'
+    if kind is None and value.endswith('.0'):
+        return value[:-2]  # whole numbers (mobile numbers etc.) without the float suffix
+    return value
+
+
+def read_xlsx_rows(path, sheet_name=None):
+    """
+    Yield one dict per data row of an XLSX worksheet (first row is the header)
+    The sheet XML is parsed incrementally and each row is dropped once read
+    """
+    with zipfile.ZipFile(path) as workbook:
+        shared = _shared_strings(workbook)
+        with workbook.open(_sheet_path(workbook, sheet_name)) as stream:
+            header = None
+            sheet_data = None
+            for event, element in iterparse(stream, events=('start', 'end')):
+                if event == 'start':
+                    if element.tag == _SHEET_NS + 'sheetData':
+                        sheet_data = element
+                    continue
+                if element.tag != _SHEET_NS + 'row':
+                    continue
+
+                values = {}
+                for position, cell in enumerate(element.iter(_SHEET_NS + 'c')):
+                    reference = cell.get('r')
+                    values[_column_index(reference) if reference else position] = _cell_value(cell, shared)
+                sheet_data.remove(element)
+
+                row = [values.get(index, '') for index in range(max(values) + 1)] if values else []
+                if header is None:
+                    header = row
+                elif any(value not in ('', None) for value in row):
+                    yield dict(zip(header, row))
+
+
+def read_roster(path, sheet_name=None):
+    """Rows of a .csv or .xlsx roster file"""
+    extension = path.rsplit('.', 1)[-1].lower()
+    if extension == 'xlsx':
+        return read_xlsx_rows(path, sheet_name)
+    if extension == 'csv':
+        return read_csv_rows(path)
+    raise ValueError(f'Unsupported roster file {path} (expected {" or ".join(ROSTER_FORMATS)})')
+
+
+class MemberImporter:
+    """
+    Validates, deduplicates and upserts member rows one chunk at a time
+
+    Rows are matched to existing members by normalize_name() within their
+    chapter, so a roster that changes a name's case or spacing updates the
+    member instead of creating a second one. A member repeated in the input
+    keeps its last row. Each chunk is written with one
+    INSERT ... ON CONFLICT (name, chapter) DO UPDATE in its own transaction;
+    unchanged members are not written at all.
+    """
+
+    def __init__(self, chapter=None, chunk_size=500, dry_run=False):
+        """
+        Args:
+            chapter: chapter for rows without a chapter column
+            chunk_size: rows validated and written per transaction
+            dry_run: work out the diff without writing anything
+        """
+        self.default_chapter = chapter
+        self.chunk_size = chunk_size
+        self.dry_run = dry_run
+        self.rows = 0
+        self.errors = []
+        self.duplicates = []
+        self.deactivated = []
+        self._limits = SponsorTicketLimit.limits()
+        self._chapters = {code for code, _ in BNIMember.CHAPTER_CHOICES}
+        self._sponsor_types = {code for code, _ in Registration.SPONSOR_TYPE_CHOICES}
+        self._sponsor_labels = {_choice_key(label): code for code, label in Registration.SPONSOR_TYPE_CHOICES}
+        self._name_length = BNIMember._meta.get_field('name').max_length
+        self._company_length = BNIMember._meta.get_field('company').max_length
+        self._existing = {}  # chapter -> {normalized name: member values}
+        self._seen = {}  # (chapter, normalized name) -> first row number
+        self._diff = {}  # (chapter, normalized name) -> diff entry
+
+    def run(self, rows, start=1):
+        """
+        Import an iterable of row dicts
+        start: number reported for the first row in error messages
+
+        Returns: summary()
+        """
+        chunk = []
+        for number, row in enumerate(rows, start=start):
+            self.rows += 1
+            chunk.append((number, row))
+            if len(chunk) >= self.chunk_size:
+                self._apply(chunk)
+                chunk = []
+        if chunk:
+            self._apply(chunk)
+        return self.summary()
+
+    def _field(self, row, field):
+        for key, value in row.items():
+            if HEADER_ALIASES.get(_header_key(key)) == field and value not in (None, ''):
+                return str(value).strip()
+        return ''
+
+    def _validate(self, number, row):
+        """Cleaned member values, or None after recording why the row was skipped"""
+        name = clean_name(self._field(row, 'name'))
+        company = clean_name(self._field(row, 'company'))
+        chapter = _choice_key(self._field(row, 'chapter')) or self.default_chapter
+        sponsor_type = _choice_key(self._field(row, 'sponsor_type')) or 'BNI_MEMBERS'
+        sponsor_type = self._sponsor_labels.get(sponsor_type, sponsor_type)
+
+        if not name or not company:
+            error = 'missing name or company'
+        elif chapter not in self._chapters:
+            error = f'unknown chapter {chapter}' if chapter else 'missing chapter'
+        elif sponsor_type not in self._sponsor_types:
+            error = f'unknown sponsor type {sponsor_type}'
+        elif len(name) > self._name_length or len(company) > self._company_length:
+            error = 'name or company too long'
+        else:
+            return {
+                'name': name,
+                'chapter': chapter,
+                'company': company,
+                'sponsor_type': sponsor_type,
+                'ticket_limit': self._limits.get(sponsor_type, 1),
+                'is_active': True,
+            }
+
+        self.errors.append(f"Row {number}: skipped, {error} - {name or dict(row)}")
+        return None
+
+    def _existing_members(self, chapter):
+        if chapter not in self._existing:
+            members = {}
+            for member in BNIMember.objects.filter(chapter=chapter).values('id', 'name', *UPSERT_FIELDS):
+                members.setdefault(normalize_name(member['name']), member)
+            self._existing[chapter] = members
+        return self._existing[chapter]
+
+    def _apply(self, chunk):
+        pending = {}
+        for number, row in chunk:
+            values = self._validate(number, row)
+            if values is None:
+                continue
+            key = (values['chapter'], normalize_name(values['name']))
+            if key in self._seen:
+                self.duplicates.append(
+                    f"Row {number}: {values['name']} repeats row {self._seen[key]}, the later row is used"
+                )
+            else:
+                self._seen[key] = number
+            pending[key] = values
+
+        writes = []
+        for key, values in pending.items():
+            chapter, normalized = key
+            existing = self._existing_members(chapter).get(normalized)
+            if existing is None:
+                action, changes = 'created', {}
+            else:
+                values['name'] = existing['name']  # update the stored row, not a respelt copy
+                changes = {
+                    field: (existing[field], values[field])
+                    for field in UPSERT_FIELDS if existing[field] != values[field]
+                }
+                action = 'updated' if changes else 'unchanged'
+
+            previous = self._diff.get(key)
+            if previous is not None and previous['action'] == 'created':
+                action = 'created'
+            elif previous is not None and previous['action'] == 'updated':
+                changes = {**previous['changes'], **changes}
+                action = 'updated'
+            self._diff[key] = {'action': action, 'name': values['name'], 'chapter': chapter, 'changes': changes}
+
+            if existing is None or changes:
+                writes.append(values)
+            if existing is None:
+                self._existing[chapter][normalized] = {'id': None, **values}
+            else:
+                existing.update(values)
+
+        if writes and not self.dry_run:
+            with transaction.atomic():
+                BNIMember.objects.bulk_create(
+                    [BNIMember(**values) for values in writes],
+                    update_conflicts=True,
+                    unique_fields=['name', 'chapter'],
+                    update_fields=UPSERT_FIELDS + ['updated_at'],
+                )
+
+    def deactivate_missing(self):
+        """
+        Mark active members of the imported chapters that were not in the
+        input as inactive (call after run)
+        Returns: list of deactivated member names
+        """
+        ids = []
+        for chapter, members in self._existing.items():
+            for normalized, member in members.items():
+                if member['is_active'] and (chapter, normalized) not in self._seen:
+                    member['is_active'] = False
+                    ids.append(member['id'])
+                    self.deactivated.append(f"{member['name']} ({chapter})")
+        if ids and not self.dry_run:
+            BNIMember.objects.filter(id__in=ids).update(is_active=False, updated_at=timezone.now())
+        return self.deactivated
+
+    def summary(self):
+        """
+        Returns:
+            dict: rows, created, updated, unchanged (counts), deactivated,
+            duplicates and errors (messages) and diff (created/updated
+            entries with their changed fields as (old, new) pairs)
+        """
+        counts = {'created': 0, 'updated': 0, 'unchanged': 0}
+        for entry in self._diff.values():
+            counts[entry['action']] += 1
+        return {
+            'rows': self.rows,
+            **counts,
+            'deactivated': self.deactivated,
+            'duplicates': self.duplicates,
+            'errors': self.errors,
+            'diff': [entry for entry in self._diff.values() if entry['action'] != 'unchanged'],
+        }
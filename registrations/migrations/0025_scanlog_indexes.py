@@ -0,0 +1,21 @@
+# Generated by Django 6.0.2 on 2026-10-19 17:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('registrations', '0024_simplify_eventfeedback'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='scanlog',
+            index=models.Index(fields=['ticket_no', 'action'], name='registratio_ticket__b0961c_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='scanlog',
+            index=models.Index(fields=['scanned_at'], name='registratio_scanned_6dcd53_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 6.0.2 on 2026-10-19 18:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('registrations', '0025_scanlog_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='otpverification',
+            index=models.Index(fields=['created_at'], name='registratio_created_dbdc49_idx'),
+        ),
+    ]
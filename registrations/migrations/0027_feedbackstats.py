@@ -0,0 +1,73 @@
+# Generated by Django 6.0.2 on 2026-10-19 19:05
+
+from django.db import migrations, models
+
+
+def backfill_feedback_stats(apps, schema_editor):
+    """Build the initial per-category totals from existing feedback"""
+    EventFeedback = apps.get_model('registrations', 'EventFeedback')
+    FeedbackStats = apps.get_model('registrations', 'FeedbackStats')
+
+    totals = {}
+    rows = EventFeedback.objects.order_by().values(
+        'registration__registration_for', 'overall_rating', 'speaker_rating', 'attend_future'
+    ).annotate(count=models.Count('id'))
+
+    for row in rows:
+        stats = totals.setdefault(row['registration__registration_for'] or 'UNKNOWN', {})
+        count = row['count']
+        fields = {
+            'total': count,
+            'overall_sum': count * row['overall_rating'],
+            'speaker_sum': count * row['speaker_rating'],
+            f"overall_{row['overall_rating']}": count,
+            f"speaker_{row['speaker_rating']}": count,
+        }
+        if row['attend_future'] in ('YES', 'MAYBE', 'NO'):
+            fields[f"join_{row['attend_future'].lower()}"] = count
+        for field, value in fields.items():
+            stats[field] = stats.get(field, 0) + value
+
+    FeedbackStats.objects.bulk_create([
+        FeedbackStats(category=category, **stats) for category, stats in totals.items()
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('registrations', '0026_otpverification_created_at_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeedbackStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('category', models.CharField(max_length=20, unique=True)),
+                ('total', models.IntegerField(default=0)),
+                ('overall_sum', models.IntegerField(default=0)),
+                ('speaker_sum', models.IntegerField(default=0)),
+                ('overall_1', models.IntegerField(default=0)),
+                ('overall_2', models.IntegerField(default=0)),
+                ('overall_3', models.IntegerField(default=0)),
+                ('overall_4', models.IntegerField(default=0)),
+                ('overall_5', models.IntegerField(default=0)),
+                ('speaker_1', models.IntegerField(default=0)),
+                ('speaker_2', models.IntegerField(default=0)),
+                ('speaker_3', models.IntegerField(default=0)),
+                ('speaker_4', models.IntegerField(default=0)),
+                ('speaker_5', models.IntegerField(default=0)),
+                ('join_yes', models.IntegerField(default=0)),
+                ('join_maybe', models.IntegerField(default=0)),
+                ('join_no', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Feedback Stats',
+                'verbose_name_plural': 'Feedback Stats',
+                'ordering': ['category'],
+            },
+        ),
+        migrations.RunPython(backfill_feedback_stats, migrations.RunPython.noop),
+    ]
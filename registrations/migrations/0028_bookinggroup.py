@@ -0,0 +1,92 @@
+# Generated by Django 6.0.2 on 2026-10-19 19:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_booking_groups(apps, schema_editor):
+    """Create one BookingGroup per existing booking_group_id"""
+    Registration = apps.get_model('registrations', 'Registration')
+    BookingGroup = apps.get_model('registrations', 'BookingGroup')
+
+    groups = {}
+    for reg in Registration.objects.filter(booking_group_id__isnull=False).order_by('created_at', 'id'):
+        groups.setdefault(reg.booking_group_id, []).append(reg)
+
+    booking_groups = []
+    for group_id, members in groups.items():
+        primaries = [r for r in members if r.is_primary_booker]
+        primary = primaries[0] if primaries else members[-1]
+        statuses = [r.payment_status for r in members]
+        if all(s == 'SUCCESS' for s in statuses):
+            payment_status = 'SUCCESS'
+        elif all(s == 'PENDING' for s in statuses):
+            payment_status = 'PENDING'
+        elif all(s == 'FAILED' for s in statuses):
+            payment_status = 'FAILED'
+        else:
+            payment_status = 'MIXED'
+
+        paid_primaries = [r.amount for r in primaries if r.payment_id]
+        amount_sum = sum(r.amount for r in members)
+        categories = {}
+        for r in members:
+            categories[r.registration_for] = categories.get(r.registration_for, 0) + 1
+
+        booking_groups.append(BookingGroup(
+            booking_group_id=group_id,
+            primary_registration_id=primary.id,
+            primary_ticket_no=primary.ticket_no,
+            primary_booker_name=primary.primary_booker_name or primary.name,
+            primary_booker_email=primary.primary_booker_email or primary.email,
+            primary_booker_mobile=primary.primary_booker_mobile or primary.mobile_number,
+            total_attendees=len(members),
+            additional_count=sum(1 for r in members if not r.is_primary_booker),
+            success_count=statuses.count('SUCCESS'),
+            pending_count=statuses.count('PENDING'),
+            failed_count=statuses.count('FAILED'),
+            category_breakdown=categories,
+            amount_sum=amount_sum,
+            total_amount=max(paid_primaries) if paid_primaries else amount_sum,
+            payment_status=payment_status,
+            created_at=primaries[0].created_at if primaries else members[-1].created_at,
+        ))
+
+    BookingGroup.objects.bulk_create(booking_groups, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('registrations', '0027_feedbackstats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BookingGroup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('booking_group_id', models.CharField(max_length=50, unique=True)),
+                ('primary_ticket_no', models.CharField(blank=True, default='', max_length=20)),
+                ('primary_booker_name', models.CharField(blank=True, default='', max_length=200)),
+                ('primary_booker_email', models.EmailField(blank=True, max_length=254, null=True)),
+                ('primary_booker_mobile', models.CharField(blank=True, max_length=15, null=True)),
+                ('total_attendees', models.IntegerField(default=0)),
+                ('additional_count', models.IntegerField(default=0)),
+                ('success_count', models.IntegerField(default=0)),
+                ('pending_count', models.IntegerField(default=0)),
+                ('failed_count', models.IntegerField(default=0)),
+                ('category_breakdown', models.JSONField(blank=True, default=dict)),
+                ('amount_sum', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('total_amount', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('payment_status', models.CharField(choices=[('PENDING', 'Pending'), ('SUCCESS', 'Success'), ('FAILED', 'Failed'), ('MIXED', 'Mixed')], default='PENDING', max_length=10)),
+                ('created_at', models.DateTimeField(db_index=True, help_text='Creation time of the primary registration')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('primary_registration', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='registrations.registration')),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.RunPython(backfill_booking_groups, migrations.RunPython.noop),
+    ]
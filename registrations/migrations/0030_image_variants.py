@@ -0,0 +1,23 @@
+# Generated by Django 6.0.2 on 2026-10-19 20:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('registrations', '0029_deletedrecord'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='eventsettings',
+            name='logo_variants',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddField(
+            model_name='registration',
+            name='student_id_card_variants',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
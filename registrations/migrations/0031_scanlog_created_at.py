@@ -0,0 +1,19 @@
+# Generated by Django 6.0.2 on 2026-10-19 18:25
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('registrations', '0030_image_variants'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='scanlog',
+            name='created_at',
+            field=models.DateTimeField(db_index=True, default=django.utils.timezone.now, editable=False),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 6.0.2 on 2026-10-19 18:37
+
+import re
+from django.db import migrations, models
+
+GATE_NOTE_MARKER = re.compile(r'^(.*?) ?\[gate:[^\]]* #([0-9a-f]{32})\]$', re.DOTALL)
+
+
+def backfill_gate_scan_ids(apps, schema_editor):
+    """Move the '[gate:<node> #<scan id>]' marker that gate syncs appended to notes into gate_scan_id"""
+    ScanLog = apps.get_model('registrations', 'ScanLog')
+
+    logs = []
+    for log in ScanLog.objects.filter(scanned_by__startswith='gate:', notes__contains=' #').only('id', 'notes').iterator():
+        match = GATE_NOTE_MARKER.match(log.notes or '')
+        if match:
+            log.notes = match.group(1)
+            log.gate_scan_id = match.group(2)
+            logs.append(log)
+
+    ScanLog.objects.bulk_update(logs, ['notes', 'gate_scan_id'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('registrations', '0031_scanlog_created_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='scanlog',
+            name='gate_scan_id',
+            field=models.CharField(blank=True, editable=False, max_length=32, null=True, unique=True),
+        ),
+        migrations.RunPython(backfill_gate_scan_ids, migrations.RunPython.noop),
+    ]
@@ -1,12 +1,28 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models.functions import Coalesce
 from django.utils import timezone
 from datetime import timedelta
+from .config_cache import ticket_limits, template_urls
 import uuid
 import random
 
+
+def drive_file_id(url):
+    """File ID from a Google Drive share link (/file/d/<id>/... or ?id=<id>), else None"""
+    if not url or 'drive.google.com' not in url:
+        return None
+    # Extract file ID from various Google Drive URL formats
+    if '/file/d/' in url:
+        return url.split('/file/d/')[1].split('/')[0] or None
+    if 'id=' in url:
+        return url.split('id=')[1].split('&')[0] or None
+    return None
+
+
 class EventSettings(models.Model):
     """Singleton model for event settings like logo"""
     logo = models.ImageField(upload_to='event_logos/', blank=True, null=True)
+    logo_variants = models.JSONField(default=dict, blank=True)  # Downscaled JPEG/WebP copies (image_uploads)
     event_name = models.CharField(max_length=200, default='BNI Event')
 
     # Seat limit configuration
@@ -81,14 +97,8 @@ class IDCardTemplate(models.Model):
         if not self.template_url:
             return None
 
-        if 'drive.google.com' in self.template_url:
-            # Extract file ID from various Google Drive URL formats
-            if '/file/d/' in self.template_url:
-                file_id = self.template_url.split('/file/d/')[1].split('/')[0]
-            elif 'id=' in self.template_url:
-                file_id = self.template_url.split('id=')[1].split('&')[0]
-            else:
-                return self.template_url
+        file_id = drive_file_id(self.template_url)
+        if file_id:
             # Return direct download URL
             return f"https://drive.google.com/uc?export=download&id={file_id}"
         return self.template_url
@@ -124,18 +134,25 @@ class IDCardTemplate(models.Model):
             template_category = 'PUBLIC'
 
         # Try to get specific template, fallback to BNI_MEMBERS legacy if not found
-        try:
-            template = cls.objects.get(category=template_category, is_active=True)
-            return template.get_direct_image_url()
-        except cls.DoesNotExist:
-            # Fallback for BNI members if specific template not found
-            if template_category in ['BNI_MEMBERS_PRIMARY', 'BNI_MEMBERS_GUEST']:
-                try:
-                    template = cls.objects.get(category='BNI_MEMBERS', is_active=True)
-                    return template.get_direct_image_url()
-                except cls.DoesNotExist:
-                    pass
-            return None
+        urls = template_urls.get()
+        if template_category in urls:
+            return urls[template_category]
+        if template_category in ['BNI_MEMBERS_PRIMARY', 'BNI_MEMBERS_GUEST']:
+            return urls.get('BNI_MEMBERS')
+        return None
+
+    @classmethod
+    def load_template_urls(cls):
+        """Direct image URL of every active template by category (uncached; see config_cache)"""
+        return {
+            template.category: template.get_direct_image_url()
+            for template in cls.objects.filter(is_active=True)
+        }
+
+class RegistrationManager(models.Manager):
+    def get_by_natural_key(self, ticket_no):
+        return self.get(ticket_no=ticket_no)
+
 
 class Registration(models.Model):
     REGISTRATION_CHOICES = [
@@ -186,6 +203,7 @@ class Registration(models.Model):
     registration_for = models.CharField(max_length=20, choices=REGISTRATION_CHOICES)
     sponsor_type = models.CharField(max_length=20, choices=SPONSOR_TYPE_CHOICES, blank=True, null=True)
     student_id_card = models.ImageField(upload_to='student_id_cards/', blank=True, null=True)
+    student_id_card_variants = models.JSONField(default=dict, blank=True)  # Downscaled JPEG/WebP copies (image_uploads)
 
     # Payment fields
     payment_status = models.CharField(max_length=10, choices=PAYMENT_STATUS_CHOICES, default='PENDING')
@@ -213,6 +231,18 @@ class Registration(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = RegistrationManager()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Group the row was loaded with, so moving it out refreshes that group too
+        instance._loaded_booking_group_id = instance.__dict__.get('booking_group_id')
+        return instance
+
+    def natural_key(self):
+        return (self.ticket_no,)
+
     def save(self, *args, **kwargs):
         if not self.ticket_no:
             # Generate sequential ticket number from BNI001 to BNI541 with gap filling
@@ -461,6 +491,166 @@ class Registration(models.Model):
         )
 
 
+class BookingGroup(models.Model):
+    """
+    Denormalized summary of a bulk booking (one row per booking_group_id)
+    Refreshed from its member registrations whenever one of them is saved
+    or deleted; rebuild with the rebuild_booking_groups command
+    """
+    PAYMENT_STATUS_CHOICES = [
+        ('PENDING', 'Pending'),
+        ('SUCCESS', 'Success'),
+        ('FAILED', 'Failed'),
+        ('MIXED', 'Mixed'),
+    ]
+
+    # Per-person price used to check whether the primary paid for the whole group
+    PER_PERSON_PRICE = {
+        'PUBLIC': 300,
+        'STUDENTS': 150,
+    }
+
+    booking_group_id = models.CharField(max_length=50, unique=True)
+    primary_registration = models.ForeignKey(
+        Registration,
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True,
+        related_name='+'
+    )
+    primary_ticket_no = models.CharField(max_length=20, blank=True, default='')
+    primary_booker_name = models.CharField(max_length=200, blank=True, default='')
+    primary_booker_email = models.EmailField(blank=True, null=True)
+    primary_booker_mobile = models.CharField(max_length=15, blank=True, null=True)
+
+    # Member totals
+    total_attendees = models.IntegerField(default=0)
+    additional_count = models.IntegerField(default=0)
+    success_count = models.IntegerField(default=0)
+    pending_count = models.IntegerField(default=0)
+    failed_count = models.IntegerField(default=0)
+    category_breakdown = models.JSONField(default=dict, blank=True)
+
+    # Amounts: amount_sum is the sum over members; total_amount is what was
+    # actually received (the primary's gateway payment) or amount_sum if unpaid
+    amount_sum = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    total_amount = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    payment_status = models.CharField(max_length=10, choices=PAYMENT_STATUS_CHOICES, default='PENDING')
+
+    created_at = models.DateTimeField(db_index=True, help_text="Creation time of the primary registration")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.booking_group_id} - {self.primary_booker_name} ({self.total_attendees})"
+
+    @classmethod
+    def member_aggregates(cls):
+        """Aggregate expressions computing the summary fields from member registrations"""
+        primary_paid = models.Q(is_primary_booker=True, payment_id__isnull=False) & ~models.Q(payment_id='')
+        aggregates = {
+            'total_attendees': models.Count('id'),
+            'additional_count': models.Count('id', filter=models.Q(is_primary_booker=False)),
+            'success_count': models.Count('id', filter=models.Q(payment_status='SUCCESS')),
+            'pending_count': models.Count('id', filter=models.Q(payment_status='PENDING')),
+            'failed_count': models.Count('id', filter=models.Q(payment_status='FAILED')),
+            'amount_sum': models.Sum('amount'),
+            'primary_paid_amount': models.Max('amount', filter=primary_paid),
+            'primary_id': Coalesce(models.Min('id', filter=models.Q(is_primary_booker=True)), models.Max('id')),
+            'group_created_at': Coalesce(
+                models.Min('created_at', filter=models.Q(is_primary_booker=True)), models.Max('created_at')
+            ),
+        }
+        for code, _ in Registration.REGISTRATION_CHOICES:
+            aggregates[f'category_{code}'] = models.Count('id', filter=models.Q(registration_for=code))
+        return aggregates
+
+    @classmethod
+    def _fields_from_row(cls, row, primary):
+        """Model field values from one member_aggregates() row and the primary registration"""
+        total = row['total_attendees']
+        if row['success_count'] == total:
+            payment_status = 'SUCCESS'
+        elif row['pending_count'] == total:
+            payment_status = 'PENDING'
+        elif row['failed_count'] == total:
+            payment_status = 'FAILED'
+        else:
+            payment_status = 'MIXED'
+
+        amount_sum = row['amount_sum'] or 0
+        return {
+            'primary_registration': primary,
+            'primary_ticket_no': primary.ticket_no if primary else '',
+            'primary_booker_name': (primary.primary_booker_name or primary.name) if primary else '',
+            'primary_booker_email': (primary.primary_booker_email or primary.email) if primary else None,
+            'primary_booker_mobile': (primary.primary_booker_mobile or primary.mobile_number) if primary else None,
+            'total_attendees': total,
+            'additional_count': row['additional_count'],
+            'success_count': row['success_count'],
+            'pending_count': row['pending_count'],
+            'failed_count': row['failed_count'],
+            'category_breakdown': {
+                code: row[f'category_{code}']
+                for code, _ in Registration.REGISTRATION_CHOICES
+                if row[f'category_{code}']
+            },
+            'amount_sum': amount_sum,
+            'total_amount': row['primary_paid_amount'] if row['primary_paid_amount'] is not None else amount_sum,
+            'payment_status': payment_status,
+            'created_at': row['group_created_at'],
+        }
+
+    @classmethod
+    def refresh(cls, booking_group_id):
+        """
+        Recompute one group from its members (deletes the row if none are left)
+        Returns: the BookingGroup or None
+        """
+        row = Registration.objects.filter(
+            booking_group_id=booking_group_id
+        ).values('booking_group_id').annotate(**cls.member_aggregates()).order_by('booking_group_id').first()
+
+        if row is None:
+            cls.objects.filter(booking_group_id=booking_group_id).delete()
+            return None
+
+        primary = Registration.objects.filter(id=row['primary_id']).first()
+        group, _ = cls.objects.update_or_create(
+            booking_group_id=booking_group_id,
+            defaults=cls._fields_from_row(row, primary)
+        )
+        return group
+
+    @classmethod
+    @transaction.atomic
+    def rebuild_all(cls):
+        """
+        Recompute every group from Registration in one aggregate query
+        Returns: number of groups written
+        """
+        rows = list(
+            Registration.objects.filter(booking_group_id__isnull=False).order_by().values(
+                'booking_group_id'
+            ).annotate(**cls.member_aggregates())
+        )
+        primaries = Registration.objects.in_bulk([row['primary_id'] for row in rows])
+
+        cls.objects.all().delete()
+        cls.objects.bulk_create([
+            cls(booking_group_id=row['booking_group_id'], **cls._fields_from_row(row, primaries.get(row['primary_id'])))
+            for row in rows
+        ], batch_size=500)
+        return len(rows)
+
+    def expected_total(self):
+        """Amount the primary should have paid to cover every member of the group"""
+        category = self.primary_registration.registration_for if self.primary_registration else None
+        return self.total_attendees * self.PER_PERSON_PRICE.get(category, 0)
+
+
 class BNIMember(models.Model):
     """Pre-registered BNI members with fixed ticket allocations"""
     CHAPTER_CHOICES = [
@@ -505,6 +695,27 @@ class BNIMember(models.Model):
         """Get remaining ticket count"""
         return max(0, self.ticket_limit - self.get_registration_count())
 
+    @classmethod
+    def bulk_upsert(cls, chapter, members, batch_size=500):
+        """
+        Create or update members of one chapter in batches of
+        INSERT ... ON CONFLICT (name, chapter) DO UPDATE
+        (see member_import.MemberImporter; bulk_create skips save() and
+        post_save signals)
+
+        Args:
+            members: iterable of {'name', 'company', 'sponsor_type'} dicts;
+                names are matched ignoring case, dots and spacing and a
+                member repeated in the payload keeps its last entry
+
+        Returns:
+            dict: MemberImporter.summary() ('created', 'updated',
+            'unchanged', 'duplicates', 'errors', ...)
+        """
+        # Import here to avoid circular import
+        from .member_import import MemberImporter
+        return MemberImporter(chapter=chapter, chunk_size=batch_size).run(members)
+
 
 class ScanLog(models.Model):
     """Track all QR code scans and check-ins"""
@@ -519,14 +730,42 @@ class ScanLog(models.Model):
     action = models.CharField(max_length=20, choices=ACTION_CHOICES, default='SCAN_SUCCESS')
     scanned_at = models.DateTimeField(auto_now_add=True)
     scanned_by = models.CharField(max_length=100, blank=True, null=True)  # Admin username
+    # When the row was inserted - gate-node sync back-fills scanned_at with the
+    # original scan time, so incremental snapshots track new rows by this instead
+    created_at = models.DateTimeField(default=timezone.now, editable=False, db_index=True)
+    # scan_queue id of a scan pushed by a gate node (dedupes re-sent batches)
+    gate_scan_id = models.CharField(max_length=32, unique=True, blank=True, null=True, editable=False)
     notes = models.TextField(blank=True, null=True)
 
     class Meta:
         ordering = ['-scanned_at']
+        indexes = [
+            models.Index(fields=['ticket_no', 'action']),
+            models.Index(fields=['scanned_at']),
+        ]
 
     def __str__(self):
         return f"{self.ticket_no} - {self.action} at {self.scanned_at}"
 
+    @classmethod
+    def delete_in_chunks(cls, queryset=None, chunk_size=5000):
+        """
+        Delete scan logs in primary-key batches so no single statement
+        holds locks on the whole table during the event
+        Returns: total number of rows deleted
+        """
+        if queryset is None:
+            queryset = cls.objects.all()
+
+        total_deleted = 0
+        while True:
+            ids = list(queryset.order_by('id').values_list('id', flat=True)[:chunk_size])
+            if not ids:
+                break
+            deleted, _ = cls.objects.filter(id__in=ids).delete()
+            total_deleted += deleted
+        return total_deleted
+
 
 class OTPVerification(models.Model):
     """OTP verification for BNI member registration authentication"""
@@ -550,6 +789,7 @@ class OTPVerification(models.Model):
         indexes = [
             models.Index(fields=['mobile_number', 'is_verified']),
             models.Index(fields=['email', 'is_verified']),
+            models.Index(fields=['created_at']),
         ]
 
     def save(self, *args, **kwargs):
@@ -594,21 +834,36 @@ class OTPVerification(models.Model):
         )
 
     def verify(self, input_otp):
-        """Verify the OTP code"""
+        """Verify the OTP code (single write for the attempt and the result)"""
         self.attempts += 1
-        self.save()
 
         if not self.is_valid():
+            self.save(update_fields=['attempts'])
             return False, "OTP expired or maximum attempts exceeded"
 
         if self.otp_code == input_otp:
             self.is_verified = True
             self.verified_at = timezone.now()
-            self.save()
+            self.save(update_fields=['attempts', 'is_verified', 'verified_at'])
             return True, "OTP verified successfully"
 
+        self.save(update_fields=['attempts'])
         return False, f"Invalid OTP. {3 - self.attempts} attempts remaining"
 
+    @classmethod
+    def compactable(cls, keep_verified_days=30, now=None):
+        """
+        Rows that no longer serve any purpose:
+        - unverified OTPs older than the 15 minute rate-limit window (already
+          expired, and no longer counted by the rate limit)
+        - verified OTPs older than keep_verified_days (audit retention)
+        """
+        now = now or timezone.now()
+        return cls.objects.filter(
+            models.Q(is_verified=False, created_at__lt=now - timedelta(minutes=15)) |
+            models.Q(is_verified=True, created_at__lt=now - timedelta(days=keep_verified_days))
+        )
+
     def __str__(self):
         return f"OTP for {self.mobile_number} - {self.member_name}"
 
@@ -639,21 +894,30 @@ class SponsorTicketLimit(models.Model):
     def __str__(self):
         return f"{self.get_sponsor_type_display()} - {self.ticket_limit} tickets"
 
+    # Fallback limits when no active row exists for a sponsor type
+    DEFAULT_LIMITS = {
+        'TITLE_SPONSORS': 10,
+        'ASSOCIATE_SPONSORS': 6,
+        'CO_SPONSORS': 4,
+        'BNI_MEMBERS': 2,
+    }
+
     @classmethod
     def get_limit(cls, sponsor_type):
-        """Get ticket limit for a sponsor type"""
-        try:
-            limit_obj = cls.objects.get(sponsor_type=sponsor_type, is_active=True)
-            return limit_obj.ticket_limit
-        except cls.DoesNotExist:
-            # Fallback to default hardcoded limits
-            DEFAULTS = {
-                'TITLE_SPONSORS': 10,
-                'ASSOCIATE_SPONSORS': 6,
-                'CO_SPONSORS': 4,
-                'BNI_MEMBERS': 2,
-            }
-            return DEFAULTS.get(sponsor_type, 1)
+        """Get ticket limit for a sponsor type (from the in-process snapshot, see config_cache)"""
+        return ticket_limits.get().get(sponsor_type, 1)
+
+    @classmethod
+    def limits(cls):
+        """Ticket limit for every sponsor type (defaults filled in)"""
+        return dict(ticket_limits.get())
+
+    @classmethod
+    def load_limits(cls):
+        """Ticket limits from the active rows, falling back to DEFAULT_LIMITS (uncached)"""
+        limits = dict(cls.DEFAULT_LIMITS)
+        limits.update(cls.objects.filter(is_active=True).values_list('sponsor_type', 'ticket_limit'))
+        return limits
 
 
 class Sponsor(models.Model):
@@ -685,14 +949,8 @@ class Sponsor(models.Model):
 
     def get_direct_image_url(self):
         """Convert Google Drive share URL to direct image URL"""
-        if 'drive.google.com' in self.logo_url:
-            # Extract file ID from various Google Drive URL formats
-            if '/file/d/' in self.logo_url:
-                file_id = self.logo_url.split('/file/d/')[1].split('/')[0]
-            elif 'id=' in self.logo_url:
-                file_id = self.logo_url.split('id=')[1].split('&')[0]
-            else:
-                return self.logo_url
+        file_id = drive_file_id(self.logo_url)
+        if file_id:
             # Return thumbnail URL which works better for images
             return f"https://drive.google.com/thumbnail?id={file_id}&sz=w1000"
         return self.logo_url
@@ -756,6 +1014,137 @@ class EventFeedback(models.Model):
     def __str__(self):
         return f"Feedback from {self.registration.name} ({self.registration.ticket_no}) - {self.overall_rating}⭐"
 
+    def save(self, *args, **kwargs):
+        # Keep FeedbackStats in step with the row in the same transaction
+        with transaction.atomic():
+            previous = None
+            if self.pk:
+                previous = EventFeedback.objects.select_related('registration').filter(pk=self.pk).first()
+            super().save(*args, **kwargs)
+            if previous is not None:
+                FeedbackStats.apply(previous, -1)
+            FeedbackStats.apply(self, 1)
+
     def get_average_rating(self):
         """Calculate average of overall and speaker ratings"""
         return (self.overall_rating + self.speaker_rating) / 2
+
+
+class FeedbackStats(models.Model):
+    """
+    Running feedback totals per registration category
+    Maintained by EventFeedback.save() and the EventFeedback post_delete
+    signal; rebuild with the rebuild_feedback_stats command
+    """
+    category = models.CharField(max_length=20, unique=True)
+    total = models.IntegerField(default=0)
+    overall_sum = models.IntegerField(default=0)
+    speaker_sum = models.IntegerField(default=0)
+
+    # Rating histograms (1-5 stars)
+    overall_1 = models.IntegerField(default=0)
+    overall_2 = models.IntegerField(default=0)
+    overall_3 = models.IntegerField(default=0)
+    overall_4 = models.IntegerField(default=0)
+    overall_5 = models.IntegerField(default=0)
+    speaker_1 = models.IntegerField(default=0)
+    speaker_2 = models.IntegerField(default=0)
+    speaker_3 = models.IntegerField(default=0)
+    speaker_4 = models.IntegerField(default=0)
+    speaker_5 = models.IntegerField(default=0)
+
+    # Willingness to join BNI Chettinad
+    join_yes = models.IntegerField(default=0)
+    join_maybe = models.IntegerField(default=0)
+    join_no = models.IntegerField(default=0)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Feedback Stats'
+        verbose_name_plural = 'Feedback Stats'
+        ordering = ['category']
+
+    def __str__(self):
+        return f"{self.category}: {self.total} responses"
+
+    @staticmethod
+    def _deltas(overall_rating, speaker_rating, attend_future, sign):
+        """Column increments for one feedback row (sign is 1 or -1)"""
+        deltas = {
+            'total': sign,
+            'overall_sum': sign * overall_rating,
+            'speaker_sum': sign * speaker_rating,
+            f'overall_{overall_rating}': sign,
+            f'speaker_{speaker_rating}': sign,
+        }
+        join_field = f'join_{attend_future.lower()}'
+        if join_field in ('join_yes', 'join_maybe', 'join_no'):
+            deltas[join_field] = sign
+        return deltas
+
+    @classmethod
+    def _add(cls, category, deltas):
+        updates = {field: models.F(field) + delta for field, delta in deltas.items()}
+        updates['updated_at'] = timezone.now()
+
+        if not cls.objects.filter(category=category).update(**updates):
+            cls.objects.get_or_create(category=category)
+            cls.objects.filter(category=category).update(**updates)
+
+    @classmethod
+    def apply(cls, feedback, sign):
+        """Add (sign=1) or remove (sign=-1) one feedback row from its category totals"""
+        category = feedback.registration.registration_for or 'UNKNOWN'
+        cls._add(category, cls._deltas(feedback.overall_rating, feedback.speaker_rating, feedback.attend_future, sign))
+
+    @classmethod
+    def apply_many(cls, feedbacks):
+        """Add newly inserted feedback rows (e.g. from bulk_create) with one UPDATE per category"""
+        per_category = {}
+        for feedback in feedbacks:
+            category = feedback.registration.registration_for or 'UNKNOWN'
+            totals = per_category.setdefault(category, {})
+            for field, delta in cls._deltas(feedback.overall_rating, feedback.speaker_rating, feedback.attend_future, 1).items():
+                totals[field] = totals.get(field, 0) + delta
+
+        for category, deltas in per_category.items():
+            cls._add(category, deltas)
+
+    @classmethod
+    @transaction.atomic
+    def rebuild(cls):
+        """
+        Recompute every category from EventFeedback
+        Returns: number of category rows written
+        """
+        totals = {}
+        rows = EventFeedback.objects.order_by().values(
+            'registration__registration_for', 'overall_rating', 'speaker_rating', 'attend_future'
+        ).annotate(count=models.Count('id'))
+
+        for row in rows:
+            category = row['registration__registration_for'] or 'UNKNOWN'
+            stats = totals.setdefault(category, {})
+            for field, delta in cls._deltas(row['overall_rating'], row['speaker_rating'], row['attend_future'], row['count']).items():
+                stats[field] = stats.get(field, 0) + delta
+
+        cls.objects.all().delete()
+        cls.objects.bulk_create([cls(category=category, **stats) for category, stats in totals.items()])
+        return len(totals)
+
+
+class DeletedRecord(models.Model):
+    """
+    Tombstone for a deleted row of a model backed up incrementally, so the
+    next incremental snapshot can replay the delete (see registrations.backup)
+    """
+    model_label = models.CharField(max_length=100)
+    object_pk = models.CharField(max_length=64)
+    deleted_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        ordering = ['deleted_at']
+
+    def __str__(self):
+        return f"{self.model_label} #{self.object_pk} deleted {self.deleted_at}"
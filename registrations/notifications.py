@@ -0,0 +1,248 @@
+"""
+Notification providers and a background dispatcher for SMS/email delivery
+
+Providers are selected per channel with settings.NOTIFICATION_PROVIDERS
+(dotted paths). The dispatcher sends on a small thread pool so requests do
+not wait on SMTP or an SMS gateway, retries failed sends with backoff and
+keeps per-provider latency/failure counters.
+"""
+from concurrent.futures import Future, ThreadPoolExecutor
+from django.conf import settings
+from django.core.mail import EmailMessage
+from django.db import close_old_connections
+from django.utils.module_loading import import_string
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PROVIDERS = {
+    'sms': 'registrations.notifications.ConsoleSMSProvider',
+    'email': 'registrations.notifications.DjangoEmailProvider',
+}
+
+
+class NotificationError(Exception):
+    """Raised by a provider when a message could not be delivered"""
+
+
+class BaseProvider:
+    """Interface for a delivery provider; send() raises on failure"""
+    name = 'base'
+
+    def send(self, recipient, message, subject=None):
+        raise NotImplementedError
+
+
+class ConsoleSMSProvider(BaseProvider):
+    """Development provider: logs the SMS instead of sending it"""
+    name = 'console'
+
+    def send(self, recipient, message, subject=None):
+        logger.info(f"SMS to {recipient}: {message}")
+        print(f"\n{'='*60}")
+        print(f"SMS SIMULATION - DEVELOPMENT MODE")
+        print(f"To: {recipient}")
+        print(f"Message: {message}")
+        print(f"{'='*60}\n")
+
+
+class TwilioSMSProvider(BaseProvider):
+    """Twilio (needs the twilio package and TWILIO_* settings)"""
+    name = 'twilio'
+
+    def send(self, recipient, message, subject=None):
+        from twilio.rest import Client
+        client = Client(settings.TWILIO_ACCOUNT_SID, settings.TWILIO_AUTH_TOKEN)
+        client.messages.create(body=message, from_=settings.TWILIO_PHONE_NUMBER, to=recipient)
+
+
+class SNSSMSProvider(BaseProvider):
+    """AWS SNS (needs boto3 and AWS_SNS_REGION)"""
+    name = 'sns'
+
+    def send(self, recipient, message, subject=None):
+        import boto3
+        sns = boto3.client('sns', region_name=settings.AWS_SNS_REGION)
+        sns.publish(PhoneNumber=recipient, Message=message)
+
+
+class MSG91SMSProvider(BaseProvider):
+    """MSG91 (needs requests and MSG91_* settings)"""
+    name = 'msg91'
+
+    def send(self, recipient, message, subject=None):
+        import requests
+        response = requests.post('https://api.msg91.com/api/v5/otp', json={
+            'template_id': settings.MSG91_TEMPLATE_ID,
+            'mobile': recipient,
+            'authkey': settings.MSG91_AUTH_KEY,
+            'otp': message,
+        }, timeout=10)
+        if response.status_code != 200:
+            raise NotificationError(f"SMS failed: {response.text}")
+
+
+class DjangoEmailProvider(BaseProvider):
+    """Sends through the configured Django EMAIL_BACKEND (SMTP in production)"""
+    name = 'smtp'
+
+    def send(self, recipient, message, subject=None):
+        EmailMessage(
+            subject=subject or '',
+            body=message,
+            from_email=settings.DEFAULT_FROM_EMAIL,
+            to=[recipient],
+        ).send(fail_silently=False)
+
+
+class FakeProvider(BaseProvider):
+    """
+    In-memory provider for tests: records messages in outbox
+    Set fail_times to make the next N sends raise NotificationError
+    """
+    name = 'fake'
+
+    def __init__(self):
+        self.outbox = []
+        self.fail_times = 0
+        self._lock = threading.Lock()
+
+    def send(self, recipient, message, subject=None):
+        with self._lock:
+            if self.fail_times > 0:
+                self.fail_times -= 1
+                raise NotificationError('Simulated provider failure')
+            self.outbox.append({'recipient': recipient, 'subject': subject, 'message': message})
+
+
+_providers = {}
+_providers_lock = threading.Lock()
+
+
+def get_provider(channel):
+    """Return the provider instance configured for a channel ('sms' or 'email')"""
+    with _providers_lock:
+        if channel not in _providers:
+            configured = getattr(settings, 'NOTIFICATION_PROVIDERS', {})
+            path = configured.get(channel, DEFAULT_PROVIDERS[channel])
+            _providers[channel] = import_string(path)()
+        return _providers[channel]
+
+
+def reset_providers():
+    """Drop cached provider instances (after changing NOTIFICATION_PROVIDERS)"""
+    with _providers_lock:
+        _providers.clear()
+
+
+class NotificationDispatcher:
+    """
+    Delivers notifications on a bounded thread pool with retries
+    Metrics are kept per provider name for this process
+    """
+
+    def __init__(self, max_workers=4, max_retries=3, retry_delay=1.0, run_async=True):
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.run_async = run_async
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='notify') if run_async else None
+        self._metrics = {}
+        self._metrics_lock = threading.Lock()
+
+    def submit(self, channel, recipient, message, subject=None):
+        """
+        Queue a notification for delivery
+        Returns: Future resolving to (success: bool, message: str)
+        """
+        if self._executor is None:
+            future = Future()
+            future.set_result(self._deliver(channel, recipient, message, subject))
+            return future
+        return self._executor.submit(self._deliver, channel, recipient, message, subject)
+
+    def send_now(self, channel, recipient, message, subject=None):
+        """Deliver synchronously (with retries) and return (success, message)"""
+        return self._deliver(channel, recipient, message, subject)
+
+    def _deliver(self, channel, recipient, message, subject):
+        provider = get_provider(channel)
+        error = None
+        try:
+            for attempt in range(1, self.max_retries + 1):
+                start = time.monotonic()
+                try:
+                    provider.send(recipient, message, subject=subject)
+                except Exception as e:
+                    error = e
+                    self._record(provider.name, time.monotonic() - start, ok=False, retry=attempt < self.max_retries)
+                    logger.warning(f"{provider.name} send to {recipient} failed (attempt {attempt}/{self.max_retries}): {str(e)}")
+                    if attempt < self.max_retries:
+                        time.sleep(self.retry_delay * 2 ** (attempt - 1))
+                    continue
+                self._record(provider.name, time.monotonic() - start, ok=True)
+                return True, f"{channel} sent via {provider.name}"
+        finally:
+            if self._executor is not None:
+                close_old_connections()
+
+        logger.error(f"Giving up on {channel} to {recipient} via {provider.name}: {str(error)}")
+        return False, f"Failed to send {channel}: {str(error)}"
+
+    def _record(self, provider_name, elapsed, ok, retry=False):
+        with self._metrics_lock:
+            stats = self._metrics.setdefault(provider_name, {
+                'sent': 0, 'failed': 0, 'retries': 0, 'total_ms': 0.0, 'max_ms': 0.0,
+            })
+            elapsed_ms = elapsed * 1000
+            stats['sent' if ok else 'failed'] += 1
+            stats['retries'] += 1 if retry else 0
+            stats['total_ms'] += elapsed_ms
+            stats['max_ms'] = max(stats['max_ms'], elapsed_ms)
+
+    def metrics(self):
+        """Per-provider counters: sent, failed (attempts), retries, avg_ms, max_ms"""
+        with self._metrics_lock:
+            result = {}
+            for name, stats in self._metrics.items():
+                attempts = stats['sent'] + stats['failed']
+                result[name] = {
+                    'sent': stats['sent'],
+                    'failed': stats['failed'],
+                    'retries': stats['retries'],
+                    'avg_ms': round(stats['total_ms'] / attempts, 2) if attempts else 0,
+                    'max_ms': round(stats['max_ms'], 2),
+                }
+            return result
+
+    def shutdown(self, wait=True):
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+
+
+_dispatcher = None
+_dispatcher_lock = threading.Lock()
+
+
+def get_dispatcher():
+    """Return the process-wide dispatcher built from NOTIFICATION_* settings"""
+    global _dispatcher
+    with _dispatcher_lock:
+        if _dispatcher is None:
+            _dispatcher = NotificationDispatcher(
+                max_workers=getattr(settings, 'NOTIFICATION_WORKERS', 4),
+                max_retries=getattr(settings, 'NOTIFICATION_MAX_RETRIES', 3),
+                retry_delay=getattr(settings, 'NOTIFICATION_RETRY_DELAY', 1.0),
+                run_async=getattr(settings, 'NOTIFICATION_ASYNC', True),
+            )
+        return _dispatcher
+
+
+def reset_dispatcher():
+    """Shut down and drop the process-wide dispatcher (after changing NOTIFICATION_* settings)"""
+    global _dispatcher
+    with _dispatcher_lock:
+        if _dispatcher is not None:
+            _dispatcher.shutdown()
+        _dispatcher = None
@@ -0,0 +1,247 @@
+"""
+Pluggable OTP storage and rate limiting backends
+
+Select with settings.OTP_BACKEND (dotted path):
+- registrations.otp_backends.CacheOTPBackend (default): codes, attempt
+  counters and per-identifier rate-limit counters live in the Django cache
+  with native TTLs; the OTPVerification table is only written for audit
+- registrations.otp_backends.DatabaseOTPBackend: original table-based flow
+"""
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.files import locks
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from .models import OTPVerification
+import hashlib
+import os
+import random
+import threading
+import time
+import uuid
+
+OTP_VALIDITY_MINUTES = 5
+OTP_MAX_ATTEMPTS = 3
+OTP_RATE_LIMIT = 3  # OTP requests allowed per identifier ...
+OTP_RATE_WINDOW_MINUTES = 15  # ... per this many minutes
+
+# Lock files shared by identifiers when the OTP cache is file based
+RATE_LOCK_STRIPES = 16
+_rate_thread_locks = [threading.Lock() for _ in range(RATE_LOCK_STRIPES)]
+
+# verify() results
+VERIFIED = 'VERIFIED'
+NOT_FOUND = 'NOT_FOUND'
+EXPIRED = 'EXPIRED'
+INVALID = 'INVALID'
+
+
+class BaseOTPBackend:
+    """Interface used by otp_views"""
+
+    def is_rate_limited(self, identifier):
+        """Return True if the identifier has used up its OTP requests"""
+        raise NotImplementedError
+
+    def issue(self, mobile_number=None, email=None, member_name=None, category=None):
+        """
+        Create a new OTP, replacing any pending one for the identifier
+        Returns: dict with id, otp_code, member_name, category
+        """
+        raise NotImplementedError
+
+    def verify(self, identifier, otp_code):
+        """
+        Check an OTP for the identifier
+        Returns: (result, message, otp_dict or None) where result is one of
+        VERIFIED, NOT_FOUND, EXPIRED, INVALID
+        """
+        raise NotImplementedError
+
+
+class DatabaseOTPBackend(BaseOTPBackend):
+    """Keeps OTPs in the OTPVerification table (rate limit via COUNT)"""
+
+    def _filter(self, identifier):
+        if '@' in identifier:
+            return OTPVerification.objects.filter(email=identifier)
+        return OTPVerification.objects.filter(mobile_number=identifier)
+
+    def is_rate_limited(self, identifier):
+        recent_otps = self._filter(identifier).filter(
+            created_at__gte=timezone.now() - timedelta(minutes=OTP_RATE_WINDOW_MINUTES)
+        ).count()
+        return recent_otps >= OTP_RATE_LIMIT
+
+    def issue(self, mobile_number=None, email=None, member_name=None, category=None):
+        otp = OTPVerification.generate_otp(
+            mobile_number=mobile_number, email=email, member_name=member_name, category=category
+        )
+        return self._to_dict(otp)
+
+    def verify(self, identifier, otp_code):
+        otp = self._filter(identifier).filter(is_verified=False).order_by('-created_at').first()
+        if not otp:
+            return NOT_FOUND, 'No OTP found for this identifier. Please request a new OTP.', None
+
+        if not otp.is_valid():
+            return EXPIRED, 'OTP has expired or maximum attempts exceeded. Please request a new OTP.', None
+
+        success, message = otp.verify(otp_code)
+        return (VERIFIED if success else INVALID), message, self._to_dict(otp)
+
+    @staticmethod
+    def _to_dict(otp):
+        return {
+            'id': otp.id,
+            'otp_code': otp.otp_code,
+            'member_name': otp.member_name,
+            'category': otp.category,
+        }
+
+
+class CacheOTPBackend(BaseOTPBackend):
+    """
+    Keeps OTPs in the cache alias settings.OTP_CACHE_ALIAS (default 'otp')
+    Nothing is written to the database except an audit row per successful
+    verification (settings.OTP_AUDIT_VERIFIED)
+    """
+
+    def __init__(self):
+        self.cache = caches[getattr(settings, 'OTP_CACHE_ALIAS', 'otp')]
+        self.audit = getattr(settings, 'OTP_AUDIT_VERIFIED', True)
+
+    @staticmethod
+    def _normalize(identifier):
+        return identifier.strip().lower()
+
+    def _code_key(self, identifier):
+        return f'otp:code:{self._normalize(identifier)}'
+
+    def _rate_key(self, identifier, window_index):
+        return f'otp:rate:{self._normalize(identifier)}:{window_index}'
+
+    @staticmethod
+    def _attempts_key(otp_id):
+        return f'otp:attempts:{otp_id}'
+
+    def is_rate_limited(self, identifier):
+        """
+        Sliding-window counter: OTP_RATE_LIMIT requests per
+        OTP_RATE_WINDOW_MINUTES, with the previous window weighted by how much
+        of it still overlaps; each allowed OTP request counts once
+        The counter is taken with add()/incr(), which are atomic on Redis,
+        Memcached and LocMem; _rate_lock makes them atomic on the file cache
+        """
+        window = OTP_RATE_WINDOW_MINUTES * 60
+        now = time.time()
+        window_index = int(now // window)
+        key = self._rate_key(identifier, window_index)
+
+        with self._rate_lock(identifier):
+            self.cache.add(key, 0, window * 2)
+            try:
+                count = self.cache.incr(key)
+            except ValueError:
+                # Counter expired between add() and incr()
+                self.cache.set(key, 1, window * 2)
+                count = 1
+            previous = self.cache.get(self._rate_key(identifier, window_index - 1), 0)
+
+            overlap = 1 - (now % window) / window
+            if previous * overlap + count > OTP_RATE_LIMIT:
+                # Refused requests do not count against the next window
+                self.cache.decr(key)
+                return True
+        return False
+
+    @contextmanager
+    def _rate_lock(self, identifier):
+        """
+        Serialize the counter update for the file-based cache, whose add() and
+        incr() are read-then-write; other backends are atomic on their own
+        """
+        if not isinstance(self.cache, FileBasedCache):
+            yield
+            return
+
+        stripe = int(hashlib.md5(self._normalize(identifier).encode('utf-8')).hexdigest(), 16) % RATE_LOCK_STRIPES
+        directory = settings.CACHES[getattr(settings, 'OTP_CACHE_ALIAS', 'otp')]['LOCATION']
+        os.makedirs(directory, exist_ok=True)
+        with _rate_thread_locks[stripe], open(os.path.join(directory, f'rate-{stripe}.lock'), 'ab') as lock_file:
+            locks.lock(lock_file, locks.LOCK_EX)
+            try:
+                yield
+            finally:
+                locks.unlock(lock_file)
+
+    def issue(self, mobile_number=None, email=None, member_name=None, category=None):
+        identifier = email or mobile_number
+        otp = {
+            'id': uuid.uuid4().hex,
+            'otp_code': str(random.randint(100000, 999999)),
+            'member_name': member_name,
+            'category': category,
+            'mobile_number': mobile_number,
+            'email': email,
+            'created_at': timezone.now().isoformat(),
+        }
+        # Overwriting the key invalidates any previous OTP for this identifier
+        self.cache.set(self._code_key(identifier), otp, OTP_VALIDITY_MINUTES * 60)
+        return otp
+
+    def verify(self, identifier, otp_code):
+        key = self._code_key(identifier)
+        otp = self.cache.get(key)
+        if not otp:
+            return NOT_FOUND, 'No OTP found for this identifier. Please request a new OTP.', None
+
+        attempts_key = self._attempts_key(otp['id'])
+        self.cache.add(attempts_key, 0, OTP_VALIDITY_MINUTES * 60)
+        try:
+            attempts = self.cache.incr(attempts_key)
+        except ValueError:
+            # Counter expired between add() and incr()
+            return EXPIRED, 'OTP has expired or maximum attempts exceeded. Please request a new OTP.', None
+
+        if attempts > OTP_MAX_ATTEMPTS:
+            return EXPIRED, 'OTP has expired or maximum attempts exceeded. Please request a new OTP.', None
+
+        if otp['otp_code'] != otp_code:
+            return INVALID, f'Invalid OTP. {OTP_MAX_ATTEMPTS - attempts} attempts remaining', otp
+
+        self.cache.delete_many([key, attempts_key])
+        if self.audit:
+            self._write_audit(otp, attempts)
+        return VERIFIED, 'OTP verified successfully', otp
+
+    @staticmethod
+    def _write_audit(otp, attempts):
+        now = timezone.now()
+        issued_at = datetime.fromisoformat(otp['created_at'])
+        OTPVerification.objects.create(
+            mobile_number=otp['mobile_number'],
+            email=otp['email'],
+            otp_code=otp['otp_code'],
+            member_name=otp['member_name'] or '',
+            category=otp['category'] or '',
+            expires_at=issued_at + timedelta(minutes=OTP_VALIDITY_MINUTES),
+            is_verified=True,
+            verified_at=now,
+            attempts=attempts,
+        )
+
+
+_backend = None
+
+
+def get_otp_backend():
+    """Return the configured OTP backend instance"""
+    global _backend
+    if _backend is None:
+        backend_path = getattr(settings, 'OTP_BACKEND', 'registrations.otp_backends.CacheOTPBackend')
+        _backend = import_string(backend_path)()
+    return _backend
@@ -4,34 +4,25 @@ OTP verification views for BNI member authentication
 from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
-from rest_framework.permissions import AllowAny
-from django.utils import timezone
-from .models import OTPVerification
-from .serializers import OTPVerificationSerializer
-from .sms_utils import send_otp_sms
-from django.core.mail import EmailMessage
-from django.conf import settings
+from rest_framework.permissions import AllowAny, IsAuthenticated
+from .otp_backends import get_otp_backend, OTP_VALIDITY_MINUTES, NOT_FOUND, VERIFIED
+from .sms_utils import queue_sms, otp_sms_message
+from .notifications import get_dispatcher
 import logging
 
 logger = logging.getLogger(__name__)
 
 
-def send_otp_email(email, otp_code, member_name):
+def otp_email_message(otp_code, member_name):
     """
-    Send OTP via email
-
-    Args:
-        email: Email address to send OTP to
-        otp_code: The 6-digit OTP code
-        member_name: Name of the member
+    Subject and body of the OTP email
 
     Returns:
-        tuple: (success: bool, message: str)
+        tuple: (subject: str, body: str)
     """
-    try:
-        subject = f'BNI Event - Your OTP Code: {otp_code}'
+    subject = f'BNI Event - Your OTP Code: {otp_code}'
 
-        message = f"""
+    message = f"""
 Dear {member_name},
 
 Your OTP code for BNI Event registration is:
@@ -50,21 +41,32 @@ BNI Chettinad Team
 ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
 This is an automated email. Please do not reply to this email.
 """
+    return subject, message
 
-        email_message = EmailMessage(
-            subject=subject,
-            body=message,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            to=[email],
-        )
 
-        email_message.send(fail_silently=False)
-        logger.info(f'OTP email sent successfully to {email}')
-        return True, 'OTP sent successfully via email'
+def send_otp_email(email, otp_code, member_name):
+    """
+    Send OTP via email (blocks until delivered or retries run out)
+
+    Args:
+        email: Email address to send OTP to
+        otp_code: The 6-digit OTP code
+        member_name: Name of the member
 
-    except Exception as e:
-        logger.error(f'Failed to send OTP email to {email}: {str(e)}')
-        return False, f'Failed to send OTP email: {str(e)}'
+    Returns:
+        tuple: (success: bool, message: str)
+    """
+    subject, message = otp_email_message(otp_code, member_name)
+    return get_dispatcher().send_now('email', email, message, subject=subject)
+
+
+def _log_delivery_failure(delivery_method):
+    """Done-callback for queued OTP deliveries"""
+    def callback(future):
+        send_success, send_message = future.result()
+        if not send_success:
+            logger.error(f"Failed to send OTP via {delivery_method}: {send_message}")
+    return callback
 
 
 @api_view(['POST'])
@@ -116,49 +118,38 @@ def send_otp(request):
             }, status=status.HTTP_400_BAD_REQUEST)
 
     try:
-        # Check rate limiting - max 3 OTPs per identifier per 15 minutes
-        if use_email:
-            recent_otps = OTPVerification.objects.filter(
-                email=email,
-                created_at__gte=timezone.now() - timezone.timedelta(minutes=15)
-            ).count()
-        else:
-            recent_otps = OTPVerification.objects.filter(
-                mobile_number=mobile_number,
-                created_at__gte=timezone.now() - timezone.timedelta(minutes=15)
-            ).count()
+        otp_backend = get_otp_backend()
 
-        if recent_otps >= 3:
+        # Check rate limiting - max 3 OTPs per identifier per 15 minutes
+        if otp_backend.is_rate_limited(identifier):
             return Response({
                 'error': 'Too many OTP requests. Please try again after 15 minutes.'
             }, status=status.HTTP_429_TOO_MANY_REQUESTS)
 
         # Generate OTP
         if use_email:
-            otp = OTPVerification.generate_otp(email=email, member_name=member_name, category=category)
+            otp = otp_backend.issue(email=email, member_name=member_name, category=category)
         else:
-            otp = OTPVerification.generate_otp(mobile_number=mobile_number, member_name=member_name, category=category)
+            otp = otp_backend.issue(mobile_number=mobile_number, member_name=member_name, category=category)
 
-        # Send OTP via SMS or Email
+        # Queue OTP via SMS or Email - the response does not wait on the provider
         if use_email:
-            send_success, send_message = send_otp_email(email, otp.otp_code, member_name)
+            subject, message = otp_email_message(otp['otp_code'], member_name)
+            future = get_dispatcher().submit('email', email, message, subject=subject)
             delivery_method = 'email'
         else:
-            send_success, send_message = send_otp_sms(mobile_number, otp.otp_code, member_name)
+            future = queue_sms(mobile_number, otp_sms_message(otp['otp_code'], member_name))
             delivery_method = 'mobile number'
 
-        if not send_success:
-            logger.error(f"Failed to send OTP via {delivery_method}: {send_message}")
-            # Still return success in development mode
-            # In production, you might want to return error
+        future.add_done_callback(_log_delivery_failure(delivery_method))
 
         return Response({
             'success': True,
             'message': f'OTP sent successfully to your {delivery_method}',
             'mobile_number': identifier if not use_email else None,
             'email': identifier if use_email else None,
-            'expires_in_minutes': 5,
-            'otp_id': otp.id
+            'expires_in_minutes': OTP_VALIDITY_MINUTES,
+            'otp_id': otp['id']
         }, status=status.HTTP_200_OK)
 
     except Exception as e:
@@ -200,41 +191,22 @@ def verify_otp(request):
         }, status=status.HTTP_400_BAD_REQUEST)
 
     try:
-        # Find the latest OTP for this identifier
-        if email:
-            otp = OTPVerification.objects.filter(
-                email=email,
-                is_verified=False
-            ).order_by('-created_at').first()
-        else:
-            otp = OTPVerification.objects.filter(
-                mobile_number=mobile_number,
-                is_verified=False
-            ).order_by('-created_at').first()
+        result, message, otp = get_otp_backend().verify(identifier, otp_code)
 
-        if not otp:
+        if result == NOT_FOUND:
             return Response({
-                'error': 'No OTP found for this identifier. Please request a new OTP.'
+                'error': message
             }, status=status.HTTP_404_NOT_FOUND)
 
-        # Check if OTP is expired
-        if not otp.is_valid():
-            return Response({
-                'error': 'OTP has expired or maximum attempts exceeded. Please request a new OTP.'
-            }, status=status.HTTP_400_BAD_REQUEST)
-
-        # Verify OTP
-        success, message = otp.verify(otp_code)
-
-        if success:
+        if result == VERIFIED:
             return Response({
                 'success': True,
                 'message': message,
-                'otp_id': otp.id,
+                'otp_id': otp['id'],
                 'mobile_number': identifier if not email else None,
                 'email': identifier if email else None,
-                'member_name': otp.member_name,
-                'category': otp.category
+                'member_name': otp['member_name'],
+                'category': otp['category']
             }, status=status.HTTP_200_OK)
         else:
             return Response({
@@ -263,3 +235,15 @@ def resend_otp(request):
     """
     # Just call send_otp again
     return send_otp(request)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def notification_metrics(request):
+    """
+    Delivery metrics per SMS/email provider for this worker process
+    """
+    return Response({
+        'success': True,
+        'providers': get_dispatcher().metrics()
+    }, status=status.HTTP_200_OK)
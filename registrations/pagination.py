@@ -0,0 +1,36 @@
+"""
+Cursor (keyset) pagination classes for large, append-heavy tables
+"""
+from rest_framework.pagination import CursorPagination
+
+
+class OptInCursorPagination(CursorPagination):
+    """
+    Cursor pagination that only kicks in when the client asks for it
+    (by sending ?cursor= or ?page_size=), so existing callers that expect
+    a plain list keep working unchanged
+    """
+    page_size = 100
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+
+    def paginate_queryset(self, queryset, request, view=None):
+        params = request.query_params
+        if self.cursor_query_param not in params and self.page_size_query_param not in params:
+            return None
+        return super().paginate_queryset(queryset, request, view)
+
+
+class ScanLogCursorPagination(OptInCursorPagination):
+    """Keyset pagination over scan logs, newest first"""
+    ordering = '-scanned_at'
+
+
+class FeedbackCursorPagination(OptInCursorPagination):
+    """Keyset pagination over feedback, newest first"""
+    ordering = '-submitted_at'
+
+
+class BulkGroupCursorPagination(OptInCursorPagination):
+    """Keyset pagination over booking groups, newest first"""
+    ordering = '-created_at'
@@ -1,10 +1,13 @@
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
-from rest_framework.permissions import AllowAny
+from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework import status
 from django.conf import settings
 from django.utils import timezone
-from .models import Registration
+from django.utils.dateparse import parse_date
+from .models import Registration, BookingGroup
+from .analytics import get_payment_reconciliation, payment_report_section, PAYMENT_REPORT_SECTIONS
+from .exports import streaming_export, EXPORT_FORMATS
 from .email_utils import send_epass_email
 from .id_card_generator import generate_id_card
 import uuid
@@ -32,29 +35,21 @@ def propagate_bulk_payment(primary_registration):
     Propagate payment from primary booker to all additional members in booking group
     """
     try:
-        # Get all additional members in the same booking group
-        additional_members = Registration.objects.filter(
-            booking_group_id=primary_registration.booking_group_id,
-            is_primary_booker=False
-        )
+        # Group size comes from the maintained BookingGroup summary
+        group = BookingGroup.objects.filter(booking_group_id=primary_registration.booking_group_id).first()
 
-        if not additional_members.exists():
+        if group is None or not group.additional_count:
             logger.info(f"No additional members found for {primary_registration.booking_group_id}")
             return
 
-        # Calculate expected amount
-        total_persons = Registration.objects.filter(
-            booking_group_id=primary_registration.booking_group_id
-        ).count()
-
-        # Get per-person price
-        if primary_registration.registration_for == 'PUBLIC':
-            per_person_price = 300
-        elif primary_registration.registration_for == 'STUDENTS':
-            per_person_price = 150
-        else:  # BNI members
-            per_person_price = 0
+        additional_members = list(Registration.objects.filter(
+            booking_group_id=primary_registration.booking_group_id,
+            is_primary_booker=False
+        ))
 
+        # Calculate expected amount (BNI members: 0 per person)
+        total_persons = group.total_attendees
+        per_person_price = BookingGroup.PER_PERSON_PRICE.get(primary_registration.registration_for, 0)
         expected_total = total_persons * per_person_price
         primary_paid = float(primary_registration.amount)
 
@@ -90,7 +85,7 @@ def propagate_bulk_payment(primary_registration):
                 except Exception as e:
                     logger.error(f"Failed to send E-Pass to {member.email}: {str(e)}")
 
-            logger.info(f"Successfully propagated payment to {additional_members.count()} additional members")
+            logger.info(f"Successfully propagated payment to {len(additional_members)} additional members")
         else:
             logger.warning(f"Primary paid ₹{primary_paid} but expected ₹{expected_total} for {total_persons} persons")
 
@@ -470,3 +465,56 @@ def payment_webhook(request):
     except Exception as e:
         return Response({'status': 'error', 'message': str(e)},
                        status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def payment_reconciliation(request):
+    """
+    Payment reconciliation report (admin only), computed with SQL aggregates
+    and cached until the next registration change
+
+    Query params:
+        pending_hours: PENDING rows older than this count as stale (default 24)
+        date_from, date_to: YYYY-MM-DD registration dates, inclusive
+        refresh: 1 to recompute instead of using the cache
+        section: by_category, by_day, bulk_mismatches or stale_pending to
+            download that section as a file instead of the JSON report
+        file_format: csv (default), xlsx or jsonl (with section)
+    """
+    try:
+        params = request.query_params
+        try:
+            pending_hours = int(params.get('pending_hours', 24))
+        except ValueError:
+            return Response({'error': 'pending_hours must be a whole number'}, status=status.HTTP_400_BAD_REQUEST)
+
+        date_from = parse_date(params.get('date_from', '') or '')
+        date_to = parse_date(params.get('date_to', '') or '')
+
+        section = params.get('section')
+        if section:
+            if section not in PAYMENT_REPORT_SECTIONS:
+                return Response({
+                    'error': f"section must be one of: {', '.join(PAYMENT_REPORT_SECTIONS)}"
+                }, status=status.HTTP_400_BAD_REQUEST)
+
+            export_format = params.get('file_format', 'csv')
+            if export_format not in EXPORT_FORMATS:
+                return Response({
+                    'error': f"file_format must be one of: {', '.join(EXPORT_FORMATS)}"
+                }, status=status.HTTP_400_BAD_REQUEST)
+
+            header, rows = payment_report_section(section, pending_hours, date_from, date_to)
+            stamp = timezone.now().strftime('%Y%m%d_%H%M%S')
+            return streaming_export(header, rows, f'payments_{section}_{stamp}', export_format=export_format)
+
+        report = get_payment_reconciliation(
+            pending_hours, date_from, date_to, refresh=params.get('refresh') in ('1', 'true')
+        )
+        return Response({'success': True, **report}, status=status.HTTP_200_OK)
+
+    except Exception as e:
+        return Response({
+            'error': str(e)
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -1,12 +1,60 @@
 from rest_framework import serializers
+from django.conf import settings
+from django.db import IntegrityError
+from django.template.defaultfilters import filesizeformat
 from .models import Registration, EventSettings, ScanLog, OTPVerification, Sponsor, SponsorTicketLimit, BNIMember, IDCardTemplate, EventFeedback
+from .image_proxy import proxied_image_url
+
+class UploadedImageField(serializers.ImageField):
+    """
+    ImageField for user uploads: rejects files over UPLOAD_MAX_BYTES before
+    decoding them and images over IMAGE_UPLOAD_MAX_PIXELS (decompression bombs)
+    """
+    default_error_messages = {
+        'too_large': 'Image is too large (maximum {max_size}).',
+        'too_many_pixels': 'Image dimensions are too large.',
+    }
+
+    def to_internal_value(self, data):
+        if getattr(data, 'size', 0) > settings.UPLOAD_MAX_BYTES:
+            self.fail('too_large', max_size=filesizeformat(settings.UPLOAD_MAX_BYTES))
+        file = super().to_internal_value(data)
+        image = getattr(file, 'image', None)
+        if image is not None and image.width * image.height > settings.IMAGE_UPLOAD_MAX_PIXELS:
+            self.fail('too_many_pixels')
+        return file
+
+
+def image_variant_urls(image, variants, request=None):
+    """
+    {variant: {'jpeg': url, 'webp': url, 'width', 'height'}} for a <field>_variants
+    dict, empty until the current file has been processed
+    """
+    urls = {}
+    if not image or (variants or {}).get('source') != image.name:
+        return urls
+    for name, entry in variants.items():
+        if not isinstance(entry, dict):
+            continue
+        urls[name] = dict(entry)
+        for key in ('jpeg', 'webp'):
+            url = settings.MEDIA_URL + entry[key]
+            if not url.startswith('/'):
+                url = '/' + url
+            urls[name][key] = request.build_absolute_uri(url) if request else url
+    return urls
+
 
 class RegistrationSerializer(serializers.ModelSerializer):
+    student_id_card = UploadedImageField(required=False, allow_null=True)
+    student_id_card_variants = serializers.SerializerMethodField()
+
     class Meta:
         model = Registration
         fields = [
             'id', 'ticket_no', 'name', 'mobile_number', 'email',
-            'age', 'location', 'company_name', 'referred_by', 'registration_for', 'sponsor_type', 'student_id_card',
+            'age', 'location', 'company_name', 'referred_by', 'registration_for', 'sponsor_type',
+            'student_id_card', 'student_id_card_variants',
             'payment_status', 'payment_id', 'order_id', 'amount',
             'payment_date', 'payment_info',
             'booking_group_id', 'is_primary_booker', 'primary_booker_name',
@@ -50,25 +98,42 @@ class RegistrationSerializer(serializers.ModelSerializer):
 
         return data
 
+    def get_student_id_card_variants(self, obj):
+        """Downscaled JPEG/WebP copies (empty until the upload has been processed)"""
+        return image_variant_urls(obj.student_id_card, obj.student_id_card_variants, self.context.get('request'))
+
 class EventSettingsSerializer(serializers.ModelSerializer):
+    logo = UploadedImageField(required=False, allow_null=True)
     logo_url = serializers.SerializerMethodField()
+    logo_webp_url = serializers.SerializerMethodField()
 
     class Meta:
         model = EventSettings
         fields = [
-            'id', 'logo', 'logo_url', 'event_name',
+            'id', 'logo', 'logo_url', 'logo_webp_url', 'event_name',
             'total_seats', 'students_seats', 'public_seats', 'bni_seats',
             'registration_enabled', 'updated_at'
         ]
         read_only_fields = ['updated_at']
 
+    def _logo_display(self, obj):
+        return image_variant_urls(obj.logo, obj.logo_variants, self.context.get('request')).get('display')
+
     def get_logo_url(self, obj):
+        """Downscaled JPEG once the upload has been processed, the original until then"""
         if obj.logo:
+            display = self._logo_display(obj)
+            if display:
+                return display['jpeg']
             request = self.context.get('request')
             if request:
                 return request.build_absolute_uri(obj.logo.url)
         return None
 
+    def get_logo_webp_url(self, obj):
+        display = self._logo_display(obj)
+        return display['webp'] if display else None
+
 
 class ScanLogSerializer(serializers.ModelSerializer):
     registration_name = serializers.CharField(source='registration.name', read_only=True)
@@ -95,13 +160,14 @@ class OTPVerificationSerializer(serializers.ModelSerializer):
 
 class SponsorSerializer(serializers.ModelSerializer):
     direct_image_url = serializers.SerializerMethodField()
+    proxy_image_url = serializers.SerializerMethodField()
     category_display = serializers.CharField(source='get_category_display', read_only=True)
 
     class Meta:
         model = Sponsor
         fields = [
             'id', 'category', 'category_display', 'logo_url', 'direct_image_url',
-            'company_name', 'display_order', 'is_active',
+            'proxy_image_url', 'company_name', 'display_order', 'is_active',
             'created_at', 'updated_at'
         ]
         read_only_fields = ['created_at', 'updated_at']
@@ -110,6 +176,10 @@ class SponsorSerializer(serializers.ModelSerializer):
         """Get the direct image URL for frontend display"""
         return obj.get_direct_image_url()
 
+    def get_proxy_image_url(self, obj):
+        """Resized logo served by the image proxy (None for non-Drive links)"""
+        return proxied_image_url(obj.logo_url, self.context.get('request'), width=300)
+
 
 class SponsorTicketLimitSerializer(serializers.ModelSerializer):
     """Serializer for sponsor ticket limits"""
@@ -178,12 +248,13 @@ class IDCardTemplateSerializer(serializers.ModelSerializer):
     """Serializer for ID card templates with Google Drive URLs"""
     category_display = serializers.CharField(source='get_category_display', read_only=True)
     direct_image_url = serializers.SerializerMethodField()
+    proxy_image_url = serializers.SerializerMethodField()
 
     class Meta:
         model = IDCardTemplate
         fields = [
             'id', 'category', 'category_display', 'template_url',
-            'direct_image_url', 'is_active', 'created_at', 'updated_at'
+            'direct_image_url', 'proxy_image_url', 'is_active', 'created_at', 'updated_at'
         ]
         read_only_fields = ['created_at', 'updated_at']
 
@@ -191,6 +262,10 @@ class IDCardTemplateSerializer(serializers.ModelSerializer):
         """Get the direct image URL for templates"""
         return obj.get_direct_image_url()
 
+    def get_proxy_image_url(self, obj):
+        """Template preview served by the image proxy (None for non-Drive links)"""
+        return proxied_image_url(obj.template_url, self.context.get('request'), width=600)
+
 
 class EventFeedbackSerializer(serializers.ModelSerializer):
     """Serializer for event feedback and ratings - Simplified version"""
@@ -235,33 +310,44 @@ class EventFeedbackSubmitSerializer(serializers.ModelSerializer):
         ]
 
     def validate_ticket_no(self, value):
-        """Validate ticket exists and hasn't already submitted feedback"""
-        try:
-            registration = Registration.objects.get(ticket_no=value)
-        except Registration.DoesNotExist:
-            raise serializers.ValidationError("Invalid ticket number.")
-
-        if EventFeedback.objects.filter(registration=registration).exists():
-            raise serializers.ValidationError("Feedback has already been submitted for this ticket.")
+        """
+        Resolve the ticket to its registration (one query, or none when the
+        caller pre-loaded context['registrations'] keyed by ticket_no)
+        Duplicate submissions are caught by the unique constraint in create()
+        """
+        registrations = self.context.get('registrations')
+        if registrations is not None:
+            registration = registrations.get(value)
+        else:
+            try:
+                registration = Registration.objects.get(ticket_no=value)
+            except Registration.DoesNotExist:
+                registration = None
 
-        return value
+        if registration is None:
+            raise serializers.ValidationError("Invalid ticket number.")
+        return registration
 
-    def create(self, validated_data):
-        """Create feedback with registration lookup"""
-        ticket_no = validated_data.pop('ticket_no')
-        registration = Registration.objects.get(ticket_no=ticket_no)
+    def get_feedback_fields(self):
+        """Model field values for the validated submission, including request metadata"""
+        data = dict(self.validated_data)
+        data['registration'] = data.pop('ticket_no')
 
         # Add IP address and user agent from request context
         request = self.context.get('request')
         if request:
-            validated_data['ip_address'] = self.get_client_ip(request)
-            validated_data['user_agent'] = request.META.get('HTTP_USER_AGENT', '')
-
-        feedback = EventFeedback.objects.create(
-            registration=registration,
-            **validated_data
-        )
-        return feedback
+            data['ip_address'] = self.get_client_ip(request)
+            data['user_agent'] = request.META.get('HTTP_USER_AGENT', '')
+        return data
+
+    def create(self, validated_data):
+        """Insert the feedback; the OneToOne constraint rejects a second submission"""
+        try:
+            return EventFeedback.objects.create(**self.get_feedback_fields())
+        except IntegrityError:
+            raise serializers.ValidationError({
+                'ticket_no': ["Feedback has already been submitted for this ticket."]
+            })
 
     def get_client_ip(self, request):
         """Get client IP address from request"""
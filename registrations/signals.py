@@ -0,0 +1,94 @@
+"""
+Signal handlers that keep cached data in sync with the database
+"""
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .models import Registration, EventFeedback, FeedbackStats, BookingGroup, DeletedRecord, SponsorTicketLimit, IDCardTemplate, Sponsor, EventSettings
+from .cache_utils import invalidate_scan_qr, invalidate_public_response
+from .analytics import invalidate_feedback_stats, invalidate_payment_report
+from .backup import INCREMENTAL_FIELDS
+from .config_cache import ticket_limits, template_urls
+from .image_uploads import schedule_image_processing
+
+
+@receiver([post_save, post_delete], sender=Registration)
+def registration_changed(sender, instance, **kwargs):
+    """Registration details or payment status changed - drop cached QR scan data and payment reports"""
+    invalidate_scan_qr(instance.ticket_no)
+    invalidate_payment_report()
+
+
+@receiver([post_save, post_delete], sender=Registration)
+def booking_group_member_changed(sender, instance, **kwargs):
+    """
+    Keep the BookingGroup summary in step with its member registrations
+    (both groups when a registration moves between groups or leaves one)
+    """
+    previous = getattr(instance, '_loaded_booking_group_id', None)
+    for booking_group_id in {previous, instance.booking_group_id} - {None, ''}:
+        BookingGroup.refresh(booking_group_id)
+    instance._loaded_booking_group_id = instance.booking_group_id
+
+
+@receiver([post_save, post_delete], sender=EventFeedback)
+def feedback_changed(sender, instance, **kwargs):
+    """Feedback submitted or deleted - drop cached feedback state and statistics"""
+    invalidate_scan_qr(instance.registration.ticket_no)
+    invalidate_feedback_stats()
+
+
+@receiver(post_delete, sender=EventFeedback)
+def feedback_deleted(sender, instance, **kwargs):
+    """Remove deleted feedback from the running per-category totals (runs inside the delete transaction)"""
+    FeedbackStats.apply(instance, -1)
+
+
+@receiver([post_save, post_delete], sender=SponsorTicketLimit)
+def ticket_limit_changed(sender, instance, **kwargs):
+    """Sponsor ticket limits changed - every worker reloads its snapshot and cached limit responses"""
+    ticket_limits.invalidate()
+    invalidate_public_response('ticket_limits')
+
+
+@receiver([post_save, post_delete], sender=IDCardTemplate)
+def id_card_template_changed(sender, instance, **kwargs):
+    """ID card template added, edited or removed - every worker reloads its snapshot and cached template lists"""
+    template_urls.invalidate()
+    invalidate_public_response('id_card_templates')
+
+
+@receiver([post_save, post_delete], sender=Sponsor)
+def sponsor_changed(sender, instance, **kwargs):
+    """Sponsor added, edited or removed - drop cached sponsor listings"""
+    invalidate_public_response('sponsors')
+
+
+@receiver([post_save, post_delete], sender=EventSettings)
+def event_settings_changed(sender, instance, **kwargs):
+    """Event settings saved - drop the cached settings response"""
+    invalidate_public_response('event_settings')
+
+
+@receiver(post_save, sender=Registration)
+def student_id_card_saved(sender, instance, **kwargs):
+    """New student ID card uploaded - strip and downscale it after commit"""
+    if not kwargs.get('raw'):
+        schedule_image_processing(instance, 'student_id_card')
+
+
+@receiver(post_save, sender=EventSettings)
+def event_logo_saved(sender, instance, **kwargs):
+    """New event logo uploaded - strip and downscale it after commit"""
+    if not kwargs.get('raw'):
+        schedule_image_processing(instance, 'logo')
+
+
+def record_deletion(sender, instance, **kwargs):
+    """Leave a tombstone so the next incremental snapshot replays the delete"""
+    DeletedRecord.objects.create(model_label=sender._meta.label_lower, object_pk=str(instance.pk))
+
+
+# Connected per model (not for every sender) so bulk deletes of other
+# models keep Django's fast delete path
+for label in INCREMENTAL_FIELDS:
+    post_delete.connect(record_deletion, sender=label, dispatch_uid=f'record_deletion:{label}')
@@ -1,7 +1,9 @@
 """
 SMS utility for sending OTP via SMS
-Supports multiple SMS providers - configure in settings
+Supports multiple SMS providers - configure NOTIFICATION_PROVIDERS['sms'] in settings
+(see registrations.notifications for Twilio, AWS SNS and MSG91 providers)
 """
+from .notifications import get_dispatcher
 import logging
 
 logger = logging.getLogger(__name__)
@@ -9,7 +11,7 @@ logger = logging.getLogger(__name__)
 
 def send_sms(mobile_number, message):
     """
-    Send SMS to the given mobile number
+    Send SMS to the given mobile number (blocks until delivered or retries run out)
 
     Args:
         mobile_number (str): Mobile number to send SMS to
@@ -18,61 +20,27 @@ def send_sms(mobile_number, message):
     Returns:
         tuple: (success: bool, message: str)
     """
-    try:
-        # For development/testing: Log OTP instead of sending
-        # In production, integrate with SMS gateway (Twilio, AWS SNS, MSG91, etc.)
+    return get_dispatcher().send_now('sms', mobile_number, message)
 
-        logger.info(f"SMS to {mobile_number}: {message}")
-        print(f"\n{'='*60}")
-        print(f"SMS SIMULATION - DEVELOPMENT MODE")
-        print(f"To: {mobile_number}")
-        print(f"Message: {message}")
-        print(f"{'='*60}\n")
 
-        # Return success for development
-        return True, "OTP sent successfully (Development Mode)"
-
-        # PRODUCTION CODE - Uncomment and configure one of the following:
-
-        # Option 1: Twilio
-        # from twilio.rest import Client
-        # account_sid = settings.TWILIO_ACCOUNT_SID
-        # auth_token = settings.TWILIO_AUTH_TOKEN
-        # client = Client(account_sid, auth_token)
-        # message = client.messages.create(
-        #     body=message,
-        #     from_=settings.TWILIO_PHONE_NUMBER,
-        #     to=mobile_number
-        # )
-        # return True, "SMS sent successfully"
+def queue_sms(mobile_number, message):
+    """
+    Queue SMS for background delivery
 
-        # Option 2: AWS SNS
-        # import boto3
-        # sns = boto3.client('sns', region_name='your-region')
-        # response = sns.publish(
-        #     PhoneNumber=mobile_number,
-        #     Message=message
-        # )
-        # return True, "SMS sent successfully"
+    Returns:
+        Future resolving to (success: bool, message: str)
+    """
+    return get_dispatcher().submit('sms', mobile_number, message)
 
-        # Option 3: MSG91 (Popular in India)
-        # import requests
-        # url = "https://api.msg91.com/api/v5/otp"
-        # payload = {
-        #     "template_id": "your_template_id",
-        #     "mobile": mobile_number,
-        #     "authkey": "your_auth_key",
-        #     "otp": message
-        # }
-        # response = requests.post(url, json=payload)
-        # if response.status_code == 200:
-        #     return True, "SMS sent successfully"
-        # else:
-        #     return False, f"SMS failed: {response.text}"
 
-    except Exception as e:
-        logger.error(f"SMS sending failed: {str(e)}")
-        return False, f"Failed to send SMS: {str(e)}"
+def otp_sms_message(otp_code, member_name):
+    """Text of the OTP SMS"""
+    return (
+        f"Dear {member_name},\n"
+        f"Your OTP for BNI Event registration is: {otp_code}\n"
+        f"Valid for 5 minutes.\n"
+        f"- BNI Chettinad"
+    )
 
 
 def send_otp_sms(mobile_number, otp_code, member_name):
@@ -87,11 +55,4 @@ def send_otp_sms(mobile_number, otp_code, member_name):
     Returns:
         tuple: (success: bool, message: str)
     """
-    message = (
-        f"Dear {member_name},\n"
-        f"Your OTP for BNI Event registration is: {otp_code}\n"
-        f"Valid for 5 minutes.\n"
-        f"- BNI Chettinad"
-    )
-
-    return send_sms(mobile_number, message)
+    return send_sms(mobile_number, otp_sms_message(otp_code, member_name))
@@ -1,3 +1,993 @@
-from django.test import TestCase
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management import call_command
+from django.urls import reverse
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from datetime import datetime, timedelta
+from rest_framework.test import APIClient
+from PIL import Image
+from .models import Registration, BookingGroup, BNIMember, SponsorTicketLimit, EventFeedback, FeedbackStats, Sponsor, EventSettings, OTPVerification, ScanLog
+from . import analytics
+from .backup import restore_backup, take_snapshot, restore_snapshots, read_manifest
+from .views import PAYMENT_REPORT_COLUMNS
+from .member_import import MemberImporter, normalize_name
+from .config_cache import TableSnapshot
+from .cache_utils import public_response_metrics
+from .image_proxy import ImageProxy, reset_image_proxy
+from .notifications import NotificationDispatcher, FakeProvider, get_provider, reset_providers, reset_dispatcher
+from .sms_utils import queue_sms
+from .otp_backends import CacheOTPBackend, OTP_RATE_LIMIT, OTP_RATE_WINDOW_MINUTES, OTP_MAX_ATTEMPTS, VERIFIED, INVALID, EXPIRED, NOT_FOUND
+import gzip
+import csv
+import io
+import json
+import os
+import shutil
+import tempfile
+import zipfile
+from unittest import mock
+
+
+TEST_CACHES = {
+    **settings.CACHES,
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'tests-default'},
+    'config': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'tests-config'},
+}
+
+
+def isolate_caches(test_case):
+    """Fresh in-memory default and config caches for one test"""
+    override = override_settings(CACHES=TEST_CACHES)
+    override.enable()
+    test_case.addCleanup(override.disable)
+    caches['default'].clear()
+    caches['config'].clear()
+
+
+def create_registration(ticket_no, registration_for='PUBLIC', payment_status='SUCCESS', amount=300, **fields):
+    number = int(ticket_no[3:])
+    return Registration.objects.create(
+        ticket_no=ticket_no,
+        name=fields.pop('name', f'Attendee {number}'),
+        mobile_number=f'9{number:09d}',
+        email=f'attendee{number}@example.com',
+        registration_for=registration_for,
+        payment_status=payment_status,
+        amount=amount,
+        **fields
+    )
+
+
+class FeedbackSubmissionTests(TestCase):
+    """Feedback submission resolves the ticket once and relies on the unique constraint"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.registrations = [
+            Registration.objects.create(
+                name=f'Attendee {i}',
+                mobile_number=f'98765432{i:02d}',
+                email=f'attendee{i}@example.com',
+                registration_for='PUBLIC',
+                amount=100
+            )
+            for i in range(3)
+        ]
+        FeedbackStats.objects.create(category='PUBLIC')
+
+    def submit(self, ticket_no, rating=5):
+        return self.client.post('/api/feedback/submit/', {
+            'ticket_no': ticket_no,
+            'overall_rating': rating,
+            'speaker_rating': 4,
+            'attend_future': 'YES'
+        }, format='json')
+
+    def test_submit_query_count(self):
+        # ticket lookup, feedback insert and stats update (plus the savepoint
+        # pair TestCase wraps the atomic block in)
+        with self.assertNumQueries(5):
+            response = self.submit(self.registrations[0].ticket_no)
+        self.assertEqual(response.status_code, 201)
+
+        stats = FeedbackStats.objects.get(category='PUBLIC')
+        self.assertEqual((stats.total, stats.overall_5, stats.join_yes), (1, 1, 1))
+
+    def test_duplicate_submission_rejected(self):
+        self.assertEqual(self.submit(self.registrations[0].ticket_no).status_code, 201)
+        response = self.submit(self.registrations[0].ticket_no, rating=1)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('already been submitted', response.json()['error'])
+        self.assertEqual(EventFeedback.objects.count(), 1)
+        self.assertEqual(FeedbackStats.objects.get(category='PUBLIC').total, 1)
+
+    def test_invalid_ticket(self):
+        response = self.submit('BNI999')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('ticket_no', response.json()['details'])
+
+    def test_bulk_submit(self):
+        self.submit(self.registrations[0].ticket_no)
+        self.client.force_authenticate(User.objects.create_user('admin', password='admin'))
+
+        response = self.client.post('/api/feedback/submit-bulk/', {'feedback': [
+            {'ticket_no': registration.ticket_no, 'overall_rating': 3, 'speaker_rating': 3, 'attend_future': 'NO'}
+            for registration in self.registrations
+        ] + [{'ticket_no': 'BNI999', 'overall_rating': 3}]}, format='json')
+
+        data = response.json()
+        self.assertEqual(data['created'], 2)
+        self.assertEqual(data['duplicates'], [self.registrations[0].ticket_no])
+        self.assertEqual(len(data['errors']), 1)
+
+        stats = FeedbackStats.objects.get(category='PUBLIC')
+        self.assertEqual((stats.total, stats.overall_sum, stats.join_no), (3, 11, 2))
+
+
+class CountingFetcher:
+    """Stand-in for DriveImageFetcher that serves one generated PNG"""
+
+    def __init__(self):
+        self.calls = 0
+        buffer = io.BytesIO()
+        Image.new('RGBA', (1200, 600), (200, 30, 30, 255)).save(buffer, 'PNG')
+        self.data = buffer.getvalue()
+
+    def fetch(self, file_id):
+        self.calls += 1
+        return self.data
+
+
+class ImageProxyTests(TestCase):
+    """Drive images are fetched once and served as immutable, resized variants"""
+
+    file_id = 'DriveFile1234567890'
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        self.fetcher = CountingFetcher()
+        reset_image_proxy(ImageProxy(root=self.root, fetcher=self.fetcher))
+        self.addCleanup(reset_image_proxy)
+        Sponsor.objects.create(
+            category='TITLE_SPONSORS',
+            logo_url=f'https://drive.google.com/file/d/{self.file_id}/view?usp=sharing'
+        )
+
+    def test_fetched_once_and_served_immutable(self):
+        for _ in range(2):
+            response = self.client.get(f'/api/images/drive/{self.file_id}/?w=250', HTTP_ACCEPT='image/webp')
+            self.assertEqual(response.status_code, 302)
+        self.assertEqual(self.fetcher.calls, 1)
+        self.assertTrue(response['Location'].endswith('/w300.webp'))
+
+        response = self.client.get(response['Location'])
+        self.assertEqual(response['Content-Type'], 'image/webp')
+        self.assertIn('immutable', response['Cache-Control'])
+        image = Image.open(io.BytesIO(b''.join(response.streaming_content)))
+        self.assertEqual(image.size, (300, 150))
+
+    def test_unreferenced_file_not_fetched(self):
+        response = self.client.get('/api/images/drive/SomeOtherFile123456/')
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(self.fetcher.calls, 0)
+
+
+@override_settings(IMAGE_PROCESSING_ASYNC=False, UPLOAD_MAX_BYTES=100 * 1024)
+class ImageUploadTests(TestCase):
+    """Uploaded logos are stripped of metadata, downscaled and given variants"""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        override = override_settings(MEDIA_ROOT=self.media_root)
+        override.enable()
+        self.addCleanup(override.disable)
+
+        self.settings = EventSettings.objects.create(event_name='Test Event')
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_superuser('admin', 'admin@example.com', 'pass'))
+
+    def upload(self, data, name='logo.jpg'):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.patch(
+                f'/api/settings/{self.settings.pk}/',
+                {'logo': SimpleUploadedFile(name, data, 'image/jpeg')},
+                format='multipart'
+            )
+
+    def test_logo_processed(self):
+        exif = Image.Exif()
+        exif[0x010F] = 'Camera'
+        output = io.BytesIO()
+        Image.new('RGB', (3000, 1500), 'red').save(output, 'JPEG', exif=exif.tobytes())
+        self.assertEqual(self.upload(output.getvalue()).status_code, 200)
+
+        self.settings.refresh_from_db()
+        with Image.open(self.settings.logo.path) as stored:
+            self.assertEqual(stored.size, (2000, 1000))
+            self.assertFalse(stored.getexif())
+        display = self.settings.logo_variants['display']
+        self.assertEqual((display['width'], display['height']), (800, 400))
+        self.assertTrue(os.path.exists(os.path.join(self.media_root, display['webp'])))
+
+        response = self.client.get('/api/settings/')
+        self.assertTrue(response.json()['logo_url'].endswith('/logo_display.jpg'))
+
+    def test_oversized_upload_rejected(self):
+        response = self.upload(b'0' * (200 * 1024))
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['logo'][0].split(' (')[0], 'Image is too large')
+
+
+FAKE_PROVIDERS = {
+    'sms': 'registrations.notifications.FakeProvider',
+    'email': 'registrations.notifications.FakeProvider',
+}
+
+
+@override_settings(NOTIFICATION_PROVIDERS=FAKE_PROVIDERS)
+class NotificationDispatcherTests(SimpleTestCase):
+    """Deliveries are retried with backoff and counted per provider"""
+
+    def setUp(self):
+        reset_providers()
+        self.addCleanup(reset_providers)
+        self.provider = get_provider('sms')
+        self.assertIsInstance(self.provider, FakeProvider)
+        self.dispatcher = NotificationDispatcher(max_retries=3, retry_delay=0.5, run_async=False)
+
+    def test_retries_with_backoff_then_succeeds(self):
+        self.provider.fail_times = 2
+        with mock.patch('registrations.notifications.time.sleep') as sleep:
+            success, message = self.dispatcher.send_now('sms', '9876543210', 'Your OTP is 123456')
+
+        self.assertTrue(success)
+        self.assertEqual(message, 'sms sent via fake')
+        self.assertEqual([call.args[0] for call in sleep.call_args_list], [0.5, 1.0])
+        self.assertEqual(self.provider.outbox, [{'recipient': '9876543210', 'subject': None, 'message': 'Your OTP is 123456'}])
+
+        metrics = self.dispatcher.metrics()['fake']
+        self.assertEqual((metrics['sent'], metrics['failed'], metrics['retries']), (1, 2, 2))
+
+    def test_gives_up_after_max_retries(self):
+        email_provider = get_provider('email')
+        email_provider.fail_times = 5
+        with mock.patch('registrations.notifications.time.sleep'):
+            success, message = self.dispatcher.send_now('email', 'member@example.com', 'Body', subject='OTP')
+
+        self.assertFalse(success)
+        self.assertEqual(message, 'Failed to send email: Simulated provider failure')
+        self.assertEqual(email_provider.outbox, [])
+        metrics = self.dispatcher.metrics()['fake']
+        self.assertEqual((metrics['sent'], metrics['failed'], metrics['retries']), (0, 3, 2))
+
+    def test_async_submit(self):
+        dispatcher = NotificationDispatcher(max_workers=2, retry_delay=0)
+        self.addCleanup(dispatcher.shutdown)
+        futures = [dispatcher.submit('sms', f'98765432{i:02d}', f'Message {i}') for i in range(5)]
+
+        self.assertTrue(all(future.result(timeout=5)[0] for future in futures))
+        self.assertEqual(len(self.provider.outbox), 5)
+
+    @override_settings(NOTIFICATION_ASYNC=False)
+    def test_queue_sms_without_worker_pool(self):
+        # With NOTIFICATION_ASYNC off, queue_sms delivers inline and hands back a resolved Future
+        reset_dispatcher()
+        self.addCleanup(reset_dispatcher)
+        future = queue_sms('9876543210', 'Queued message')
+
+        self.assertTrue(future.done())
+        self.assertEqual(future.result(), (True, 'sms sent via fake'))
+        self.assertEqual(self.provider.outbox[0]['message'], 'Queued message')
+
+
+class CacheOTPBackendTests(TestCase):
+    """OTPs live in the (file-based) OTP cache: rate limited, single use, audited"""
+
+    def setUp(self):
+        cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache_dir)
+        override = override_settings(CACHES={
+            **settings.CACHES,
+            'otp': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': cache_dir},
+        })
+        override.enable()
+        self.addCleanup(override.disable)
+        self.backend = CacheOTPBackend()
+
+    def test_rate_limit_window(self):
+        window = OTP_RATE_WINDOW_MINUTES * 60
+        start = 1000 * window  # start of a window
+        # Patch the module's clock only - the cache keeps real expiry times
+        clock = mock.patch('registrations.otp_backends.time')
+        with clock as fake_time:
+            fake_time.time.return_value = start
+            results = [self.backend.is_rate_limited('9876543210') for _ in range(OTP_RATE_LIMIT + 2)]
+            self.assertFalse(self.backend.is_rate_limited('9876543211'))
+        self.assertEqual(results, [False] * OTP_RATE_LIMIT + [True, True])
+
+        # Refused requests are not counted: early in the next window the
+        # previous one still weighs in; a window later the limit is free again
+        with clock as fake_time:
+            fake_time.time.return_value = start + window + 1
+            self.assertTrue(self.backend.is_rate_limited('9876543210'))
+            fake_time.time.return_value = start + 2 * window + 1
+            self.assertFalse(self.backend.is_rate_limited('9876543210'))
+
+    def test_wrong_code_uses_attempts(self):
+        otp = self.backend.issue(mobile_number='9876543210', member_name='Member', category='BNI_CHETTINAD')
+        wrong = '000000' if otp['otp_code'] != '000000' else '111111'
+
+        for remaining in range(OTP_MAX_ATTEMPTS - 1, -1, -1):
+            result, message, _ = self.backend.verify('9876543210', wrong)
+            self.assertEqual(result, INVALID)
+            self.assertEqual(message, f'Invalid OTP. {remaining} attempts remaining')
+
+        # Attempts are used up: even the right code is refused now
+        result, _, _ = self.backend.verify('9876543210', otp['otp_code'])
+        self.assertEqual(result, EXPIRED)
+        self.assertFalse(OTPVerification.objects.exists())
+
+    def test_verify_is_single_use_and_audited(self):
+        otp = self.backend.issue(email='Member@Example.com', member_name='Member', category='BNI_MADURAI')
+
+        result, _, verified = self.backend.verify('member@example.com', otp['otp_code'])
+        self.assertEqual(result, VERIFIED)
+        self.assertEqual(verified['id'], otp['id'])
+
+        result, _, _ = self.backend.verify('member@example.com', otp['otp_code'])
+        self.assertEqual(result, NOT_FOUND)
+
+        audit = OTPVerification.objects.get()
+        self.assertEqual((audit.email, audit.otp_code, audit.attempts), ('Member@Example.com', otp['otp_code'], 1))
+        self.assertTrue(audit.is_verified)
+        self.assertIsNotNone(audit.verified_at)
+
+    def test_new_otp_replaces_pending_one(self):
+        first = self.backend.issue(mobile_number='9876543210', member_name='Member', category='PUBLIC')
+        second = self.backend.issue(mobile_number='9876543210', member_name='Member', category='PUBLIC')
+        if first['otp_code'] != second['otp_code']:
+            self.assertEqual(self.backend.verify('9876543210', first['otp_code'])[0], INVALID)
+        self.assertEqual(self.backend.verify('9876543210', second['otp_code'])[0], VERIFIED)
+
+
+class ScanLogListTests(TestCase):
+    """Scan logs: opt-in cursor pages, server-side filters"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('scanner', password='scanner'))
+        self.start = timezone.now().replace(microsecond=0) - timedelta(hours=1)
+        for minute, (ticket_no, action) in enumerate([
+            ('BNI001', 'CHECK_IN'), ('BNI002', 'CHECK_IN'), ('BNI001', 'SCAN_SUCCESS'),
+            ('BNI003', 'CHECK_IN'), ('BNI004', 'SCAN_FAILED'),
+        ]):
+            log = ScanLog.objects.create(ticket_no=ticket_no, action=action, scanned_by='gate1')
+            # scanned_at is auto_now_add - spread the scans a minute apart
+            ScanLog.objects.filter(pk=log.pk).update(scanned_at=self.start + timedelta(minutes=minute))
+
+    def test_cursor_pages(self):
+        response = self.client.get('/api/scan-logs/', {'page_size': 2})
+        seen = [row['ticket_no'] for row in response.json()['results']]
+        while response.json()['next']:
+            response = self.client.get(response.json()['next'])
+            seen += [row['ticket_no'] for row in response.json()['results']]
+
+        # Newest first, every row exactly once
+        self.assertEqual(seen, ['BNI004', 'BNI003', 'BNI001', 'BNI002', 'BNI001'])
+
+    def test_plain_list_without_paging_params(self):
+        self.assertEqual(len(self.client.get('/api/scan-logs/').json()), 5)
+
+        # The list is built per request, so new rows show up straight away
+        ScanLog.objects.create(ticket_no='BNI005', action='CHECK_IN')
+        self.assertEqual(len(self.client.get('/api/scan-logs/').json()), 6)
+
+    def test_filters(self):
+        def tickets(**params):
+            return [row['ticket_no'] for row in self.client.get('/api/scan-logs/', params).json()]
+
+        self.assertEqual(tickets(action='CHECK_IN'), ['BNI003', 'BNI002', 'BNI001'])
+        self.assertEqual(tickets(ticket='BNI001', action='SCAN_SUCCESS'), ['BNI001'])
+        window = {
+            'from': (self.start + timedelta(minutes=1)).isoformat(),
+            'to': (self.start + timedelta(minutes=3)).isoformat(),
+        }
+        self.assertEqual(tickets(**window), ['BNI001', 'BNI002'])
+        self.assertEqual(tickets(scanned_by='gate2'), [])
+
+    def test_impossible_date_rejected(self):
+        response = self.client.get('/api/scan-logs/', {'from': '2026-02-31T00:00'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('from', response.json())
+
+
+class ArrivalStatsTests(TestCase):
+    """First check-ins bucketed per minute/5 minutes, with category and gate breakdowns"""
+
+    def setUp(self):
+        isolate_caches(self)
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('scanner', password='scanner'))
+        now = timezone.now() - timedelta(hours=2)
+        self.base = now.replace(minute=now.minute - now.minute % 5, second=0, microsecond=0)
+
+        self.registrations = {
+            ticket_no: create_registration(ticket_no, registration_for=category)
+            for ticket_no, category in [('BNI001', 'PUBLIC'), ('BNI002', 'STUDENTS'), ('BNI003', 'PUBLIC'), ('BNI004', 'PUBLIC')]
+        }
+        self.check_in('BNI001', 1, 'gate1')
+        self.check_in('BNI001', 2, 'gate2')  # repeat scan - not an arrival
+        self.check_in('BNI002', 3, 'gate2')
+        self.check_in('BNI003', 7, 'gate1')
+        self.check_in('BNI004', 8, 'gate1', action='SCAN_SUCCESS')
+
+    def check_in(self, ticket_no, minute, gate, action='CHECK_IN'):
+        log = ScanLog.objects.create(
+            registration=self.registrations[ticket_no], ticket_no=ticket_no, action=action, scanned_by=gate
+        )
+        ScanLog.objects.filter(pk=log.pk).update(scanned_at=self.base + timedelta(minutes=minute, seconds=30))
+
+    def arrivals(self, **params):
+        response = self.client.get('/api/scan-logs/arrivals/', params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_five_minute_buckets(self):
+        data = self.arrivals(bucket=5)
+
+        self.assertEqual([(b['check_ins'], b['cumulative']) for b in data['buckets']], [(2, 2), (1, 3)])
+        first = data['buckets'][0]
+        self.assertEqual(datetime.fromisoformat(first['start']), self.base)
+        self.assertEqual(first['by_category'], {'PUBLIC': 1, 'STUDENTS': 1})
+        self.assertEqual(first['by_gate'], {'gate1': 1, 'gate2': 1})
+        self.assertEqual(data['totals']['checked_in'], 3)
+        self.assertEqual(data['totals']['attendance_rate'], 75.0)
+        self.assertEqual(data['totals']['by_category']['PUBLIC'], {'checked_in': 2, 'paid': 3})
+
+    def test_minute_buckets_and_window(self):
+        self.assertEqual([b['check_ins'] for b in self.arrivals(bucket=1)['buckets']], [1, 1, 1])
+
+        # Earlier arrivals still count towards the cumulative total
+        data = self.arrivals(bucket=1, **{'from': (self.base + timedelta(minutes=5)).isoformat()})
+        self.assertEqual([(b['check_ins'], b['cumulative']) for b in data['buckets']], [(1, 3)])
+
+    def test_back_filled_check_in_counted(self):
+        self.assertEqual(self.arrivals()['totals']['checked_in'], 3)
+
+        # A gate node syncs a scan made in an already closed minute
+        self.check_in('BNI004', 4, 'gate3')
+        data = self.arrivals(bucket=5)
+        self.assertEqual(data['buckets'][0]['check_ins'], 3)
+        self.assertEqual(data['buckets'][0]['by_gate']['gate3'], 1)
+
+
+class FeedbackStatsTests(TestCase):
+    """Running FeedbackStats deltas agree with a full rebuild from EventFeedback"""
+
+    def setUp(self):
+        isolate_caches(self)
+        self.registrations = [
+            create_registration(f'BNI{i:03d}', registration_for=category)
+            for i, category in enumerate(['PUBLIC', 'PUBLIC', 'STUDENTS', 'MEMBERS', 'STUDENTS', 'PUBLIC'], start=1)
+        ]
+
+    def feedback(self, registration, overall, speaker, attend_future):
+        return EventFeedback(
+            registration=registration, overall_rating=overall, speaker_rating=speaker, attend_future=attend_future
+        )
+
+    def stats_rows(self):
+        rows = {}
+        for row in FeedbackStats.objects.values():
+            del row['id'], row['updated_at']
+            rows[row.pop('category')] = row
+        return rows
+
+    def test_deltas_match_rebuild(self):
+        for registration, ratings in zip(self.registrations[:4], [(5, 4, 'YES'), (3, 3, 'MAYBE'), (4, 5, 'NO'), (2, 1, 'YES')]):
+            self.feedback(registration, *ratings).save()
+
+        # Bulk submissions add their rows per category in one go
+        created = EventFeedback.objects.bulk_create([
+            self.feedback(self.registrations[4], 1, 2, 'MAYBE'),
+            self.feedback(self.registrations[5], 5, 5, 'YES'),
+        ])
+        FeedbackStats.apply_many(created)
+
+        # Editing moves the row between buckets, deleting removes it
+        edited = EventFeedback.objects.get(registration=self.registrations[0])
+        edited.overall_rating, edited.attend_future = 2, 'NO'
+        edited.save()
+        EventFeedback.objects.get(registration=self.registrations[3]).delete()
+
+        incremental = self.stats_rows()
+        self.assertEqual(incremental['PUBLIC']['total'], 3)
+        self.assertEqual(incremental['MEMBERS']['total'], 0)
+        self.assertEqual(
+            analytics.feedback_stats_from_table(), analytics.compute_feedback_stats()
+        )
+
+        FeedbackStats.rebuild()
+        rebuilt = self.stats_rows()
+        # rebuild() only writes categories that still have feedback
+        self.assertEqual(incremental.pop('MEMBERS'), {field: 0 for field in rebuilt['PUBLIC']})
+        self.assertEqual(incremental, rebuilt)
+
+    def test_feedback_list_stats(self):
+        self.feedback(self.registrations[0], 5, 4, 'YES').save()
+        self.feedback(self.registrations[2], 3, 2, 'NO').save()
+
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user('admin', password='admin'))
+        data = client.get('/api/feedback/all/').json()
+
+        self.assertEqual(data['total_feedback'], 2)
+        self.assertEqual(data['average_rating'], 4.0)
+        self.assertEqual(data['join_bni'], {'yes': 1, 'maybe': 0, 'no': 1})
+        self.assertEqual(data['by_category']['STUDENTS']['total_feedback'], 1)
+
+
+class BookingGroupTests(TestCase):
+    """BookingGroup summaries follow member saves, moves and deletes"""
+
+    def setUp(self):
+        isolate_caches(self)
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('admin', password='admin'))
+        self.primary = create_registration('BNI001', payment_status='PENDING', booking_group_id='GRP1', is_primary_booker=True)
+        self.members = [
+            create_registration(ticket_no, registration_for=category, payment_status='PENDING', booking_group_id='GRP1', is_primary_booker=False)
+            for ticket_no, category in [('BNI002', 'PUBLIC'), ('BNI003', 'STUDENTS')]
+        ]
+
+    def test_summary_maintained_on_writes(self):
+        group = BookingGroup.objects.get(booking_group_id='GRP1')
+        self.assertEqual((group.total_attendees, group.additional_count, group.payment_status), (3, 2, 'PENDING'))
+        self.assertEqual(group.primary_ticket_no, 'BNI001')
+        self.assertEqual(group.category_breakdown, {'PUBLIC': 2, 'STUDENTS': 1})
+        self.assertEqual(group.amount_sum, 900)
+
+        # The primary pays for the whole group through the gateway
+        self.primary.payment_status, self.primary.payment_id, self.primary.amount = 'SUCCESS', 'pay_123', 750
+        self.primary.save()
+        group.refresh_from_db()
+        self.assertEqual((group.payment_status, group.success_count, group.total_amount), ('MIXED', 1, 750))
+
+    def test_moved_member_refreshes_both_groups(self):
+        member = self.members[1]
+        member.booking_group_id = 'GRP2'
+        member.save()
+
+        self.assertEqual(BookingGroup.objects.get(booking_group_id='GRP1').total_attendees, 2)
+        moved = BookingGroup.objects.get(booking_group_id='GRP2')
+        self.assertEqual((moved.total_attendees, moved.primary_ticket_no), (1, 'BNI003'))
+
+        # Losing the last member drops the group row
+        member.delete()
+        self.assertFalse(BookingGroup.objects.filter(booking_group_id='GRP2').exists())
+
+        incremental = list(BookingGroup.objects.values('booking_group_id', 'total_attendees', 'amount_sum', 'payment_status'))
+        BookingGroup.rebuild_all()
+        self.assertEqual(
+            list(BookingGroup.objects.values('booking_group_id', 'total_attendees', 'amount_sum', 'payment_status')),
+            incremental
+        )
+
+    def test_list_reads_group_rows(self):
+        with self.assertNumQueries(2):
+            data = self.client.get('/api/bulk-registrations/').json()
+
+        self.assertEqual((data['count'], data['total_attendees']), (1, 3))
+        group = data['bulk_groups'][0]
+        self.assertEqual(group['primary_booker']['ticket_no'], 'BNI001')
+        self.assertNotIn('registrations', group)
+
+        data = self.client.get('/api/bulk-registrations/', {'include_members': 1}).json()
+        self.assertEqual(len(data['bulk_groups'][0]['registrations']), 3)
+
+    def test_group_details_etag(self):
+        url = '/api/bulk-registrations/GRP1/'
+        with self.assertNumQueries(2):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['total_attendees'], 3)
+        self.assertEqual(response.json()['total_amount'], 900.0)
+        self.assertEqual([r['ticket_no'] for r in response.json()['registrations']][0], 'BNI001')
+        etag = response['ETag']
+
+        # An unchanged group is answered from the summary row alone
+        with self.assertNumQueries(1):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        self.members[0].delete()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['total_attendees'], 2)
+        self.assertNotEqual(response['ETag'], etag)
+
+        self.assertEqual(self.client.get('/api/bulk-registrations/GRP9/').status_code, 404)
+
+
+class DatabaseBackupTests(TestCase):
+    """Streamed natural-key backups restore over the live tables"""
+
+    def setUp(self):
+        isolate_caches(self)
+        self.backup_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.backup_dir, ignore_errors=True)
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'admin'))
+
+        self.registration = create_registration('BNI001', name='Original Name')
+        self.scan = ScanLog.objects.create(registration=self.registration, ticket_no='BNI001', action='CHECK_IN', scanned_by='gate1')
+        ScanLog.objects.filter(pk=self.scan.pk).update(scanned_at=timezone.now() - timedelta(days=1))
+        self.scan.refresh_from_db()
+
+    def download(self, **params):
+        response = self.client.get(reverse('admin:backup_download'), params)
+        self.assertEqual(response.status_code, 200)
+        return b''.join(response.streaming_content)
+
+    def test_streamed_backup_round_trip(self):
+        content = self.download(models='registrations.Registration,registrations.ScanLog')
+        records = [json.loads(line) for line in gzip.decompress(content).decode().splitlines()]
+
+        self.assertEqual([record['model'] for record in records], ['registrations.registration', 'registrations.scanlog'])
+        # Foreign keys are written as natural keys
+        self.assertEqual(records[1]['fields']['registration'], ['BNI001'])
+
+        path = os.path.join(self.backup_dir, 'backup.jsonl.gz')
+        with open(path, 'wb') as output:
+            output.write(content)
+
+        Registration.objects.filter(pk=self.registration.pk).update(name='Changed')
+        ScanLog.objects.filter(pk=self.scan.pk).delete()
+
+        counts = restore_backup(path)
+        self.assertEqual(counts, {'registrations.registration': 1, 'registrations.scanlog': 1})
+        self.assertEqual(Registration.objects.get(pk=self.registration.pk).name, 'Original Name')
+        restored = ScanLog.objects.get(pk=self.scan.pk)
+        self.assertEqual((restored.registration_id, restored.scanned_at), (self.registration.pk, self.scan.scanned_at))
+
+    def test_backup_to_file(self):
+        with override_settings(BACKUP_FILE_DIR=self.backup_dir):
+            response = self.client.get(reverse('admin:backup_download'), {'models': 'registrations.ScanLog', 'to_file': '1'})
+            self.assertEqual(response.json()['objects'], 1)
+
+            download = self.client.get(response.json()['download_url'])
+            self.assertEqual(download.status_code, 200)
+            self.assertTrue(os.path.exists(os.path.join(self.backup_dir, response.json()['filename'])))
+
+            # Only names produced by the backup view are served
+            self.assertEqual(self.client.get(reverse('admin:backup_file', args=['manifest.json'])).status_code, 404)
+
+    def test_unknown_model_rejected(self):
+        response = self.client.get(reverse('admin:backup_download'), {'models': 'registrations.Nothing'})
+        self.assertEqual(response.status_code, 400)
+
+
+class SnapshotTests(TestCase):
+    """A full snapshot plus increments replays edits, inserts and tombstoned deletes"""
+
+    def setUp(self):
+        isolate_caches(self)
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+
+        self.kept = create_registration('BNI001', name='Kept')
+        self.removed = create_registration('BNI002', name='Removed')
+        ScanLog.objects.create(registration=self.removed, ticket_no='BNI002', action='CHECK_IN', scanned_by='gate1')
+
+    def state(self):
+        return (
+            sorted(Registration.objects.values_list('pk', 'ticket_no', 'name')),
+            sorted(ScanLog.objects.values_list('pk', 'ticket_no', 'scanned_at')),
+        )
+
+    def test_incremental_chain_round_trip(self):
+        full = take_snapshot(self.directory)
+        full_state = self.state()
+
+        self.kept.name = 'Kept (edited)'
+        self.kept.save()
+        removed_pk = self.removed.pk
+        self.removed.delete()
+        create_registration('BNI003', name='Added')
+        # Synced from a gate node: old scan time, new row
+        late = ScanLog.objects.create(registration=self.kept, ticket_no='BNI001', action='CHECK_IN', scanned_by='gate2')
+        ScanLog.objects.filter(pk=late.pk).update(scanned_at=timezone.now() - timedelta(days=2))
+
+        increment = take_snapshot(self.directory)
+        latest_state = self.state()
+        self.assertEqual((increment['kind'], increment['parent'], increment['deleted']), ('incremental', full['name'], 1))
+        self.assertEqual([entry['name'] for entry in read_manifest(self.directory)['snapshots']], [full['name'], increment['name']])
+
+        Registration.objects.all().delete()
+
+        restore_snapshots(self.directory, target=full['name'])
+        self.assertEqual(self.state(), full_state)
+
+        # The tombstone removes the registration (and its scans) again
+        chain, counts, deleted = restore_snapshots(self.directory)
+        self.assertEqual([entry['name'] for entry in chain], [full['name'], increment['name']])
+        self.assertEqual(deleted['registrations.registration'], 1)
+        self.assertEqual(self.state(), latest_state)
+        self.assertFalse(Registration.objects.filter(pk=removed_pk).exists())
+
+    def test_corrupt_snapshot_rejected(self):
+        entry = take_snapshot(self.directory)
+        with open(os.path.join(self.directory, entry['name']), 'ab') as output:
+            output.write(b'garbage')
+
+        with self.assertRaisesMessage(ValueError, 'Checksum mismatch'):
+            restore_snapshots(self.directory)
+        self.assertEqual(Registration.objects.count(), 2)
+
+
+class RegistrationExportTests(TestCase):
+    """Streamed registration exports: column selection, filters and formats"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('admin', password='admin'))
+        paid_on = timezone.now() - timedelta(days=3)
+        create_registration('BNI001', payment_id='pay_1', gateway_verified=True, payment_date=paid_on)
+        create_registration('BNI002', registration_for='STUDENTS', amount=150, payment_id='pay_2', payment_date=paid_on)
+        create_registration('BNI003', payment_status='PENDING')
+        self.paid_on = paid_on.date()
+
+    def export(self, **params):
+        response = self.client.get('/api/registrations/export/', params)
+        self.assertEqual(response.status_code, 200)
+        return response, b''.join(response.streaming_content)
+
+    def test_default_csv_columns(self):
+        response, content = self.export()
+        rows = list(csv.reader(content.decode().splitlines()))
+
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        self.assertEqual(rows[0], PAYMENT_REPORT_COLUMNS)
+        self.assertEqual([row[0] for row in rows[1:]], ['BNI001', 'BNI002', 'BNI003'])
+
+    def test_filters_and_selected_fields(self):
+        def tickets(**params):
+            _, content = self.export(fields='ticket_no,amount', file_format='jsonl', **params)
+            return [json.loads(line)['ticket_no'] for line in content.decode().splitlines()]
+
+        self.assertEqual(tickets(payment_status='SUCCESS', category='PUBLIC'), ['BNI001'])
+        self.assertEqual(tickets(gateway_verified='false'), ['BNI002', 'BNI003'])
+        self.assertEqual(tickets(date_field='payment_date', date_to=self.paid_on.isoformat()), ['BNI001', 'BNI002'])
+        self.assertEqual(tickets(date_from=(self.paid_on + timedelta(days=1)).isoformat()), ['BNI001', 'BNI002', 'BNI003'])
+
+        _, content = self.export(fields='ticket_no,amount', file_format='jsonl', category='STUDENTS')
+        self.assertEqual(json.loads(content), {'ticket_no': 'BNI002', 'amount': '150.00'})
+
+    def test_gzip_and_xlsx(self):
+        response, content = self.export(fields='ticket_no,name', gzip='1')
+        self.assertTrue(response['Content-Disposition'].endswith('.csv.gz"'))
+        self.assertEqual(gzip.decompress(content).decode().splitlines()[:2], ['ticket_no,name', 'BNI001,Attendee 1'])
+
+        _, content = self.export(fields='ticket_no,name', file_format='xlsx')
+        with zipfile.ZipFile(io.BytesIO(content)) as workbook:
+            sheet = workbook.read('xl/worksheets/sheet1.xml').decode()
+        self.assertIn('Attendee 3', sheet)
+
+    def test_invalid_parameters(self):
+        for params in ({'fields': 'ticket_no,password'}, {'file_format': 'pdf'}, {'date_field': 'updated_at'}):
+            response = self.client.get('/api/registrations/export/', params)
+            self.assertEqual(response.status_code, 400, params)
+
+
+class MemberSyncTests(TestCase):
+    """Member sync endpoints upsert whole rosters with a fixed number of queries"""
+
+    def setUp(self):
+        isolate_caches(self)
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('admin', password='admin'))
+        SponsorTicketLimit.objects.create(sponsor_type='GOLD', ticket_limit=6)
+
+    def roster(self, size, company='Acme'):
+        return [
+            {'name': f'Member {i}', 'company': f'{company} {i}', 'sponsor_type': 'GOLD' if i == 0 else 'BNI_MEMBERS'}
+            for i in range(size)
+        ]
+
+    def bulk_create(self, members, chapter='BNI_CHETTINAD'):
+        response = self.client.post('/api/bni-members/bulk_create/', {'chapter': chapter, 'members': members}, format='json')
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_query_count_independent_of_roster_size(self):
+        SponsorTicketLimit.limits()  # loaded once, then served from the config cache
+        counts = []
+        for chapter, size in [('BNI_CHETTINAD', 5), ('BNI_MADURAI', 50)]:
+            with CaptureQueriesContext(connection) as queries:
+                self.assertEqual(self.bulk_create(self.roster(size), chapter)['created'], size)
+            counts.append(len(queries))
+        self.assertEqual(counts[0], counts[1])
+
+        gold = BNIMember.objects.get(name='Member 0', chapter='BNI_MADURAI')
+        self.assertEqual((gold.sponsor_type, gold.ticket_limit), ('GOLD', 6))
+
+    def test_resync_reports_changes(self):
+        self.bulk_create(self.roster(3))
+        members = self.roster(3)
+        members[1]['company'] = 'Renamed Ltd'
+
+        result = self.bulk_create(members)
+        self.assertEqual((result['created'], result['updated'], result['unchanged']), (0, 1, 2))
+        self.assertEqual(BNIMember.objects.get(name='Member 1').company, 'Renamed Ltd')
+        self.assertEqual(BNIMember.objects.count(), 3)
+
+    def test_sync_members_accepts_frontend_payload(self):
+        response = self.client.post('/api/sync-members/', {
+            'chapter': 'BNI_THALAIVAS',
+            'members': [
+                {'name': 'Asha', 'company': 'Asha Foods', 'sponsorType': 'GOLD', 'mobile': '9876543210'},
+                {'name': 'Bala', 'company': ''},
+            ]
+        }, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.json()['created'], len(response.json()['errors'])), (1, 1))
+        self.assertEqual(BNIMember.objects.get(name='Asha').ticket_limit, 6)
+
+
+class MemberImporterTests(TestCase):
+    """Roster rows match members by normalized name and repeated rows collapse to the last one"""
+
+    def setUp(self):
+        isolate_caches(self)
+        BNIMember.objects.create(name='R. Kumar', company='Kumar Traders', chapter='BNI_CHETTINAD', sponsor_type='BNI_MEMBERS')
+        BNIMember.objects.create(name='Leaving Member', company='Old Co', chapter='BNI_CHETTINAD', sponsor_type='BNI_MEMBERS')
+
+    def test_normalize_name(self):
+        self.assertEqual(normalize_name('  R.  KUMAR '), normalize_name('r kumar'))
+        self.assertNotEqual(normalize_name('R Kumar'), normalize_name('Rkumar'))
+
+    def test_name_matching_and_dedupe(self):
+        importer = MemberImporter(chapter='BNI_CHETTINAD', chunk_size=2)
+        summary = importer.run([
+            {'Member Name': 'r  kumar', 'Company Name': 'Kumar & Sons'},
+            {'name': 'Priya', 'company': 'First Co'},
+            {'name': 'Nobody', 'company': 'Lost', 'chapter': 'BNI_ELSEWHERE'},
+            {'name': 'PRIYA', 'company': 'Second Co', 'sponsor': 'Gold Sponsor'},
+        ])
+        importer.deactivate_missing()
+
+        self.assertEqual((summary['created'], summary['updated'], summary['unchanged']), (1, 1, 0))
+        self.assertEqual(len(summary['duplicates']), 1)
+        self.assertIn('Row 4: PRIYA repeats row 2', summary['duplicates'][0])
+        self.assertEqual(len(summary['errors']), 1)
+        self.assertIn('unknown chapter BNI_ELSEWHERE', summary['errors'][0])
+
+        # The stored spelling is kept; the later duplicate row wins
+        self.assertEqual(BNIMember.objects.get(name='R. Kumar').company, 'Kumar & Sons')
+        priya = BNIMember.objects.get(chapter='BNI_CHETTINAD', name__iexact='priya')
+        self.assertEqual((priya.company, priya.sponsor_type), ('Second Co', 'GOLD'))
+        self.assertEqual(BNIMember.objects.filter(chapter='BNI_CHETTINAD').count(), 3)
+        self.assertFalse(BNIMember.objects.get(name='Leaving Member').is_active)
+
+    def test_command_reads_csv_roster(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        path = os.path.join(directory, 'roster.csv')
+        with open(path, 'w', encoding='utf-8-sig', newline='') as roster:
+            roster.write('Name,Company,Sponsor Type,Chapter\n')
+            roster.write('R Kumar,Kumar Traders,BNI_MEMBERS,bni chettinad\n')
+            roster.write('Meena,Meena Prints,SILVER,BNI_MADURAI\n')
+
+        output = io.StringIO()
+        call_command('import_members', path, '--dry-run', stdout=output)
+        self.assertIn('Created: 1', output.getvalue())
+        self.assertFalse(BNIMember.objects.filter(name='Meena').exists())
+
+        call_command('import_members', path, stdout=io.StringIO())
+        self.assertEqual(BNIMember.objects.get(name='Meena').chapter, 'BNI_MADURAI')
+        self.assertEqual(BNIMember.objects.filter(name__icontains='kumar').count(), 1)
+
+
+@override_settings(CONFIG_CACHE_CHECK_SECONDS=0)
+class ConfigSnapshotTests(TestCase):
+    """In-process config snapshots reload only after a committed version change"""
+
+    def setUp(self):
+        isolate_caches(self)
+
+    def test_other_workers_reload_after_commit(self):
+        loads = []
+
+        def load():
+            loads.append(1)
+            return {'version': len(loads)}
+
+        # Two snapshots of the same table stand in for two worker processes
+        worker_a, worker_b = TableSnapshot('test_table', load), TableSnapshot('test_table', load)
+        self.assertEqual((worker_a.get(), worker_b.get()), ({'version': 1}, {'version': 2}))
+        # Unchanged version - both keep their copy
+        self.assertEqual((worker_a.get(), worker_b.get()), ({'version': 1}, {'version': 2}))
+        self.assertEqual(len(loads), 2)
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            worker_a.invalidate()
+            # Not committed yet - other workers keep their copy
+            self.assertEqual(worker_b.get(), {'version': 2})
+        for callback in callbacks:
+            callback()
+
+        self.assertEqual(worker_b.get(), {'version': 3})
+        self.assertEqual(worker_a.get(), {'version': 4})
+        self.assertEqual(worker_b.get(), {'version': 3})
+
+    def test_ticket_limit_follows_changes(self):
+        self.assertEqual(SponsorTicketLimit.get_limit('TITLE_SPONSORS'), 10)
+        with self.assertNumQueries(0):
+            self.assertEqual(SponsorTicketLimit.get_limit('GOLD'), 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            limit = SponsorTicketLimit.objects.create(sponsor_type='GOLD', ticket_limit=5)
+        self.assertEqual(SponsorTicketLimit.get_limit('GOLD'), 5)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            limit.is_active = False
+            limit.save()
+        self.assertNotIn('GOLD', SponsorTicketLimit.limits())
+        self.assertEqual(SponsorTicketLimit.get_limit('GOLD'), 1)
+
+
+class PublicResponseCacheTests(TestCase):
+    """Cached public responses: 304 revalidation, per-URL entries and invalidation on commit"""
+
+    url = '/api/sponsors/active_sponsors/'
+
+    def setUp(self):
+        isolate_caches(self)
+        self.client = APIClient()
+        Sponsor.objects.create(category='TITLE_SPONSORS', logo_url='https://example.com/title.png', company_name='Title Co')
+
+    def counters(self):
+        return dict(public_response_metrics().get('sponsors', {'hits': 0, 'misses': 0, 'not_modified': 0}))
+
+    def test_cached_until_sponsor_changes(self):
+        before = self.counters()
+        response = self.client.get(self.url)
+        etag = response['ETag']
+        self.assertEqual([s['company_name'] for s in response.json()['title_sponsors']], ['Title Co'])
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(self.url).json(), response.json())
+            self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        after = self.counters()
+        self.assertEqual(
+            [after[outcome] - before[outcome] for outcome in ('misses', 'hits', 'not_modified')], [1, 1, 1]
+        )
+
+        # The version only moves once the change commits
+        with self.captureOnCommitCallbacks() as callbacks:
+            Sponsor.objects.create(category='CO_SPONSORS', logo_url='https://example.com/co.png', company_name='Co Co')
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        for callback in callbacks:
+            callback()
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual([s['company_name'] for s in response.json()['co_sponsors']], ['Co Co'])
+
+    def test_entries_per_url(self):
+        first = self.client.get(self.url)
+        second = self.client.get(self.url, {'page': 2})
+        self.assertNotEqual(first['ETag'], second['ETag'])
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=first['ETag']).status_code, 304)
+        self.assertEqual(self.client.get(self.url, {'page': 2}, HTTP_IF_NONE_MATCH=first['ETag']).status_code, 200)
 
-# Create your tests here.
@@ -3,13 +3,14 @@ from rest_framework.routers import DefaultRouter
 from .views import (
     RegistrationViewSet, EventSettingsViewSet, ScanLogViewSet, SponsorViewSet,
     SponsorTicketLimitViewSet, BNIMemberViewSet, IDCardTemplateViewSet, bulk_registration,
-    sync_members_to_database, get_bulk_registrations, get_bulk_group_details,
-    scan_ticket, scan_qr_dual_behavior, submit_feedback, check_feedback_status, get_all_feedback, delete_feedback,
+    sync_members_to_database, get_bulk_registrations, get_bulk_group_details, cache_metrics,
+    scan_ticket, scan_qr_dual_behavior, submit_feedback, submit_feedback_bulk, check_feedback_status, get_all_feedback, export_feedback, delete_feedback,
     vip_registration,
     special_registration
 )
-from .payment_views import create_payment_order, verify_payment, payment_webhook
-from .otp_views import send_otp, verify_otp, resend_otp
+from .payment_views import create_payment_order, verify_payment, payment_webhook, payment_reconciliation
+from .otp_views import send_otp, verify_otp, resend_otp, notification_metrics
+from .image_views import drive_image, image_variant
 
 router = DefaultRouter()
 router.register(r'registrations', RegistrationViewSet)
@@ -35,17 +36,25 @@ urlpatterns = [
     path('scan-qr/<str:ticket_no>/', scan_qr_dual_behavior, name='scan_qr_dual_behavior'),
     # Feedback endpoints
     path('feedback/submit/', submit_feedback, name='submit_feedback'),
+    path('feedback/submit-bulk/', submit_feedback_bulk, name='submit_feedback_bulk'),
     path('feedback/check/<str:ticket_no>/', check_feedback_status, name='check_feedback_status'),
     path('feedback/all/', get_all_feedback, name='get_all_feedback'),
+    path('feedback/export/', export_feedback, name='export_feedback'),
     path('feedback/delete/<int:feedback_id>/', delete_feedback, name='delete_feedback'),
     # Payment endpoints
     path('payment/create-order/', create_payment_order, name='create_payment_order'),
     path('payment/verify/', verify_payment, name='verify_payment'),
     path('payment/webhook/', payment_webhook, name='payment_webhook'),
+    path('payment/reconciliation/', payment_reconciliation, name='payment_reconciliation'),
     # OTP endpoints
     path('otp/send/', send_otp, name='send_otp'),
     path('otp/verify/', verify_otp, name='verify_otp'),
     path('otp/resend/', resend_otp, name='resend_otp'),
+    path('notifications/metrics/', notification_metrics, name='notification_metrics'),
+    path('cache/metrics/', cache_metrics, name='cache_metrics'),
+    # Google Drive image proxy (sponsor logos, ID card templates)
+    path('images/drive/<str:file_id>/', drive_image, name='drive_image'),
+    path('images/<str:content_hash>/<str:variant>', image_variant, name='image_variant'),
     # VIP registration endpoint
     path('vip-registration/', vip_registration, name='vip_registration'),
     # Special registration endpoint (Volunteers & Organisers)
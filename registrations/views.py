@@ -3,16 +3,57 @@ from rest_framework.decorators import api_view, permission_classes, action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
+from rest_framework.exceptions import ValidationError
 from django.http import HttpResponse
+from django.conf import settings as django_settings
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime, parse_date
 from django.db import transaction, models
 from django.db.models import Count, Sum, Min, Max, Q
-from .models import Registration, EventSettings, ScanLog, Sponsor, SponsorTicketLimit, BNIMember, IDCardTemplate, EventFeedback
+from .models import Registration, BookingGroup, EventSettings, ScanLog, Sponsor, SponsorTicketLimit, BNIMember, IDCardTemplate, EventFeedback
 from .serializers import RegistrationSerializer, EventSettingsSerializer, ScanLogSerializer, SponsorSerializer, SponsorTicketLimitSerializer, BNIMemberSerializer, IDCardTemplateSerializer, EventFeedbackSerializer, EventFeedbackSubmitSerializer
 from .id_card_generator import generate_id_card, save_id_card
+from .pagination import ScanLogCursorPagination, FeedbackCursorPagination, BulkGroupCursorPagination
+from .cache_utils import get_scan_qr_data, make_etag, etag_matches, set_revalidate_headers, cached_public_response, public_response_metrics
+from .analytics import get_arrival_stats, invalidate_arrival_stats, get_feedback_stats
+from .feedback_queue import get_feedback_queue, save_feedback_batch
+from .exports import streaming_export, EXPORT_FORMATS
+from .member_import import MemberImporter
 import uuid
 import zipfile
 import io
 
+# Columns available to registrations/export/ (name -> field lookup), in file order
+REGISTRATION_EXPORT_COLUMNS = {
+    'ticket_no': 'ticket_no',
+    'name': 'name',
+    'mobile_number': 'mobile_number',
+    'email': 'email',
+    'age': 'age',
+    'location': 'location',
+    'company_name': 'company_name',
+    'referred_by': 'referred_by',
+    'registration_for': 'registration_for',
+    'sponsor_type': 'sponsor_type',
+    'is_primary_booker': 'is_primary_booker',
+    'booking_group_id': 'booking_group_id',
+    'primary_booker_name': 'primary_booker_name',
+    'payment_status': 'payment_status',
+    'gateway_verified': 'gateway_verified',
+    'amount': 'amount',
+    'payment_id': 'payment_id',
+    'order_id': 'order_id',
+    'payment_date': 'payment_date',
+    'created_at': 'created_at',
+}
+
+# Default export columns (the payment report)
+PAYMENT_REPORT_COLUMNS = [
+    'ticket_no', 'name', 'mobile_number', 'email', 'registration_for', 'payment_status',
+    'gateway_verified', 'amount', 'payment_id', 'order_id', 'payment_date', 'created_at',
+]
+
+
 class RegistrationViewSet(viewsets.ModelViewSet):
     queryset = Registration.objects.all()
     serializer_class = RegistrationSerializer
@@ -329,6 +370,79 @@ class RegistrationViewSet(viewsets.ModelViewSet):
         except Exception as e:
             return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """
+        Stream registrations as a file download (admin only)
+
+        Query params:
+            file_format: csv (default), xlsx or jsonl
+            gzip: 1 to gzip a csv/jsonl download
+            fields: comma-separated columns (default: the payment report columns)
+            category, payment_status: exact filters
+            gateway_verified: true or false
+            date_from, date_to: YYYY-MM-DD, inclusive
+            date_field: created_at (default) or payment_date
+        """
+        try:
+            params = request.query_params
+            export_format = params.get('file_format', 'csv')
+            if export_format not in EXPORT_FORMATS:
+                return Response({
+                    'error': f"file_format must be one of: {', '.join(EXPORT_FORMATS)}"
+                }, status=status.HTTP_400_BAD_REQUEST)
+
+            fields = [field.strip() for field in params.get('fields', '').split(',') if field.strip()] or PAYMENT_REPORT_COLUMNS
+            unknown = [field for field in fields if field not in REGISTRATION_EXPORT_COLUMNS]
+            if unknown:
+                return Response({
+                    'error': f"Unknown fields: {', '.join(unknown)}"
+                }, status=status.HTTP_400_BAD_REQUEST)
+
+            date_field = params.get('date_field', 'created_at')
+            if date_field not in ('created_at', 'payment_date'):
+                return Response({
+                    'error': 'date_field must be created_at or payment_date'
+                }, status=status.HTTP_400_BAD_REQUEST)
+
+            queryset = Registration.objects.all()
+
+            category = params.get('category')
+            if category and category != 'ALL':
+                queryset = queryset.filter(registration_for=category)
+
+            payment_status = params.get('payment_status')
+            if payment_status and payment_status != 'ALL':
+                queryset = queryset.filter(payment_status=payment_status)
+
+            gateway_verified = params.get('gateway_verified')
+            if gateway_verified in ('true', 'false'):
+                queryset = queryset.filter(gateway_verified=gateway_verified == 'true')
+
+            date_from = parse_date(params.get('date_from', '') or '')
+            if date_from:
+                queryset = queryset.filter(**{f'{date_field}__date__gte': date_from})
+
+            date_to = parse_date(params.get('date_to', '') or '')
+            if date_to:
+                queryset = queryset.filter(**{f'{date_field}__date__lte': date_to})
+
+            rows = queryset.order_by('id').values_list(
+                *[REGISTRATION_EXPORT_COLUMNS[field] for field in fields]
+            ).iterator(chunk_size=2000)
+
+            stamp = timezone.now().strftime('%Y%m%d_%H%M%S')
+            return streaming_export(
+                fields,
+                rows,
+                f'registrations_{stamp}',
+                export_format=export_format,
+                compress=params.get('gzip') in ('1', 'true')
+            )
+
+        except Exception as e:
+            return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
     @action(detail=False, methods=['get'], url_path='download-id-cards-zip')
     def download_id_cards_zip(self, request):
         """Generate and return a ZIP file containing ID cards for filtered registrations"""
@@ -386,11 +500,53 @@ class RegistrationViewSet(viewsets.ModelViewSet):
         except Exception as e:
             return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+def query_datetime(params, name):
+    """
+    Parse an ISO date/time query parameter (None when absent or not ISO)
+    Raises ValidationError (400) for impossible dates like 2026-02-31T00:00
+    """
+    try:
+        return parse_datetime(params.get(name, '') or '')
+    except ValueError:
+        raise ValidationError({name: 'Invalid date/time'})
+
+
 class ScanLogViewSet(viewsets.ModelViewSet):
     """ViewSet for scan logs - tracks all ticket check-ins"""
     queryset = ScanLog.objects.all().select_related('registration')
     serializer_class = ScanLogSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = ScanLogCursorPagination
+
+    def get_queryset(self):
+        """
+        Server-side filters for the scan log list
+        ?action=CHECK_IN&ticket=BNI001&scanned_by=scanner&from=<iso>&to=<iso>
+        """
+        queryset = super().get_queryset()
+        params = self.request.query_params
+
+        action_filter = params.get('action')
+        if action_filter:
+            queryset = queryset.filter(action=action_filter)
+
+        ticket_no = params.get('ticket')
+        if ticket_no:
+            queryset = queryset.filter(ticket_no=ticket_no)
+
+        scanned_by = params.get('scanned_by')
+        if scanned_by:
+            queryset = queryset.filter(scanned_by=scanned_by)
+
+        scanned_from = query_datetime(params, 'from')
+        if scanned_from:
+            queryset = queryset.filter(scanned_at__gte=scanned_from)
+
+        scanned_to = query_datetime(params, 'to')
+        if scanned_to:
+            queryset = queryset.filter(scanned_at__lt=scanned_to)
+
+        return queryset
 
     @action(detail=False, methods=['post'])
     def log_scan(self, request):
@@ -422,12 +578,32 @@ class ScanLogViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(scan_log)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
+    @action(detail=False, methods=['get'])
+    def arrivals(self, request):
+        """
+        Arrival-rate analytics: first check-ins bucketed per 1 or 5 minutes,
+        broken down by category and gate, with cumulative attendance vs paid
+        ?bucket=5&from=<iso>&to=<iso>
+        """
+        try:
+            bucket_minutes = int(request.query_params.get('bucket', 5))
+        except ValueError:
+            bucket_minutes = 0
+        if bucket_minutes not in (1, 5):
+            return Response({'error': 'bucket must be 1 or 5'}, status=status.HTTP_400_BAD_REQUEST)
+
+        start = query_datetime(request.query_params, 'from')
+        end = query_datetime(request.query_params, 'to')
+
+        stats = get_arrival_stats(bucket_minutes=bucket_minutes, start=start, end=end)
+        return Response({'success': True, **stats}, status=status.HTTP_200_OK)
+
     @action(detail=False, methods=['delete'])
     def delete_all(self, request):
         """Delete all scan logs - admin only"""
         try:
-            deleted_count = ScanLog.objects.all().count()
-            ScanLog.objects.all().delete()
+            deleted_count = ScanLog.delete_in_chunks()
+            invalidate_arrival_stats()
             return Response({
                 'success': True,
                 'message': f'Successfully deleted {deleted_count} scan logs',
@@ -443,10 +619,12 @@ class EventSettingsViewSet(viewsets.ViewSet):
     parser_classes = (MultiPartParser, FormParser, JSONParser)
 
     def list(self, request):
-        """Get event settings (public access)"""
-        settings = EventSettings.get_settings()
-        serializer = EventSettingsSerializer(settings, context={'request': request})
-        return Response(serializer.data)
+        """Get event settings (public access, cached until settings change)"""
+        def build():
+            settings = EventSettings.get_settings()
+            return EventSettingsSerializer(settings, context={'request': request}).data
+
+        return cached_public_response(request, 'event_settings', build)
 
     def update(self, request, pk=None):
         """Update event settings - PUT (requires authentication)"""
@@ -638,16 +816,20 @@ class SponsorViewSet(viewsets.ModelViewSet):
 
     @action(detail=False, methods=['get'], permission_classes=[AllowAny])
     def active_sponsors(self, request):
-        """Get all active sponsors grouped by category"""
-        title_sponsors = self.queryset.filter(category='TITLE_SPONSORS', is_active=True)
-        associate_sponsors = self.queryset.filter(category='ASSOCIATE_SPONSORS', is_active=True)
-        co_sponsors = self.queryset.filter(category='CO_SPONSORS', is_active=True)
+        """Get all active sponsors grouped by category (one query, cached until a sponsor changes)"""
+        def build():
+            grouped = {'TITLE_SPONSORS': [], 'ASSOCIATE_SPONSORS': [], 'CO_SPONSORS': []}
+            sponsors = self.queryset.filter(category__in=list(grouped), is_active=True)
+            for sponsor in SponsorSerializer(sponsors, many=True, context={'request': request}).data:
+                grouped[sponsor['category']].append(sponsor)
+
+            return {
+                'title_sponsors': grouped['TITLE_SPONSORS'],
+                'associate_sponsors': grouped['ASSOCIATE_SPONSORS'],
+                'co_sponsors': grouped['CO_SPONSORS']
+            }
 
-        return Response({
-            'title_sponsors': SponsorSerializer(title_sponsors, many=True).data,
-            'associate_sponsors': SponsorSerializer(associate_sponsors, many=True).data,
-            'co_sponsors': SponsorSerializer(co_sponsors, many=True).data
-        })
+        return cached_public_response(request, 'sponsors', build)
 
 
 class SponsorTicketLimitViewSet(viewsets.ReadOnlyModelViewSet):
@@ -661,15 +843,15 @@ class SponsorTicketLimitViewSet(viewsets.ReadOnlyModelViewSet):
 
     @action(detail=False, methods=['get'], permission_classes=[AllowAny])
     def all_limits(self, request):
-        """Get all active sponsor ticket limits as a simple mapping"""
-        limits = {}
-        for limit_obj in self.queryset:
-            limits[limit_obj.sponsor_type] = limit_obj.ticket_limit
+        """Get all active sponsor ticket limits as a simple mapping (one query, cached until a limit changes)"""
+        def build():
+            details = SponsorTicketLimitSerializer(self.get_queryset(), many=True).data
+            return {
+                'limits': {limit['sponsor_type']: limit['ticket_limit'] for limit in details},
+                'details': details
+            }
 
-        return Response({
-            'limits': limits,
-            'details': SponsorTicketLimitSerializer(self.queryset, many=True).data
-        })
+        return cached_public_response(request, 'ticket_limits', build)
 
 
 class BNIMemberViewSet(viewsets.ModelViewSet):
@@ -783,48 +965,16 @@ class BNIMemberViewSet(viewsets.ModelViewSet):
         if not members_data:
             return Response({'error': 'No members provided'}, status=status.HTTP_400_BAD_REQUEST)
 
-        created_count = 0
-        updated_count = 0
-        errors = []
-
-        for member_data in members_data:
-            try:
-                name = member_data.get('name')
-                company = member_data.get('company')
-                sponsor_type = member_data.get('sponsor_type', 'BNI_MEMBERS')
-
-                if not name or not company:
-                    errors.append(f"Skip: missing data - {member_data}")
-                    continue
-
-                ticket_limit = SponsorTicketLimit.get_limit(sponsor_type)
-
-                obj, created = BNIMember.objects.update_or_create(
-                    name=name,
-                    chapter=chapter,
-                    defaults={
-                        'company': company,
-                        'sponsor_type': sponsor_type,
-                        'ticket_limit': ticket_limit,
-                        'is_active': True
-                    }
-                )
-
-                if created:
-                    created_count += 1
-                else:
-                    updated_count += 1
-
-            except Exception as e:
-                errors.append(f"Error: {member_data.get('name', 'unknown')} - {str(e)}")
+        result = BNIMember.bulk_upsert(chapter, members_data)
 
         return Response({
             'success': True,
             'chapter': chapter,
-            'created': created_count,
-            'updated': updated_count,
+            'created': result['created'],
+            'updated': result['updated'],
+            'unchanged': result['unchanged'],
             'total': len(members_data),
-            'errors': errors
+            'errors': result['errors']
         }, status=status.HTTP_200_OK)
 
 
@@ -853,6 +1003,13 @@ class IDCardTemplateViewSet(viewsets.ModelViewSet):
             queryset = queryset.filter(category=category)
         return queryset.order_by('category')
 
+    def list(self, request, *args, **kwargs):
+        """List templates (cached per ?category= until a template changes)"""
+        return cached_public_response(
+            request, 'id_card_templates',
+            lambda: self.get_serializer(self.filter_queryset(self.get_queryset()), many=True).data
+        )
+
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
@@ -871,47 +1028,17 @@ def sync_members_to_database(request):
                 'error': 'No members provided'
             }, status=status.HTTP_400_BAD_REQUEST)
 
-        from .models import BNIMember
-
-        updated_count = 0
-        created_count = 0
-        errors = []
-
-        for member in members:
-            name = member.get('name')
-            company = member.get('company')
-            sponsor_type = member.get('sponsorType') or 'BNI_MEMBERS'
-
-            if not name or not company:
-                errors.append(f"Skipped member with missing name or company")
-                continue
-
-            # Get ticket limit based on sponsor type
-            ticket_limit = SponsorTicketLimit.get_limit(sponsor_type)
-
-            # Update or create member in database
-            obj, created = BNIMember.objects.update_or_create(
-                name=name,
-                chapter=chapter,
-                defaults={
-                    'company': company,
-                    'sponsor_type': sponsor_type,
-                    'ticket_limit': ticket_limit,
-                    'is_active': True
-                }
-            )
-
-            if created:
-                created_count += 1
-            else:
-                updated_count += 1
+        # Same engine as the import_members command (sponsorType is accepted as sponsor_type)
+        result = MemberImporter(chapter=chapter).run(members)
 
         return Response({
             'success': True,
-            'created': created_count,
-            'updated': updated_count,
+            'created': result['created'],
+            'updated': result['updated'],
+            'unchanged': result['unchanged'],
             'total': len(members),
-            'errors': errors
+            'duplicates': result['duplicates'],
+            'errors': result['errors']
         }, status=status.HTTP_200_OK)
 
     except Exception as e:
@@ -920,107 +1047,78 @@ def sync_members_to_database(request):
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def cache_metrics(request):
+    """
+    Hit/miss counters of the cached public endpoints for this worker process
+    """
+    return Response({
+        'success': True,
+        'responses': public_response_metrics()
+    }, status=status.HTTP_200_OK)
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def get_bulk_registrations(request):
     """
     Get all bulk registrations grouped by booking_group_id
-    Returns aggregated data for each bulk booking group
+    Returns the maintained BookingGroup summaries (one row per group, no
+    member scan). Member rows are only included with ?include_members=1 (the
+    admin page loads them from bulk-registrations/<id>/ when a group is
+    expanded). Send ?page_size= or ?cursor= to page through groups, newest first.
     """
     try:
-        # Get all registrations with booking_group_id
-        bulk_regs = Registration.objects.filter(
-            booking_group_id__isnull=False
-        ).order_by('-created_at')
-
-        # Group by booking_group_id
-        groups_dict = {}
-        for reg in bulk_regs:
-            group_id = reg.booking_group_id
-            if group_id not in groups_dict:
-                groups_dict[group_id] = []
-            groups_dict[group_id].append(reg)
-
-        # Build response data
-        bulk_groups = []
-        for group_id, registrations in groups_dict.items():
-            # Find primary member
-            primary_member = next((r for r in registrations if r.is_primary_booker), registrations[0])
-            additional_members = [r for r in registrations if not r.is_primary_booker]
-
-            # Calculate totals
-            # For bulk bookings, only count the primary booker's amount (actual payment received)
-            # Additional members show individual amounts but payment was made by primary
-            primary_with_payment = next((r for r in registrations if r.is_primary_booker and r.payment_id), None)
-            if primary_with_payment:
-                # Use only the primary's payment amount (what was actually received from gateway)
-                total_amount = float(primary_with_payment.amount)
-            else:
-                # Fallback to sum of all (for pending/failed bookings or old data)
-                total_amount = sum(float(r.amount) for r in registrations)
-
-            total_count = len(registrations)
-
-            # Determine overall payment status
-            payment_statuses = [r.payment_status for r in registrations]
-            if all(s == 'SUCCESS' for s in payment_statuses):
-                overall_status = 'SUCCESS'
-            elif all(s == 'PENDING' for s in payment_statuses):
-                overall_status = 'PENDING'
-            elif all(s == 'FAILED' for s in payment_statuses):
-                overall_status = 'FAILED'
-            else:
-                overall_status = 'MIXED'
+        groups = BookingGroup.objects.all()
 
-            # Get category breakdown
-            category_counts = {}
-            for reg in registrations:
-                cat = reg.registration_for
-                category_counts[cat] = category_counts.get(cat, 0) + 1
+        paginator = BulkGroupCursorPagination()
+        page = paginator.paginate_queryset(groups, request)
+        group_list = page if page is not None else list(groups)
 
-            bulk_groups.append({
-                'booking_group_id': group_id,
+        members_by_group = {}
+        if request.query_params.get('include_members') in ('1', 'true'):
+            members = Registration.objects.filter(
+                booking_group_id__in=[group.booking_group_id for group in group_list]
+            ).order_by('-created_at')
+            for member in members:
+                members_by_group.setdefault(member.booking_group_id, []).append(_bulk_member(member))
+
+        bulk_groups = []
+        for group in group_list:
+            data = {
+                'booking_group_id': group.booking_group_id,
                 'primary_booker': {
-                    'id': primary_member.id,
-                    'name': primary_member.primary_booker_name or primary_member.name,
-                    'email': primary_member.primary_booker_email or primary_member.email,
-                    'mobile': primary_member.primary_booker_mobile or primary_member.mobile_number,
-                    'ticket_no': primary_member.ticket_no,
+                    'id': group.primary_registration_id,
+                    'name': group.primary_booker_name,
+                    'email': group.primary_booker_email,
+                    'mobile': group.primary_booker_mobile,
+                    'ticket_no': group.primary_ticket_no,
                 },
-                'total_attendees': total_count,
-                'additional_count': len(additional_members),
-                'total_amount': total_amount,
-                'payment_status': overall_status,
-                'category_breakdown': category_counts,
-                'created_at': primary_member.created_at.isoformat(),
-                'registrations': [
-                    {
-                        'id': r.id,
-                        'ticket_no': r.ticket_no,
-                        'name': r.name,
-                        'mobile_number': r.mobile_number,
-                        'email': r.email,
-                        'age': r.age,
-                        'location': r.location,
-                        'company_name': r.company_name,
-                        'registration_for': r.registration_for,
-                        'payment_status': r.payment_status,
-                        'amount': float(r.amount),
-                        'is_primary_booker': r.is_primary_booker,
-                    }
-                    for r in registrations
-                ]
-            })
+                'total_attendees': group.total_attendees,
+                'additional_count': group.additional_count,
+                'total_amount': float(group.total_amount),
+                'payment_status': group.payment_status,
+                'category_breakdown': group.category_breakdown,
+                'created_at': group.created_at.isoformat(),
+            }
+            if group.booking_group_id in members_by_group:
+                data['registrations'] = members_by_group[group.booking_group_id]
+            bulk_groups.append(data)
 
-        # Sort by created_at (newest first)
-        bulk_groups.sort(key=lambda x: x['created_at'], reverse=True)
+        totals = groups.aggregate(groups=Count('id'), attendees=Sum('total_attendees'))
 
-        return Response({
+        response_data = {
             'success': True,
-            'count': len(bulk_groups),
-            'total_attendees': sum(g['total_attendees'] for g in bulk_groups),
+            'count': totals['groups'],
+            'total_attendees': totals['attendees'] or 0,
             'bulk_groups': bulk_groups
-        }, status=status.HTTP_200_OK)
+        }
+        if page is not None:
+            response_data['next'] = paginator.get_next_link()
+            response_data['previous'] = paginator.get_previous_link()
+
+        return Response(response_data, status=status.HTTP_200_OK)
 
     except Exception as e:
         return Response({
@@ -1028,42 +1126,66 @@ def get_bulk_registrations(request):
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+def _bulk_member(r):
+    """Compact member row used in bulk group listings"""
+    return {
+        'id': r.id,
+        'ticket_no': r.ticket_no,
+        'name': r.name,
+        'mobile_number': r.mobile_number,
+        'email': r.email,
+        'age': r.age,
+        'location': r.location,
+        'company_name': r.company_name,
+        'registration_for': r.registration_for,
+        'payment_status': r.payment_status,
+        'amount': float(r.amount),
+        'is_primary_booker': r.is_primary_booker,
+    }
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def get_bulk_group_details(request, booking_group_id):
     """
     Get detailed information for a specific bulk booking group
+    One query for the BookingGroup summary (which also versions the ETag) and,
+    unless the client's copy is current (304), one query for the members
     """
     try:
-        # Get all registrations in this booking group
-        registrations = Registration.objects.filter(
-            booking_group_id=booking_group_id
-        ).order_by('-is_primary_booker', 'created_at')
+        group = BookingGroup.objects.filter(booking_group_id=booking_group_id).first()
 
-        if not registrations.exists():
+        if group is None:
             return Response({
                 'error': 'Booking group not found'
             }, status=status.HTTP_404_NOT_FOUND)
 
+        # Any member save/delete refreshes the group row and bumps updated_at
+        etag = make_etag('bulk-group', group.booking_group_id, group.updated_at.isoformat())
+        if etag_matches(request, etag):
+            return set_revalidate_headers(Response(status=status.HTTP_304_NOT_MODIFIED), etag)
+
+        # Get all registrations in this booking group (evaluated once)
+        registrations = list(Registration.objects.filter(
+            booking_group_id=booking_group_id
+        ).order_by('-is_primary_booker', 'created_at'))
+
         # Serialize registration data
         serializer = RegistrationSerializer(registrations, many=True)
 
-        # Calculate aggregated data
-        total_amount = sum(float(r.amount) for r in registrations)
-        primary_member = registrations.filter(is_primary_booker=True).first() or registrations.first()
-
-        return Response({
+        response = Response({
             'success': True,
             'booking_group_id': booking_group_id,
-            'total_attendees': registrations.count(),
-            'total_amount': total_amount,
+            'total_attendees': len(registrations),
+            'total_amount': float(sum(r.amount for r in registrations)),
             'primary_booker': {
-                'name': primary_member.primary_booker_name or primary_member.name,
-                'email': primary_member.primary_booker_email or primary_member.email,
-                'mobile': primary_member.primary_booker_mobile or primary_member.mobile_number,
+                'name': group.primary_booker_name,
+                'email': group.primary_booker_email,
+                'mobile': group.primary_booker_mobile,
             },
             'registrations': serializer.data
         }, status=status.HTTP_200_OK)
+        return set_revalidate_headers(response, etag)
 
     except Exception as e:
         return Response({
@@ -1080,46 +1202,44 @@ def scan_qr_dual_behavior(request, ticket_no):
     - If user is not authenticated (normal member): Return feedback form data
     """
     try:
-        # Try to find the registration
-        try:
-            registration = Registration.objects.get(ticket_no=ticket_no)
-
-            # Check if user is authenticated (volunteer/admin)
-            if request.user.is_authenticated and request.user.is_staff:
-                # VOLUNTEER FLOW - Return data for attendance marking
-                return Response({
-                    'flow': 'attendance',
-                    'success': True,
-                    'ticket_no': ticket_no,
-                    'name': registration.name,
-                    'mobile': registration.mobile_number,
-                    'email': registration.email,
-                    'company': registration.company_name,
-                    'registration_for': registration.registration_for,
-                    'payment_status': registration.payment_status,
-                    'amount': str(registration.amount),
-                    'message': 'Authenticated user - proceed to attendance page'
-                }, status=status.HTTP_200_OK)
-            else:
-                # PUBLIC MEMBER FLOW - Return data for feedback form
-                # Check if feedback already submitted
-                feedback_exists = EventFeedback.objects.filter(registration=registration).exists()
+        # Registration fields and feedback state in one (cached) query
+        registration = get_scan_qr_data(ticket_no)
 
-                return Response({
-                    'flow': 'feedback',
-                    'success': True,
-                    'ticket_no': ticket_no,
-                    'name': registration.name,
-                    'registration_for': registration.registration_for,
-                    'feedback_submitted': feedback_exists,
-                    'message': 'Please provide your feedback' if not feedback_exists else 'Feedback already submitted'
-                }, status=status.HTTP_200_OK)
-
-        except Registration.DoesNotExist:
+        if registration is None:
             return Response({
                 'error': 'Ticket not found. Please check the ticket number.'
             }, status=status.HTTP_404_NOT_FOUND)
 
+        # Check if user is authenticated (volunteer/admin)
+        if request.user.is_authenticated and request.user.is_staff:
+            # VOLUNTEER FLOW - Return data for attendance marking
+            return Response({
+                'flow': 'attendance',
+                'success': True,
+                'ticket_no': ticket_no,
+                'name': registration['name'],
+                'mobile': registration['mobile_number'],
+                'email': registration['email'],
+                'company': registration['company_name'],
+                'registration_for': registration['registration_for'],
+                'payment_status': registration['payment_status'],
+                'amount': str(registration['amount']),
+                'message': 'Authenticated user - proceed to attendance page'
+            }, status=status.HTTP_200_OK)
+        else:
+            # PUBLIC MEMBER FLOW - Return data for feedback form
+            feedback_exists = registration['feedback_submitted']
+
+            return Response({
+                'flow': 'feedback',
+                'success': True,
+                'ticket_no': ticket_no,
+                'name': registration['name'],
+                'registration_for': registration['registration_for'],
+                'feedback_submitted': feedback_exists,
+                'message': 'Please provide your feedback' if not feedback_exists else 'Feedback already submitted'
+            }, status=status.HTTP_200_OK)
+
     except Exception as e:
         return Response({
             'error': f'Error processing scan: {str(e)}'
@@ -1359,26 +1479,91 @@ def submit_feedback(request):
     """
     Submit event feedback for a ticket
     Public endpoint - allows anyone to submit feedback once per ticket
+    With FEEDBACK_QUEUE_ENABLED the submission is validated, queued for a
+    batched insert and acknowledged with 202
     """
     try:
         serializer = EventFeedbackSubmitSerializer(data=request.data, context={'request': request})
 
-        if serializer.is_valid():
-            feedback = serializer.save()
+        if not serializer.is_valid():
+            return Response({
+                'error': 'Invalid feedback data',
+                'details': serializer.errors
+            }, status=status.HTTP_400_BAD_REQUEST)
 
-            # Return success with feedback details
-            response_serializer = EventFeedbackSerializer(feedback)
+        if getattr(django_settings, 'FEEDBACK_QUEUE_ENABLED', False):
+            get_feedback_queue().submit(serializer.get_feedback_fields())
             return Response({
                 'success': True,
-                'message': 'Thank you for your feedback!',
-                'feedback': response_serializer.data
-            }, status=status.HTTP_201_CREATED)
-        else:
+                'queued': True,
+                'message': 'Thank you for your feedback!'
+            }, status=status.HTTP_202_ACCEPTED)
+
+        try:
+            feedback = serializer.save()
+        except ValidationError as e:
             return Response({
-                'error': 'Invalid feedback data',
-                'details': serializer.errors
+                'error': 'Feedback has already been submitted for this ticket.',
+                'details': e.detail
             }, status=status.HTTP_400_BAD_REQUEST)
 
+        # Return success with feedback details
+        response_serializer = EventFeedbackSerializer(feedback)
+        return Response({
+            'success': True,
+            'message': 'Thank you for your feedback!',
+            'feedback': response_serializer.data
+        }, status=status.HTTP_201_CREATED)
+
+    except Exception as e:
+        return Response({
+            'error': f'Error submitting feedback: {str(e)}'
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def submit_feedback_bulk(request):
+    """
+    Submit many feedback entries at once (admin only, e.g. collected offline)
+    Tickets are resolved in one query and new rows inserted with one bulk INSERT
+
+    Request Body:
+    {
+        "feedback": [
+            {"ticket_no": "BNI001", "overall_rating": 5, "speaker_rating": 4, "attend_future": "YES"},
+            ...
+        ]
+    }
+    """
+    try:
+        entries = request.data.get('feedback')
+        if not isinstance(entries, list) or not entries:
+            return Response({
+                'error': 'feedback must be a non-empty list'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        ticket_numbers = [entry.get('ticket_no') for entry in entries if isinstance(entry, dict) and entry.get('ticket_no')]
+        registrations = Registration.objects.in_bulk(ticket_numbers, field_name='ticket_no')
+
+        valid_entries = []
+        errors = []
+        for index, entry in enumerate(entries):
+            serializer = EventFeedbackSubmitSerializer(data=entry, context={'registrations': registrations})
+            if serializer.is_valid():
+                valid_entries.append(serializer.get_feedback_fields())
+            else:
+                errors.append({'index': index, 'ticket_no': entry.get('ticket_no') if isinstance(entry, dict) else None, 'details': serializer.errors})
+
+        created, duplicates = save_feedback_batch(valid_entries) if valid_entries else ([], [])
+
+        return Response({
+            'success': True,
+            'created': len(created),
+            'duplicates': duplicates,
+            'errors': errors
+        }, status=status.HTTP_200_OK)
+
     except Exception as e:
         return Response({
             'error': f'Error submitting feedback: {str(e)}'
@@ -1424,6 +1609,8 @@ def get_all_feedback(request):
     """
     Get all feedback submissions (admin only)
     Supports filtering by rating, category, etc.
+    Statistics come from one cached aggregate query; send ?page_size= or
+    ?cursor= to page through the feedback list instead of getting all of it
     """
     try:
         feedbacks = EventFeedback.objects.all().select_related('registration')
@@ -1436,30 +1623,27 @@ def get_all_feedback(request):
         # Filter by minimum rating if provided
         min_rating = request.query_params.get('min_rating')
         if min_rating:
-            feedbacks = feedbacks.filter(overall_rating__gte=int(min_rating))
-
-        serializer = EventFeedbackSerializer(feedbacks, many=True)
+            min_rating = int(min_rating)
+            feedbacks = feedbacks.filter(overall_rating__gte=min_rating)
 
-        # Calculate statistics
-        total_feedback = feedbacks.count()
-        avg_overall = feedbacks.aggregate(avg=models.Avg('overall_rating'))['avg'] or 0
-        avg_speaker = feedbacks.aggregate(avg=models.Avg('speaker_rating'))['avg'] or 0
+        stats = get_feedback_stats(category=category, min_rating=min_rating)
 
-        # Count willingness to join BNI
-        join_yes = feedbacks.filter(attend_future='YES').count()
-        join_maybe = feedbacks.filter(attend_future='MAYBE').count()
-        join_no = feedbacks.filter(attend_future='NO').count()
+        paginator = FeedbackCursorPagination()
+        page = paginator.paginate_queryset(feedbacks, request)
+        if page is not None:
+            serializer = EventFeedbackSerializer(page, many=True)
+            return Response({
+                'success': True,
+                **stats,
+                'next': paginator.get_next_link(),
+                'previous': paginator.get_previous_link(),
+                'feedback': serializer.data
+            }, status=status.HTTP_200_OK)
 
+        serializer = EventFeedbackSerializer(feedbacks, many=True)
         return Response({
             'success': True,
-            'total_feedback': total_feedback,
-            'average_rating': round(avg_overall, 2),
-            'average_speaker_rating': round(avg_speaker, 2),
-            'join_bni': {
-                'yes': join_yes,
-                'maybe': join_maybe,
-                'no': join_no
-            },
+            **stats,
             'feedback': serializer.data
         }, status=status.HTTP_200_OK)
 
@@ -1469,6 +1653,66 @@ def get_all_feedback(request):
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def export_feedback(request):
+    """
+    Stream all feedback as a file download (admin only)
+
+    Query params:
+        file_format: csv (default) or jsonl
+        gzip: 1 to gzip the download
+        category, min_rating: same filters as feedback/all/
+    """
+    try:
+        export_format = request.query_params.get('file_format', 'csv')
+        if export_format not in EXPORT_FORMATS:
+            return Response({
+                'error': f"file_format must be one of: {', '.join(EXPORT_FORMATS)}"
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        feedbacks = EventFeedback.objects.all()
+
+        category = request.query_params.get('category')
+        if category:
+            feedbacks = feedbacks.filter(registration__registration_for=category)
+
+        min_rating = request.query_params.get('min_rating')
+        if min_rating:
+            feedbacks = feedbacks.filter(overall_rating__gte=int(min_rating))
+
+        columns = [
+            ('id', 'id'),
+            ('ticket_no', 'registration__ticket_no'),
+            ('attendee_name', 'registration__name'),
+            ('attendee_mobile', 'registration__mobile_number'),
+            ('registration_category', 'registration__registration_for'),
+            ('overall_rating', 'overall_rating'),
+            ('speaker_rating', 'speaker_rating'),
+            ('attend_future', 'attend_future'),
+            ('submitted_at', 'submitted_at'),
+            ('ip_address', 'ip_address'),
+            ('user_agent', 'user_agent'),
+        ]
+        rows = feedbacks.order_by('submitted_at', 'id').values_list(
+            *[field for _, field in columns]
+        ).iterator(chunk_size=2000)
+
+        stamp = timezone.now().strftime('%Y%m%d_%H%M%S')
+        return streaming_export(
+            [name for name, _ in columns],
+            rows,
+            f'feedback_{stamp}',
+            export_format=export_format,
+            compress=request.query_params.get('gzip') in ('1', 'true')
+        )
+
+    except Exception as e:
+        return Response({
+            'error': str(e)
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
 @api_view(['DELETE'])
 @permission_classes([IsAuthenticated])
 def delete_feedback(request, feedback_id):